@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Adaptive Wartezeiten für den Scan (online)
+"""
+Online controller for the scan waits in copy_text_at_position.
+
+The controller tracks the clipboard-arrival latency at a target percentile
+with a decayed stochastic quantile estimate. It only needs to know, per item
+slot, whether the text was already there at the first clipboard read after
+Ctrl+C (``observe(late=False)``) or only at the re-check (``late=True``):
+
+    wait *= exp(rate * (late - (1 - percentile)))
+
+converges to the wait at which a fraction ``1 - percentile`` of items arrive
+late, i.e. the percentile of the latency distribution, and keeps following it
+when the machine gets faster or slower. Old observations decay with the
+learning rate.
+
+The measured time from Ctrl+C to the read that returned the text
+(``observe(late, latency)``) is kept per session and shown as p50/p95 in the
+summary. It does not drive the estimate: it is rounded up to the read
+schedule (POST_COPY_WAIT, or POST_COPY_WAIT + EMPTY_RECHECK_WAIT), so
+"arrived before the first read" is the only unbiased bit it carries.
+
+The other scan waits are scaled with the same factor relative to their
+configured values, clamped to [min_scale, max_scale]. HOVER_SETTLE and
+EMPTY_RECHECK_WAIT are only ever lengthened (``FLOOR_KEYS``): a shorter hover
+turns items into "copied too early" and a shorter re-check turns slow items
+into empty slots, and neither shows up as a late arrival. When late arrivals
+pile up (more than ``burst`` in a row) all waits back off immediately by
+``backoff``.
+
+A Ctrl+C sent before the tooltip is up copies nothing at all, so a too short
+hover wait never shows up as a late arrival; the slot just reads as empty.
+The sorter reports such misses with ``miss()``, which backs off at once: a
+slot from ``verification_sample()`` (a few of the round's empty slots, read
+again with ``verify_waits``, the longest waits the controller would use)
+that turns out to hold an item, and a failed clipboard clear. The factor at
+which a miss happened becomes a floor for the rest of the session, so the
+estimate does not shrink straight back into it. A slot that was occupied
+last round only gets one extra read with the configured EMPTY_RECHECK_WAIT;
+if it stays empty, the player emptied it and nothing is reported.
+"""
+import math
+from collections import deque
+
+# Wait keys of the timing block that the controller scales
+SCALED_KEYS = ("HOVER_SETTLE", "POST_COPY_WAIT", "EMPTY_RECHECK_WAIT", "SUCCESS_PAD", "CLIPBOARD_WAIT")
+# Waits that are never shortened below their configured value
+FLOOR_KEYS = ("HOVER_SETTLE", "EMPTY_RECHECK_WAIT")
+LATENCY_WINDOW = 1000  # gemessene Kopie->Text-Latenzen für p50/p95
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "target_percentile": 0.95,
+    "learning_rate": 0.05,
+    "min_scale": 0.5,
+    "max_scale": 2.0,
+    "backoff": 1.5,
+    "burst": 2,
+    "verify_empty": 2,       # leere Slots pro Runde, die mit den konfigurierten Wartezeiten nachgeprüft werden
+}
+
+
+class AdaptiveTimingController(object):
+    """Adjusts the scan waits from observed clipboard arrivals."""
+
+    def __init__(self, timing, settings=None):
+        settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        self.percentile = min(0.999, max(0.5, float(settings["target_percentile"])))
+        self.rate = float(settings["learning_rate"])
+        self.min_scale = float(settings["min_scale"])
+        self.max_scale = float(settings["max_scale"])
+        self.backoff = float(settings["backoff"])
+        self.burst = max(1, int(settings["burst"]))
+        self.verify_empty = max(0, int(settings["verify_empty"]))
+        self.base = {key: float(timing.get(key, 0.0)) for key in SCALED_KEYS}
+        self.scale = 1.0
+        self.miss_floor = self.min_scale  # ein Faktor, bei dem ein Fehlgriff auftrat, wird nicht wieder unterschritten
+        self.waits = dict(self.base)
+        self.verify_waits = {key: value * max(1.0, self.max_scale) for key, value in self.base.items()}
+        self._late_streak = 0
+        self._verify_cursor = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.reset_round()
+
+    def reset_round(self):
+        self.round_items = 0
+        self.round_late = 0
+        self.round_backoffs = 0
+        self.round_misses = 0
+
+    def _set_scale(self, scale):
+        self.scale = min(self.max_scale, max(self.miss_floor, scale))
+        for key, value in self.base.items():
+            self.waits[key] = value * (max(1.0, self.scale) if key in FLOOR_KEYS else self.scale)
+
+    def observe(self, late, latency=None):
+        """One item slot: late=True if its text only showed up at the re-check; latency = Ctrl+C to read (s)."""
+        self.round_items += 1
+        if latency is not None:
+            self.latencies.append(latency)
+        if late:
+            self.round_late += 1
+            self._late_streak += 1
+            if self._late_streak >= self.burst:
+                self._late_streak = 0
+                self.round_backoffs += 1
+                self._set_scale(self.scale * self.backoff)
+                return
+        else:
+            self._late_streak = 0
+        self._set_scale(self.scale * math.exp(self.rate * ((1.0 if late else 0.0) - (1.0 - self.percentile))))
+
+    def miss(self):
+        """An item slot whose text never arrived (copied too early, clipboard timeout): back off at once."""
+        self.round_items += 1
+        self.round_misses += 1
+        self._late_streak = 0
+        self.round_backoffs += 1
+        self.miss_floor = min(self.max_scale, max(self.miss_floor, self.scale))
+        self._set_scale(self.scale * self.backoff)
+
+    def verification_sample(self, empty_slots):
+        """Up to verify_empty of the round's empty slots, rotating through them from round to round."""
+        if not self.verify_empty or not empty_slots:
+            return []
+        ordered = sorted(empty_slots)
+        start = self._verify_cursor % len(ordered)
+        self._verify_cursor += self.verify_empty
+        return (ordered[start:] + ordered[:start])[:self.verify_empty]
+
+    def latency_percentile(self, q):
+        """q-quantile of the session's measured Ctrl+C-to-read latencies in seconds (None without samples)."""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def summary(self):
+        """One-line German summary for log and status window."""
+        late_rate = self.round_late / self.round_items if self.round_items else 0.0
+        latency = ""
+        if self.latencies:
+            latency = (f"Kopie->Text p50 {self.latency_percentile(0.5) * 1000:.0f}ms / "
+                       f"p95 {self.latency_percentile(0.95) * 1000:.0f}ms, ")
+        return (f"Adaptives Timing: Faktor {self.scale:.2f} (p{self.percentile * 100:.0f}), "
+                f"Hover {self.waits['HOVER_SETTLE'] * 1000:.0f}ms, Nach-Kopie {self.waits['POST_COPY_WAIT'] * 1000:.0f}ms, "
+                f"Nachprüfung {self.waits['EMPTY_RECHECK_WAIT'] * 1000:.0f}ms, "
+                f"{latency}spät {self.round_late}/{self.round_items} ({late_rate:.0%}), Fehlgriffe {self.round_misses}, "
+                f"Backoffs {self.round_backoffs}")
@@ -0,0 +1,450 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Automatische Inventar-Kalibrierung aus einem Screenshot (NumPy)
+"""
+Finds the inventory grid in one screenshot and derives the ``inventory``
+config values (``FIRST_SLOT_TOP_LEFT_X/Y``, ``SLOT_WIDTH``, ``SLOT_HEIGHT``,
+``ROWS``, ``COLUMNS``).
+
+1. The search region (``auto_calibration.screenshot_region`` or the lower
+   right part of the screen, where the game draws the inventory) is
+   converted to grey and block-averaged to about 700 px width.
+2. A procedurally drawn empty-cell template (light frame, dark inside) is
+   matched at several scales with normalized cross-correlation (FFT for the
+   correlation, integral images for the local statistics). A peak only
+   counts together with its four lattice neighbours, so a single square
+   button does not beat a grid; the best score must reach
+   ``auto_calibration.match_threshold``.
+3. At full resolution, line profiles (block-averaged gradients across a
+   band of cells) give the grid period (autocorrelation) and the phase of a
+   line comb fitted to all lines at once; walking outwards while the lines
+   stay strong gives the number of rows and columns. Rows are traced in a
+   band around the match, columns across all rows, then rows again across
+   all columns. A last comb fit over exactly the grid's lines (outer frame
+   corrected by half a frame width) gives origin and slot size.
+
+Only NumPy is required; screenshots can be anything ``numpy.asarray``
+understands (PIL images from the screen backend) or files (``.npy`` always,
+``.png``/``.jpg`` with Pillow installed). ``synthetic_screenshot`` draws a
+test screen with a known grid, items and a distracting stash grid::
+
+    python auto_calibration.py screenshot.png
+    python auto_calibration.py --synthetic 3840x2160 --check
+    python auto_calibration.py screenshot.png --write --profile MEIN_PROFIL
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+import config_store
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+DEFAULT_SETTINGS = {
+    "match_threshold": 0.3,
+    "screenshot_region": None,  # [links, oben, breite, höhe] in Bildschirm-Pixeln, None = unten rechts
+}
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+
+SEARCH_REGION = (0.45, 0.35, 0.55, 0.65)  # Anteil von Breite/Höhe: links, oben, breite, höhe
+WORK_WIDTH = 700                          # Zielbreite der verkleinerten Suchregion
+CELL_SIZE_RANGE = (0.035, 0.075)          # Slotgröße relativ zur Bildschirmhöhe
+SCALE_STEPS = 9
+LINE_STRENGTH = 0.35                      # Gitterlinie gilt, wenn >= Anteil der Referenzlinien
+
+
+class AutoCalibrationError(Exception):
+    """The inventory grid could not be found in the screenshot."""
+
+
+# --- Bilder ---
+def to_gray(image):
+    """Float32 grey image from an array or PIL image (H x W, H x W x 3 or x 4)."""
+    array = np.asarray(image)
+    if array.ndim == 3:
+        array = array[..., :3].astype(np.float32) @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    return array.astype(np.float32, copy=False)
+
+
+def load_screenshot(path):
+    """Loads a stored screenshot (.npy, or any format Pillow reads)."""
+    if path.endswith(".npy"):
+        return np.load(path)
+    try:
+        from PIL import Image
+    except ImportError:
+        raise AutoCalibrationError(f"{path}: Pillow ist nicht installiert (pip install pillow) - .npy geht immer")
+    with Image.open(path) as image:
+        return np.asarray(image.convert("RGB"))
+
+
+def downsample(gray, factor):
+    """Block mean by an integer factor (crops the remainder)."""
+    if factor <= 1:
+        return gray
+    h, w = gray.shape[0] // factor * factor, gray.shape[1] // factor * factor
+    return gray[:h, :w].reshape(h // factor, factor, w // factor, factor).mean(axis=(1, 3))
+
+
+# --- Template Matching ---
+def _border(size):
+    """Frame width of a cell of ``size`` pixels (about 4 %)."""
+    return max(1, int(round(size / 25.0)))
+
+
+def cell_template(size):
+    """Empty inventory cell: light frame on a dark inside, zero mean."""
+    size = max(4, int(round(size)))
+    border = _border(size)
+    template = np.zeros((size, size), dtype=np.float32)
+    template[:border, :] = template[-border:, :] = 1.0
+    template[:, :border] = template[:, -border:] = 1.0
+    return template - template.mean()
+
+
+def _window_sums(values, h, w):
+    integral = np.zeros((values.shape[0] + 1, values.shape[1] + 1), dtype=np.float64)
+    integral[1:, 1:] = values.cumsum(axis=0).cumsum(axis=1)
+    return integral[h:, w:] - integral[:-h, w:] - integral[h:, :-w] + integral[:-h, :-w]
+
+
+def ncc_map(image, template):
+    """Normalized cross-correlation for every position where the template fits (valid mode)."""
+    th, tw = template.shape
+    ih, iw = image.shape
+    if th > ih or tw > iw:
+        return np.zeros((0, 0), dtype=np.float32)
+    t = template - template.mean()
+    t_norm = float(np.sqrt((t * t).sum()))
+    shape = (ih + th, iw + tw)
+    spectrum = np.fft.rfft2(image, shape) * np.conj(np.fft.rfft2(t, shape))
+    corr = np.fft.irfft2(spectrum, shape)[:ih - th + 1, :iw - tw + 1]
+    n = th * tw
+    sums = _window_sums(image, th, tw)
+    sums_sq = _window_sums(image * image, th, tw)
+    variance = np.maximum(sums_sq - sums * sums / n, 0.0)
+    denominator = t_norm * np.sqrt(variance)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = np.where(denominator > 1e-6 * n, corr / denominator, 0.0)
+    return result.astype(np.float32)
+
+
+def _lattice_score(ncc, y, x, step):
+    """Peak value plus the mean of its four lattice neighbours (missing neighbours count as 0)."""
+    total = 0.0
+    for dy, dx in ((0, step), (0, -step), (step, 0), (-step, 0)):
+        ny, nx = y + dy, x + dx
+        if 0 <= ny < ncc.shape[0] and 0 <= nx < ncc.shape[1]:
+            total += float(ncc[max(0, ny - 1):ny + 2, max(0, nx - 1):nx + 2].max())
+    return float(ncc[y, x]) + total / 4.0
+
+
+def match_cell(work, cell_sizes, candidates=5):
+    """Best (score, ncc_peak, size, y, x) over all template sizes (work-image coordinates)."""
+    best = None
+    for size in cell_sizes:
+        template = cell_template(size)
+        ncc = ncc_map(work, template)
+        if ncc.size == 0:
+            continue
+        step = template.shape[0]
+        # Die stärksten Spitzen prüfen (Nachbarn im Gitterabstand), nicht nur das globale Maximum
+        flat = np.argpartition(ncc.ravel(), -candidates * 8)[-candidates * 8:]
+        checked = []
+        for index in flat[np.argsort(ncc.ravel()[flat])[::-1]]:
+            y, x = divmod(int(index), ncc.shape[1])
+            if any(abs(y - cy) < step // 2 and abs(x - cx) < step // 2 for cy, cx in checked):
+                continue
+            checked.append((y, x))
+            score = _lattice_score(ncc, y, x, step)
+            if best is None or score > best[0]:
+                best = (score, float(ncc[y, x]), step, y, x)
+            if len(checked) >= candidates:
+                break
+    return best
+
+
+# --- Gitter aus Kantenprofilen ---
+def _box(values, width):
+    width = max(1, int(width))
+    return np.convolve(values, np.ones(width) / width, mode="same")
+
+
+def line_profile(gray, axis, band, cell):
+    """
+    Grid-line strength along one axis within band=(start, stop) of the other axis. The band is
+    averaged in blocks of a third of a cell along the lines (grid lines survive, item textures and
+    noise do not), the absolute gradient across the lines is averaged over the blocks, smoothed
+    over the frame width (the two edges of a line merge into one peak) and the local mean over one
+    cell is subtracted, so the empty background beside the grid scores about 0.
+    """
+    start, stop = max(0, int(band[0])), int(band[1])
+    strip = gray[start:stop, :] if axis == 1 else gray[:, start:stop].T
+    block = max(1, int(cell / 3))
+    rows = strip.shape[0] // block * block
+    if rows == 0:
+        return np.zeros(max(0, strip.shape[1] - 1))
+    strip = strip[:rows].reshape(rows // block, block, strip.shape[1]).mean(axis=1)
+    profile = np.abs(np.diff(strip, axis=1)).mean(axis=0)
+    profile = _box(profile, 2 * _border(cell) + 1)
+    return np.maximum(profile - _box(profile, int(cell)), 0.0)
+
+
+def estimate_period(profile, expected):
+    """Grid period near ``expected`` from the profile's autocorrelation (sub-pixel)."""
+    values = profile - profile.mean()
+    n = len(values)
+    spectrum = np.fft.rfft(values, 2 * n)
+    autocorr = np.fft.irfft(spectrum * np.conj(spectrum))[:n]
+    low, high = int(expected * 0.75), min(n - 2, int(expected * 1.35) + 1)
+    if high <= low + 1:
+        return float(expected)
+    lag = low + int(np.argmax(autocorr[low:high + 1]))
+    if 0 < lag < n - 1:
+        a, b, c = autocorr[lag - 1], autocorr[lag], autocorr[lag + 1]
+        denominator = a - 2 * b + c
+        if denominator < 0:
+            return lag + 0.5 * (a - c) / denominator
+    return float(lag)
+
+
+def fit_comb(profile, period, anchor, lines=None, inset=0.0):
+    """
+    Phase and period of the line comb that best explains ``profile`` near ``anchor`` (joint search
+    over +-2 % of ``period`` and one period of phase; every line contributes, so one noisy peak
+    cannot pull the grid). Returns (offset, period): lines lie at offset + k * period.
+
+    With ``lines=(first_k, last_k)`` only the grid's own lines count and the phase moves by at most
+    3 px (refinement once the extent is known). The outer frame has a cell on one side only, so its
+    peak sits ``inset`` (half a frame width) inside the grid; the comb is shifted there accordingly.
+    """
+    n = len(profile)
+    positions = np.arange(n, dtype=np.float64)
+    if lines is not None:
+        ks = np.arange(lines[0], lines[1] + 1)
+        shift = np.zeros(len(ks))
+        shift[0], shift[-1] = inset, -inset
+    best = (-1.0, anchor, period)
+    for p in period * (1.0 + np.linspace(-0.02, 0.02, 41)):
+        if lines is None:
+            offsets = anchor + np.arange(-p / 2, p / 2, 0.25)
+            comb = np.arange(-int(anchor / p) - 1, int((n - anchor) / p) + 2) * p
+        else:
+            offsets = anchor + np.arange(-3.0, 3.25, 0.25)
+            comb = ks * p + shift
+        values = np.interp(offsets[:, None] + comb[None, :], positions, profile, left=0.0, right=0.0).sum(axis=1)
+        i = int(np.argmax(values))
+        if values[i] > best[0]:
+            best = (float(values[i]), float(offsets[i]), float(p))
+    return best[1], best[2]
+
+
+def trace_lines(profile, offset, period):
+    """
+    Grid extent along the comb: walks outwards from line k=0 while the lines stay strong (one hidden
+    line, e.g. under a large item, is bridged). Returns (first_k, last_k).
+    """
+    positions = np.arange(len(profile), dtype=np.float64)
+
+    def strength(k):
+        at = offset + k * period
+        if at < 0 or at > len(profile) - 1:
+            return -1.0
+        return float(np.interp(at + np.array([-1.0, 0.0, 1.0]), positions, profile).max())
+
+    threshold = LINE_STRENGTH * float(np.median([strength(k) for k in (-1, 0, 1, 2)]))
+    extent = [0, 0]
+    for index, direction in ((1, 1), (0, -1)):
+        k = 0
+        while True:
+            if strength(k + direction) >= threshold:
+                k += direction
+            elif strength(k + 2 * direction) >= threshold:
+                k += 2 * direction  # Eine verdeckte Linie (großes Item) überbrücken
+            else:
+                break
+        extent[index] = k
+    return extent[0], extent[1]
+
+
+def detect_grid(image, settings=None):
+    """
+    Locates the inventory grid. Returns a dict with the inventory config values plus
+    ``score`` (match quality) and ``seconds``. Raises AutoCalibrationError.
+    """
+    started = time.perf_counter()
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    gray = to_gray(image)
+    screen_h, screen_w = gray.shape
+    region = settings.get("screenshot_region")
+    if region:
+        left, top, width, height = (int(v) for v in region)
+    else:
+        left, top = int(screen_w * SEARCH_REGION[0]), int(screen_h * SEARCH_REGION[1])
+        width, height = int(screen_w * SEARCH_REGION[2]), int(screen_h * SEARCH_REGION[3])
+    crop = gray[top:top + height, left:left + width]
+    if crop.size == 0:
+        raise AutoCalibrationError(f"Suchregion {region} liegt außerhalb des Screenshots ({screen_w}x{screen_h}).")
+
+    factor = max(1, int(round(crop.shape[1] / float(WORK_WIDTH))))
+    work = downsample(crop, factor)
+    lo, hi = (screen_h * f / factor for f in CELL_SIZE_RANGE)
+    cell_sizes = sorted({int(round(s)) for s in np.geomspace(lo, hi, SCALE_STEPS)})
+    match = match_cell(work, cell_sizes)
+    if match is None or match[0] / 2 < settings["match_threshold"]:
+        score = match[0] / 2 if match else 0.0
+        raise AutoCalibrationError(f"Kein Inventar-Gitter gefunden (Score {score:.2f} < {settings['match_threshold']}).")
+    score, _peak, size, wy, wx = match
+
+    # Volle Auflösung: Zeilen aus einem Spaltenband um die Zelle, dann Spalten über alle gefundenen
+    # Zeilen, dann die Zeilen noch einmal über alle Spalten (große Items verdecken einzelne Linien)
+    cell = size * factor
+    cell_x, cell_y = wx * factor, wy * factor  # linke obere Ecke in crop-Koordinaten
+    band_x = (cell_x - 3 * cell, cell_x + 4 * cell)
+    for _pass in range(2):
+        profile_y = line_profile(crop, 0, band_x, cell)
+        offset_y, period_y = fit_comb(profile_y, estimate_period(profile_y, cell), cell_y)
+        first_y, last_y = trace_lines(profile_y, offset_y, period_y)
+        band_y = (offset_y + first_y * period_y, offset_y + last_y * period_y)
+        profile_x = line_profile(crop, 1, band_y, cell)
+        offset_x, period_x = fit_comb(profile_x, estimate_period(profile_x, cell), cell_x)
+        first_x, last_x = trace_lines(profile_x, offset_x, period_x)
+        band_x = (offset_x + first_x * period_x, offset_x + last_x * period_x)
+    if last_x <= first_x or last_y <= first_y:
+        raise AutoCalibrationError("Gitterlinien nicht eindeutig erkannt.")
+    inset = _border(cell) / 2.0
+    offset_x, period_x = fit_comb(profile_x, period_x, offset_x, (first_x, last_x), inset)
+    offset_y, period_y = fit_comb(profile_y, period_y, offset_y, (first_y, last_y), inset)
+    # Profil-Index i liegt zwischen Pixel i und i+1
+    origin_x = offset_x + first_x * period_x + 0.5
+    origin_y = offset_y + first_y * period_y + 0.5
+
+    return {
+        "FIRST_SLOT_TOP_LEFT_X": int(round(left + origin_x)),
+        "FIRST_SLOT_TOP_LEFT_Y": int(round(top + origin_y)),
+        "SLOT_WIDTH": int(round(period_x)),
+        "SLOT_HEIGHT": int(round(period_y)),
+        "COLUMNS": last_x - first_x,
+        "ROWS": last_y - first_y,
+        "score": round(score / 2, 3),
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def inventory_values(result):
+    """Only the ``inventory`` config keys of a detect_grid() result."""
+    return {key: result[key] for key in ("FIRST_SLOT_TOP_LEFT_X", "FIRST_SLOT_TOP_LEFT_Y",
+                                         "SLOT_WIDTH", "SLOT_HEIGHT", "ROWS", "COLUMNS")}
+
+
+def write_profile_inventory(config_path, profile, inventory):
+    """Merges ``inventory`` into profiles[profile]["inventory"] (and the top-level block if active)."""
+    with open(config_path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    cfg.setdefault("profiles", {}).setdefault(profile, {}).setdefault("inventory", {}).update(inventory)
+    if cfg.get("active_profile") == profile:
+        cfg.setdefault("inventory", {}).update(inventory)
+    config_store.write_json(config_path, cfg)
+
+
+# --- Testbilder ---
+def synthetic_screenshot(width=2560, height=1440, rows=5, cols=12, origin=None, cell=None, fill=0.5, seed=0):
+    """
+    Draws a game-like screen (uint8 H x W x 3): noisy dark background, a stash grid with smaller cells
+    on the left and the inventory grid (light frames) with random items. Returns (image, truth).
+    """
+    rng = np.random.default_rng(seed)
+    cell = cell or int(round(height * 0.052))
+    if origin is None:
+        origin = (int(width * 0.625), int(height * 0.608))
+    image = rng.normal(24, 7, size=(height, width)).astype(np.float32)
+    image += np.linspace(0, 12, width, dtype=np.float32)[None, :]
+
+    def draw_grid(x0, y0, size, n_rows, n_cols, frame, inside):
+        border = max(1, size // 25)
+        for r in range(n_rows):
+            for c in range(n_cols):
+                x, y = x0 + c * size, y0 + r * size
+                image[y:y + size, x:x + size] = frame
+                image[y + border:y + size - border, x + border:x + size - border] = inside + rng.normal(0, 2)
+
+    stash_cell = int(round(cell * 0.7))
+    draw_grid(int(width * 0.02), int(height * 0.15), stash_cell, 12, 12, 55, 16)
+    draw_grid(origin[0], origin[1], cell, rows, cols, 62, 15)
+    # Items: 1x1 bis 2x3 Zellen, helle strukturierte Flächen
+    occupied = np.zeros((rows, cols), dtype=bool)
+    for _ in range(int(rows * cols * fill)):
+        w, h = (1, 1) if rng.random() < 0.6 else (int(rng.integers(1, 3)), int(rng.integers(2, 4)))
+        r, c = int(rng.integers(0, rows - h + 1)), int(rng.integers(0, cols - w + 1))
+        if occupied[r:r + h, c:c + w].any():
+            continue
+        occupied[r:r + h, c:c + w] = True
+        x, y = origin[0] + c * cell + 3, origin[1] + r * cell + 3
+        image[y:y + h * cell - 6, x:x + w * cell - 6] = rng.uniform(60, 200) + rng.normal(0, 25, (h * cell - 6, w * cell - 6))
+    rgb = np.clip(np.stack([image, image * 0.95, image * 0.85], axis=-1), 0, 255).astype(np.uint8)
+    truth = {"FIRST_SLOT_TOP_LEFT_X": origin[0], "FIRST_SLOT_TOP_LEFT_Y": origin[1],
+             "SLOT_WIDTH": cell, "SLOT_HEIGHT": cell, "ROWS": rows, "COLUMNS": cols}
+    return rgb, truth
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Erkennt das Inventar-Gitter in einem Screenshot.")
+    parser.add_argument("screenshot", nargs="?", help="Screenshot (.npy, .png, ...)")
+    parser.add_argument("--synthetic", metavar="BxH", help="Stattdessen ein Testbild erzeugen, z.B. 3840x2160")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--check", action="store_true", help="Ergebnis mit dem Testbild vergleichen (mit --synthetic)")
+    parser.add_argument("--save", help="Testbild als .npy speichern (mit --synthetic)")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_FILE, help="config.json (auto_calibration-Block, Ziel für --write)")
+    parser.add_argument("--profile", help="Ziel-Profil (Standard: aktives Profil)")
+    parser.add_argument("--write", action="store_true", help="Ergebnis ins Profil schreiben")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    settings = {}
+    if os.path.isfile(args.config):
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        settings = config.get("auto_calibration") or {}
+    else:
+        config = {}
+
+    truth = None
+    if args.synthetic:
+        width, height = (int(v) for v in args.synthetic.lower().split("x"))
+        image, truth = synthetic_screenshot(width, height, seed=args.seed)
+        if args.save:
+            np.save(args.save, image)
+    elif args.screenshot:
+        image = load_screenshot(args.screenshot)
+    else:
+        parser.error("Screenshot oder --synthetic angeben")
+
+    try:
+        result = detect_grid(image, settings)
+    except AutoCalibrationError as e:
+        logger.error(str(e))
+        return 1
+    print(json.dumps(result, indent=2))
+    if args.check and truth:
+        errors = {key: (result[key], value) for key, value in truth.items() if abs(result[key] - value) > 1}
+        if errors:
+            logger.error(f"Abweichung vom Testbild (gefunden, erwartet): {errors}")
+            return 1
+        logger.info("Testbild korrekt erkannt.")
+    if args.write:
+        profile = args.profile or config.get("active_profile", "default")
+        if profile == "default":
+            logger.warning("Aktives Profil ist 'default' - bitte --profile angeben.")
+            return 1
+        write_profile_inventory(args.config, profile, inventory_values(result))
+        logger.info(f"Inventar-Kalibrierung in Profil '{profile}' geschrieben ({args.config}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
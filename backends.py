@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Austauschbare Backends für Eingabe, Zwischenablage, Fenster, Bildschirm
+"""
+Pluggable backends for everything the sorter does to the outside world.
+
+The sorter only talks to a ``SorterBackend`` (``backend.input``,
+``backend.clipboard``, ``backend.window``, ``backend.screen``). The default
+backend wraps pyautogui, pyperclip and win32gui; ``simulator.SimulatedGame``
+provides the same interface for headless runs on Linux.
+
+The real libraries are imported when the default backend is created, not at
+import time, so this module itself has no GUI dependencies.
+"""
+
+
+class InputBackend(object):
+    """Mouse and keyboard."""
+
+    def configure_timing(self, timing):
+        """Applies the 'timing' config block (pyautogui pauses etc.)."""
+
+    def move_to(self, x, y, duration=0.0):
+        raise NotImplementedError
+
+    def click(self):
+        raise NotImplementedError
+
+    def key_down(self, key):
+        raise NotImplementedError
+
+    def key_up(self, key):
+        raise NotImplementedError
+
+    def press(self, key):
+        raise NotImplementedError
+
+    def position(self):
+        raise NotImplementedError
+
+
+class ClipboardBackend(object):
+    def paste(self):
+        raise NotImplementedError
+
+    def copy(self, text):
+        raise NotImplementedError
+
+
+class WindowBackend(object):
+    def foreground_title(self):
+        """Title of the current foreground window ('' if none)."""
+        raise NotImplementedError
+
+    def foreground_geometry(self):
+        """(left, top, width, height, dpi) of the foreground window's client area, or None if unknown."""
+        return None
+
+
+class ScreenBackend(object):
+    def screenshot(self, region=None):
+        """Returns a PIL-compatible image of the screen (or of region=(left, top, width, height))."""
+        raise NotImplementedError
+
+
+class SorterBackend(object):
+    """Bundle of the four backends used by the sorter."""
+
+    def __init__(self, input, clipboard, window, screen):
+        self.input = input
+        self.clipboard = clipboard
+        self.window = window
+        self.screen = screen
+
+
+# --- Default backend: pyautogui / pyperclip / win32gui ---
+class PyAutoGuiInput(InputBackend):
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def configure_timing(self, timing):
+        self._pyautogui.MINIMUM_DURATION = timing.get("MINIMUM_DURATION", 0.005)
+        self._pyautogui.MINIMUM_SLEEP = timing.get("MINIMUM_SLEEP", 0.001)
+        self._pyautogui.PAUSE = timing.get("PAUSE", 0.005)
+        self._pyautogui.DARWIN_CATCH_UP_TIME = timing.get("DARWIN_CATCH_UP_TIME", 0)
+
+    def move_to(self, x, y, duration=0.0):
+        self._pyautogui.moveTo(x, y, duration=duration)
+
+    def click(self):
+        self._pyautogui.click()
+
+    def key_down(self, key):
+        self._pyautogui.keyDown(key)
+
+    def key_up(self, key):
+        self._pyautogui.keyUp(key)
+
+    def press(self, key):
+        self._pyautogui.press(key)
+
+    def position(self):
+        x, y = self._pyautogui.position()
+        return x, y
+
+
+class PyperclipClipboard(ClipboardBackend):
+    def __init__(self):
+        import pyperclip
+        self._pyperclip = pyperclip
+
+    def paste(self):
+        return self._pyperclip.paste()
+
+    def copy(self, text):
+        self._pyperclip.copy(text)
+
+
+class Win32Window(WindowBackend):
+    def __init__(self):
+        import win32gui
+        self._win32gui = win32gui
+
+    def foreground_title(self):
+        handle = self._win32gui.GetForegroundWindow()
+        return self._win32gui.GetWindowText(handle) if handle else ""
+
+    def foreground_geometry(self):
+        handle = self._win32gui.GetForegroundWindow()
+        if not handle:
+            return None
+        left, top, right, bottom = self._win32gui.GetClientRect(handle)
+        origin_x, origin_y = self._win32gui.ClientToScreen(handle, (0, 0))
+        return origin_x, origin_y, right - left, bottom - top, self._dpi(handle)
+
+    @staticmethod
+    def _dpi(handle):
+        try:
+            import ctypes
+            return ctypes.windll.user32.GetDpiForWindow(handle) or 96
+        except (AttributeError, OSError):
+            return 96  # vor Windows 10 1607 gibt es GetDpiForWindow nicht
+
+
+class PyAutoGuiScreen(ScreenBackend):
+    def __init__(self):
+        import pyautogui
+        self._pyautogui = pyautogui
+
+    def screenshot(self, region=None):
+        return self._pyautogui.screenshot(region=region)
+
+
+def default_backend():
+    """Creates the real Windows backend. Raises ImportError if a library is missing."""
+    return SorterBackend(PyAutoGuiInput(), PyperclipClipboard(), Win32Window(), PyAutoGuiScreen())
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Offline Batch-Klassifizierung (ohne Spiel/GUI)
+"""
+Runs check_item_types + routing over large dumps of item texts, headless.
+
+Input is either a directory (every ``*.txt`` file is one clipboard text) or a
+JSONL file (one item per line: ``{"id": ..., "text": ...}`` or just a JSON
+string). Items are streamed in chunks to a ProcessPoolExecutor; results are
+written as JSONL in input order, followed by one ``{"type": "stats", ...}``
+record with timing statistics.
+
+Only the pure classification core is imported (item_classifier,
+routing_rules, filter_import), so this runs on Linux without pyautogui,
+win32gui or tkinter::
+
+    python batch_classify.py items.jsonl --config config.json -o routes.jsonl --workers 8
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import item_classifier
+import routing_rules
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+
+# Per worker process: compiled router (set by _init_worker)
+_worker_router = None
+
+
+def load_router(config_path):
+    """Configures the classifier from a config file and returns the compiled router."""
+    with open(config_path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    item_classifier.configure(cfg.get("item_definitions", {}))
+    rules = item_classifier.rules_from_config(cfg, os.path.dirname(os.path.abspath(config_path)))
+    return routing_rules.compile_routing_rules(rules, cfg.get("stash_tabs"))
+
+
+def _init_worker(config_path):
+    global _worker_router
+    _worker_router = load_router(config_path)
+
+
+def classify_chunk(chunk):
+    """Worker: classifies a list of (item_id, text). Returns (records, elapsed_seconds)."""
+    perf = time.perf_counter
+    t_chunk = perf()
+    records = []
+    for item_id, text in chunk:
+        t0 = perf()
+        item_types, destination = item_classifier.classify_text(text, _worker_router)
+        records.append({
+            "id": item_id,
+            "first_line": item_types.get("first_line", ""),
+            "item_class": item_types.get("item_class"),
+            "rarity": item_types.get("rarity"),
+            "should_click": item_types.get("should_click", False),
+            "destination": destination,
+            "us": round((perf() - t0) * 1e6, 2),
+        })
+    return records, perf() - t_chunk
+
+
+def iter_item_texts(source):
+    """Yields (item_id, text) from a directory of .txt files or a JSONL file, lazily."""
+    if os.path.isdir(source):
+        for root, _dirs, files in os.walk(source):
+            for name in sorted(files):
+                if name.lower().endswith(".txt"):
+                    path = os.path.join(root, name)
+                    with open(path, "r", encoding="utf-8", errors="replace") as f:
+                        yield os.path.relpath(path, source), f.read()
+        return
+
+    with open(source, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Zeile {line_no}: ungültiges JSON ({e}), übersprungen.")
+                continue
+            if isinstance(record, str):
+                yield line_no, record
+            elif isinstance(record, dict) and isinstance(record.get("text"), str):
+                yield record.get("id", line_no), record["text"]
+            else:
+                logger.warning(f"Zeile {line_no}: kein 'text'-Feld, übersprungen.")
+
+
+def iter_chunks(items, chunk_size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(source, out, config_path, workers=None, chunk_size=500):
+    """Classifies everything in ``source`` and streams JSONL to ``out``. Returns the stats dict."""
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = workers * 2  # Begrenzt den Speicher bei sehr großen Dumps
+    destinations = Counter()
+    item_latencies = []
+    chunk_times = []
+    total = 0
+    t_start = time.perf_counter()
+
+    def write_results(records, chunk_seconds):
+        nonlocal total
+        chunk_times.append(chunk_seconds)
+        for record in records:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            destinations[record["destination"] or "-"] += 1
+            item_latencies.append(record["us"])
+        total += len(records)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config_path,)) as pool:
+        pending = deque()
+        for chunk in iter_chunks(iter_item_texts(source), chunk_size):
+            pending.append(pool.submit(classify_chunk, chunk))
+            while len(pending) >= max_in_flight:
+                write_results(*pending.popleft().result())
+        while pending:
+            write_results(*pending.popleft().result())
+
+    elapsed = time.perf_counter() - t_start
+    item_latencies.sort()
+
+    def pct(q):
+        return item_latencies[min(len(item_latencies) - 1, int(q * len(item_latencies)))] if item_latencies else 0.0
+
+    stats = {
+        "type": "stats",
+        "items": total,
+        "chunks": len(chunk_times),
+        "workers": workers,
+        "seconds": round(elapsed, 4),
+        "items_per_second": round(total / elapsed, 1) if elapsed > 0 else None,
+        "item_us_p50": pct(0.50),
+        "item_us_p95": pct(0.95),
+        "item_us_max": item_latencies[-1] if item_latencies else 0.0,
+        "chunk_seconds_mean": round(sum(chunk_times) / len(chunk_times), 4) if chunk_times else 0.0,
+        "destinations": dict(destinations.most_common()),
+    }
+    out.write(json.dumps(stats, ensure_ascii=False) + "\n")
+    out.flush()
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Klassifiziert Item-Texte offline (ohne Spiel/GUI).")
+    parser.add_argument("source", help="Verzeichnis mit *.txt oder JSONL-Datei")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_FILE, help="config.json mit routing_rules")
+    parser.add_argument("-o", "--output", default="-", help="Ausgabe-JSONL (Standard: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse (Standard: CPU-Kerne)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Items pro Arbeitspaket")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.output == "-":
+        stats = run_batch(args.source, sys.stdout, args.config, args.workers, args.chunk_size)
+    else:
+        with open(args.output, "w", encoding="utf-8") as out:
+            stats = run_batch(args.source, out, args.config, args.workers, args.chunk_size)
+    logger.info(f"{stats['items']} Items in {stats['seconds']:.2f}s klassifiziert "
+                f"({stats['items_per_second']} Items/s, {stats['workers']} Prozesse).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
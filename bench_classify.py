@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Mikro-Benchmark der Item-Klassifizierung (ohne Spiel/GUI)
+"""
+Measures the classification hot path on a corpus of real PoE2 clipboard texts
+(``benchmarks/item_corpus.jsonl``, same format as batch_classify.py input).
+
+Phases, each timed over ``--runs`` runs of ``--passes`` passes over the corpus:
+
+- ``check_item_types kalt``: decision cache cleared before every pass, so every
+  text is parsed (first sight of an item in a round)
+- ``check_item_types warm``: every text is a cache hit (re-hovered slots,
+  duplicate stacks)
+- ``router.route``: routing of precomputed item types only
+- ``classify_text warm``: classification + routing, i.e. what
+  determine_target_destination does per slot
+- ``classify_many``: the whole corpus as one batch (one round)
+
+Reported per phase: items/s as mean, standard deviation, min and max over the
+runs, per-item microseconds (best run), plus allocations from a separate
+tracemalloc pass (peak KiB per pass, net allocated blocks per item). A cache
+pass replays a seeded stream with duplicates and unique variants and reports
+the hit rate and how often the size limit flushed the cache.
+
+Only item_classifier and routing_rules are imported, so this runs on Linux
+without pyautogui, win32gui or tkinter::
+
+    python bench_classify.py --runs 9 --passes 200
+    python bench_classify.py --json bench.json
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+import batch_classify
+import item_classifier
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+CORPUS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "item_corpus.jsonl")
+
+
+def load_corpus(path):
+    return [text for _item_id, text in batch_classify.iter_item_texts(path)]
+
+
+def _phase_functions(texts, router):
+    """Returns (name, setup, run_pass) per phase. run_pass() classifies the corpus once."""
+    check = item_classifier.check_item_types
+    route = router.route
+    classify = item_classifier.classify_text
+    cache = item_classifier._item_decision_cache
+    precomputed = []
+
+    def cold():
+        for text in texts:
+            cache.clear()
+            check(text)
+
+    def warm_setup():
+        for text in texts:
+            check(text)
+
+    def warm():
+        for text in texts:
+            check(text)
+
+    def route_setup():
+        precomputed[:] = [types for types in map(check, texts) if types.get("should_click")]
+
+    def route_only():
+        for types in precomputed:
+            route(types)
+
+    def classify_warm():
+        for text in texts:
+            classify(text, router)
+
+    def classify_batch():
+        cache.clear()
+        item_classifier.classify_many(texts, router)
+
+    return [
+        ("check_item_types kalt", None, cold),
+        ("check_item_types warm", warm_setup, warm),
+        ("router.route", route_setup, route_only),
+        ("classify_text warm", warm_setup, classify_warm),
+        ("classify_many", None, classify_batch),
+    ]
+
+
+def _items_per_pass(name, texts, router):
+    if name == "router.route":
+        return sum(1 for text in texts if item_classifier.check_item_types(text).get("should_click"))
+    return len(texts)
+
+
+def time_phase(run_pass, passes, runs):
+    """Returns the seconds of each run (gc disabled while timing, like timeit)."""
+    perf = time.perf_counter
+    durations = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(runs):
+            t0 = perf()
+            for _ in range(passes):
+                run_pass()
+            durations.append(perf() - t0)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return durations
+
+
+def measure_allocations(run_pass, items):
+    """One pass under tracemalloc: (peak KiB, net allocated blocks per item)."""
+    run_pass()  # Aufwärmen, damit Lazy-Initialisierung nicht mitzählt
+    gc.collect()
+    blocks_before = sys.getallocatedblocks()
+    tracemalloc.start()
+    try:
+        run_pass()
+        _current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    gc.collect()
+    net_blocks = sys.getallocatedblocks() - blocks_before
+    return round(peak / 1024, 1), round(net_blocks / items, 2) if items else 0.0
+
+
+def cache_stream(texts, length, unique_fraction, seed):
+    """Replays a seeded item stream through check_item_types and counts cache hits.
+
+    ``unique_fraction`` of the stream are variants that never repeat (different
+    stack size or item level), the rest are drawn from the corpus with repeats.
+    A call is a miss when it changed the cache size (insert or size-limit flush).
+    """
+    rng = random.Random(seed)
+    cache = item_classifier._item_decision_cache
+    cache.clear()
+    hits = flushes = 0
+    for i in range(length):
+        text = rng.choice(texts)
+        if rng.random() < unique_fraction:
+            text = f"{text}--------\nItem Level: {i}\n"
+        size = len(cache)
+        item_classifier.check_item_types(text)
+        if len(cache) == size:
+            hits += 1
+        elif len(cache) < size:
+            flushes += 1
+    return {"stream": length, "unique_fraction": unique_fraction, "hits": hits,
+            "hit_rate": round(hits / length, 4) if length else 0.0, "flushes": flushes}
+
+
+def run_benchmark(corpus_path, config_path, runs=7, passes=100, stream=5000, unique_fraction=0.3, seed=0):
+    texts = load_corpus(corpus_path)
+    if not texts:
+        raise ValueError(f"Korpus {corpus_path} enthält keine Item-Texte")
+    router = batch_classify.load_router(config_path)
+    results = {}
+    for name, setup, run_pass in _phase_functions(texts, router):
+        if setup:
+            setup()
+        items = _items_per_pass(name, texts, router)
+        durations = time_phase(run_pass, passes, runs)
+        rates = [items * passes / d for d in durations if d > 0]
+        peak_kib, blocks_per_item = measure_allocations(run_pass, items)
+        results[name] = {
+            "items": items * passes,
+            "items_per_second_mean": round(statistics.mean(rates), 1),
+            "items_per_second_stdev": round(statistics.stdev(rates), 1) if len(rates) > 1 else 0.0,
+            "items_per_second_min": round(min(rates), 1),
+            "items_per_second_max": round(max(rates), 1),
+            "us_per_item_best": round(min(durations) / (items * passes) * 1e6, 3) if items else 0.0,
+            "alloc_peak_kib_per_pass": peak_kib,
+            "alloc_net_blocks_per_item": blocks_per_item,
+        }
+    return {
+        "corpus": os.path.basename(corpus_path),
+        "corpus_items": len(texts),
+        "runs": runs,
+        "passes": passes,
+        "python": sys.version.split()[0],
+        "phases": results,
+        "cache": cache_stream(texts, stream, unique_fraction, seed),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mikro-Benchmark der Item-Klassifizierung (ohne Spiel/GUI).")
+    parser.add_argument("--corpus", default=CORPUS_FILE, help="JSONL-Korpus mit Item-Texten")
+    parser.add_argument("--config", default=batch_classify.DEFAULT_CONFIG_FILE, help="config.json mit routing_rules")
+    parser.add_argument("--runs", type=int, default=7, help="Messläufe pro Phase (für die Streuung)")
+    parser.add_argument("--passes", type=int, default=100, help="Durchgänge über den Korpus pro Messlauf")
+    parser.add_argument("--stream", type=int, default=5000, help="Länge des Item-Stroms für die Cache-Messung")
+    parser.add_argument("--unique", type=float, default=0.3, help="Anteil einmaliger Items im Strom")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    result = run_benchmark(args.corpus, args.config, max(1, args.runs), max(1, args.passes),
+                           args.stream, args.unique, args.seed)
+
+    print(f"{'Phase':<24} {'Items/s':>11} {'± Stdabw':>9} {'min':>11} {'max':>11} {'µs/Item':>8} "
+          f"{'Peak KiB':>9} {'Blöcke/Item':>11}")
+    for name, m in result["phases"].items():
+        print(f"{name:<24} {m['items_per_second_mean']:>11.0f} {m['items_per_second_stdev']:>9.0f} "
+              f"{m['items_per_second_min']:>11.0f} {m['items_per_second_max']:>11.0f} "
+              f"{m['us_per_item_best']:>8.2f} {m['alloc_peak_kib_per_pass']:>9.1f} "
+              f"{m['alloc_net_blocks_per_item']:>11.2f}")
+    cache = result["cache"]
+    print(f"Cache: {cache['hits']}/{cache['stream']} Treffer ({cache['hit_rate']:.1%}), "
+          f"{cache['flushes']} Leerungen durch das Größenlimit (Anteil einmaliger Items {cache['unique_fraction']:.0%})")
+    logger.info(f"{result['corpus_items']} Korpus-Items, {result['runs']} Läufe x {result['passes']} Durchgänge, "
+                f"Python {result['python']}.")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+        logger.info(f"Ergebnisse geschrieben: {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
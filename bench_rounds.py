@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - End-to-End Runden-Benchmark mit Regressions-Baseline
+"""
+Runs copy_and_process_inventory_items_async through the simulator for a fixed
+set of scenarios and compares the results with benchmarks/round_baseline.json.
+
+Scenarios (seeded, virtual clock, pinned geometry, so results are exactly
+reproducible):
+
+- ``empty``: empty inventory
+- ``full_singles``: all 60 slots filled with 1x1 items
+- ``mixed_large_rares``: rare body armours, shields and rings of different sizes
+- ``all_currency``: 60 currency stacks
+- ``many_tabs``: items for every stash tab
+- ``progressive_rescan``: a second, progressive round after a few new items were picked up
+  (known failure, see ``KNOWN_FAILURES``: the loot lands in slots that were
+  empty in round 1, which the progressive scan skips)
+
+Per scenario: simulated round time, slots scanned (Ctrl+C), clipboard reads, tab
+switches, mouse path length, p50/p95 per-slot latency (hover until the text
+was read) and sorting errors. Every metric is "lower is better"; the run
+fails (exit code 1) if one exceeds its baseline by more than the tolerance.
+Errors of a known failure are reported, but neither stored in the baseline
+nor compared::
+
+    python bench_rounds.py                 # vergleichen
+    python bench_rounds.py --update        # Baseline neu schreiben
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+
+import clocks
+import item_classifier
+import simulator
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks", "round_baseline.json")
+DEFAULT_TOLERANCE = 0.05
+# Szenarien, deren Fehler ein bekanntes Verhalten des Sorters zeigen - kein Sollwert für die Baseline
+KNOWN_FAILURES = {
+    "progressive_rescan": "Progressives Scannen überspringt Slots, die in der Vorrunde leer waren - "
+                          "dort aufgenommene Beute bleibt liegen, bis der progressive Scan zurückgesetzt wird.",
+}
+METRICS = ("round_seconds", "slots_scanned", "clipboard_reads", "tab_switches", "mouse_path_px",
+           "slot_latency_p50", "slot_latency_p95", "errors")
+
+# Feste Geometrie, damit eine Neukalibrierung in config.json die Baseline nicht verschiebt
+BENCH_PROFILE = {
+    "inventory": {"ROWS": 5, "COLUMNS": 12, "FIRST_SLOT_TOP_LEFT_X": 1595, "FIRST_SLOT_TOP_LEFT_Y": 862,
+                  "SLOT_WIDTH": 79, "SLOT_HEIGHT": 88},
+    "stash_tabs": {
+        "RARE": {"X": 1172, "Y": 154}, "RUNE": {"X": 1128, "Y": 1055}, "JEWEL": {"X": 1157, "Y": 713},
+        "QUALITY_SOCKET": {"X": 1146, "Y": 745}, "PRECURSOR_TABLET": {"X": 1153, "Y": 230},
+        "CHANCE_ITEMS": {"X": 1156, "Y": 681}, "ULTIMATUM_DJINN": {"X": 1160, "Y": 650},
+        "CURRENCY_CATALYST": {"X": 1166, "Y": 613},
+    },
+}
+BENCH_CONFIG = {
+    "debug": {"DEBUG_MODE": False, "PROGRESSIVE_SCAN": True, "ROUTING_PROFILER": False},
+    "active_profile": "BENCH",
+    "profiles": {"BENCH": BENCH_PROFILE},
+}
+
+CURRENCY = [t for t in simulator.SAMPLE_ITEMS if "Stackable Currency" in t[0]]
+SINGLES = [t for t in simulator.SAMPLE_ITEMS if t[1] == t[2] == 1]
+LARGE_RARES = [
+    ("Item Class: Body Armours\nRarity: Rare\nHavoc Shell {n}\nFull Plate\n--------\nItem Level: 80\n", 2, 3),
+    ("Item Class: Shields\nRarity: Rare\nGale Guard {n}\nTower Shield\n--------\nItem Level: 70\n", 2, 2),
+    ("Item Class: Rings\nRarity: Rare\nDoom Loop {n}\nSapphire Ring\n--------\nItem Level: 70\n", 1, 1),
+]
+
+
+def _fill_grid(game, rng, destination_of, items, fill=1.0):
+    return game.populate(rng, fill, items=items, destination_of=destination_of)
+
+
+def scenario_empty(game, rng, destination_of):
+    pass
+
+
+def scenario_full_singles(game, rng, destination_of):
+    _fill_grid(game, rng, destination_of, SINGLES)
+
+
+def scenario_mixed_large_rares(game, rng, destination_of):
+    _fill_grid(game, rng, destination_of, LARGE_RARES, fill=0.8)
+
+
+def scenario_all_currency(game, rng, destination_of):
+    _fill_grid(game, rng, destination_of, CURRENCY)
+
+
+def scenario_many_tabs(game, rng, destination_of):
+    _fill_grid(game, rng, destination_of, simulator.SAMPLE_ITEMS, fill=0.7)
+
+
+def scenario_progressive_rescan(game, rng, destination_of):
+    """Round 1 sorts a half-full inventory; returns a callback that adds new loot before round 2."""
+    _fill_grid(game, rng, destination_of, simulator.SAMPLE_ITEMS, fill=0.5)
+
+    def pick_up_loot():
+        # Neue Items landen wie im Spiel in den ersten freien Zellen
+        free = [(r, c) for r in range(game.rows) for c in range(game.cols) if (r, c) not in game.cells]
+        for row, col in free[:4]:
+            template = rng.choice(SINGLES)[0]
+            text = template.replace("{n}", str(rng.randint(1, 99)))
+            game.place_item(row, col, text, expected_tab=destination_of(text))
+    return pick_up_loot
+
+
+SCENARIOS = {
+    "empty": scenario_empty,
+    "full_singles": scenario_full_singles,
+    "mixed_large_rares": scenario_mixed_large_rares,
+    "all_currency": scenario_all_currency,
+    "many_tabs": scenario_many_tabs,
+    "progressive_rescan": scenario_progressive_rescan,
+}
+
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def run_scenario(sorter, name, seed=0, sim_kwargs=None):
+    """Runs one scenario and returns its metrics dict (the last round for progressive_rescan)."""
+    sorter.slots_found_empty_or_ignored = set()
+    sorter.slots_known_occupied = set()
+    game = simulator.SimulatedGame(sorter.config, seed=seed, clock=clocks.VirtualClock(), **(sim_kwargs or {}))
+    rng = random.Random(seed)
+    second_round = SCENARIOS[name](game, rng, lambda text: item_classifier.classify_text(text, sorter.routing_router)[1])
+    if second_round:
+        simulator.run_round(sorter, game)
+        second_round()
+        game.stats.clear()
+        game.slot_latencies = []
+    result = simulator.run_round(sorter, game)
+    outcome = game.outcome()
+    stats = result.stats
+    return {
+        "round_seconds": round(result.seconds, 4),
+        "slots_scanned": stats.get("copy_commands", 0),  # ein Ctrl+C pro gelesenem Slot, ohne Hover beim Verschieben
+        "clipboard_reads": stats.get("clipboard_reads", 0),
+        "tab_switches": stats.get("tab_switches", 0),
+        "mouse_path_px": round(stats.get("mouse_path_px", 0.0)),
+        "slot_latency_p50": round(_percentile(game.slot_latencies, 0.50), 4),
+        "slot_latency_p95": round(_percentile(game.slot_latencies, 0.95), 4),
+        "errors": outcome.missed + outcome.misrouted + outcome.unexpected,
+        "items_expected": outcome.expected,
+    }
+
+
+def run_suite(names=None, seed=0, sim_kwargs=None):
+    sorter = simulator.load_sorter(config=BENCH_CONFIG)
+    return {name: run_scenario(sorter, name, seed, sim_kwargs) for name in (names or SCENARIOS)}
+
+
+def compare(results, baseline, tolerance):
+    """Returns a list of (scenario, metric, baseline, current) regressions."""
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        for metric in METRICS:
+            if metric == "errors" and name in KNOWN_FAILURES:
+                continue
+            old, new = base.get(metric), metrics.get(metric)
+            if old is None or new is None:
+                continue
+            # Bei Baseline 0 (z.B. Fehler) ist jede Erhöhung eine Regression
+            allowed = old * (1 + tolerance) + 1e-9
+            if new > allowed:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Runden-Benchmark mit dem Simulator.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Nur diese Szenarien")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, default=None, help="Erlaubte Verschlechterung (0.05 = 5%%)")
+    parser.add_argument("--update", action="store_true", help="Baseline mit den aktuellen Ergebnissen überschreiben")
+    parser.add_argument("--model", help="Latenz-Modell (log_model.py) statt der Simulator-Defaults")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    sim_kwargs = simulator.load_latency_model(args.model) if args.model else None
+    t0 = time.perf_counter()
+    logger.setLevel(logging.WARNING)  # Sorter-Logs während der Runden unterdrücken
+    results = run_suite(args.scenario, args.seed, sim_kwargs)
+    logger.setLevel(logging.INFO)
+    elapsed = time.perf_counter() - t0
+
+    print(f"{'Szenario':<20} {'Runde s':>8} {'Scans':>6} {'Reads':>6} {'Tabs':>5} {'Maus px':>8} "
+          f"{'p50 ms':>7} {'p95 ms':>7} {'Fehler':>6}")
+    for name, m in results.items():
+        print(f"{name:<20} {m['round_seconds']:>8.2f} {m['slots_scanned']:>6} {m['clipboard_reads']:>6} "
+              f"{m['tab_switches']:>5} {m['mouse_path_px']:>8} {m['slot_latency_p50'] * 1000:>7.1f} "
+              f"{m['slot_latency_p95'] * 1000:>7.1f} {m['errors']:>6}")
+    logger.info(f"{len(results)} Szenario(s) in {elapsed:.2f}s Echtzeit.")
+    for name, m in results.items():
+        if m["errors"] and name in KNOWN_FAILURES:
+            logger.warning(f"Bekannter Fehler in {name} ({m['errors']} Item(s)): {KNOWN_FAILURES[name]}")
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    tolerance = args.tolerance if args.tolerance is not None else baseline.get("tolerance", DEFAULT_TOLERANCE)
+
+    if args.update:
+        scenarios = dict(baseline.get("scenarios", {}), **results)
+        for name in KNOWN_FAILURES:
+            if name in scenarios:
+                scenarios[name] = {k: v for k, v in scenarios[name].items() if k != "errors"}
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"tolerance": tolerance, "seed": args.seed, "scenarios": scenarios}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        logger.info(f"Baseline geschrieben: {args.baseline}")
+        return 0
+    if not baseline:
+        logger.warning(f"Keine Baseline gefunden ({args.baseline}) - mit --update anlegen.")
+        return 0
+
+    regressions = compare(results, baseline, tolerance)
+    for name, metric, old, new in regressions:
+        logger.error(f"Regression {name}.{metric}: {old} -> {new} (Toleranz {tolerance:.0%})")
+    if regressions:
+        return 1
+    logger.info(f"Keine Regression gegenüber der Baseline (Toleranz {tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
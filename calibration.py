@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Kalibrierung per Hotkey (asynchrone Zustandsmaschine, ohne input())
+"""
+Non-blocking calibration of the inventory grid and the stash tab buttons.
+
+A ``Calibrator`` walks through a list of ``CalibrationStep``s on its own
+thread with an asyncio event loop. Each step waits on an ``asyncio.Queue``
+for an event from the global hotkey callbacks (``capture()``, ``skip()``,
+``cancel()`` are thread-safe and only enqueue), reads the mouse position
+through the backend on capture, and reports its progress as a plain dict to
+``on_progress``; the sorter forwards that to the status mailbox, so the Tk
+thread never waits on the user and the worker never touches Tk.
+
+Positions come from a hotkey rather than a mouse click: a click at the
+target would already act in the game (picking up the item in the first
+slot, switching the stash tab).
+
+When all steps are done, ``on_finish(results)`` gets ``{step.key: (x, y)}``
+for every captured step; ``inventory_from_points`` turns the three grid
+points into the ``inventory`` config values.
+"""
+import asyncio
+import threading
+
+CAPTURE, SKIP, CANCEL = "capture", "skip", "cancel"
+
+
+class CalibrationStep(object):
+    """One position to capture."""
+
+    def __init__(self, key, prompt, optional=False):
+        self.key = key
+        self.prompt = prompt
+        self.optional = optional  # Überspringen erlaubt (alter Wert bleibt)
+
+
+def inventory_steps():
+    return [
+        CalibrationStep("slot_first", "Maus in die MITTE des ersten Slots (oben links)"),
+        CalibrationStep("slot_right", "Maus in die MITTE des Slots rechts daneben"),
+        CalibrationStep("slot_below", "Maus in die MITTE des Slots direkt darunter"),
+    ]
+
+
+def tab_steps(tab_names):
+    return [CalibrationStep(f"tab:{name}", f"Maus in die MITTE des Stash-Tab-Buttons '{name}'", optional=True)
+            for name in tab_names]
+
+
+def inventory_from_points(first, right, below):
+    """Inventory config values from the centres of three slots; raises ValueError for an impossible grid."""
+    slot_width = right[0] - first[0]
+    slot_height = below[1] - first[1]
+    if slot_width <= 0 or slot_height <= 0:
+        raise ValueError(f"Ungültige Slot-Dimensionen berechnet: Breite={slot_width}, Höhe={slot_height}. "
+                         f"Bitte erneut versuchen.")
+    return {
+        "FIRST_SLOT_TOP_LEFT_X": first[0] - slot_width // 2,
+        "FIRST_SLOT_TOP_LEFT_Y": first[1] - slot_height // 2,
+        "SLOT_WIDTH": slot_width,
+        "SLOT_HEIGHT": slot_height,
+    }
+
+
+class Calibrator(object):
+    """Runs one calibration pass; feed it hotkey events from any thread."""
+
+    def __init__(self, title, steps, read_position, on_progress=None, on_finish=None):
+        self.title = title
+        self.steps = list(steps)
+        self.read_position = read_position
+        self.on_progress = on_progress
+        self.on_finish = on_finish
+        self.results = {}
+        self.state = "idle"  # idle -> waiting -> done / cancelled / failed
+        self._loop = None
+        self._events = None
+        self._ready = threading.Event()
+        self._thread = None
+
+    @property
+    def active(self):
+        return self.state in ("idle", "waiting") and self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        self._thread = threading.Thread(target=lambda: asyncio.run(self._run()), name="kalibrierung", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=2)
+        return self
+
+    # --- Hotkey-Callbacks (beliebiger Thread) ---
+    def capture(self):
+        self._send(CAPTURE)
+
+    def skip(self):
+        self._send(SKIP)
+
+    def cancel(self):
+        self._send(CANCEL)
+
+    def _send(self, event):
+        if self._loop is not None and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._events.put_nowait, event)
+            except RuntimeError:
+                pass  # Loop bereits beendet
+
+    # --- Zustandsmaschine ---
+    def progress(self, index, message=None):
+        step = self.steps[index] if index < len(self.steps) else None
+        return {
+            "title": self.title,
+            "state": self.state,
+            "index": index,
+            "total": len(self.steps),
+            "prompt": step.prompt if step and self.state == "waiting" else "",
+            "optional": bool(step and step.optional),
+            "message": message or "",
+            "points": [(key, pos) for key, pos in self.results.items()],
+        }
+
+    def _report(self, index, message=None):
+        if self.on_progress:
+            self.on_progress(self.progress(index, message))
+
+    async def _run(self):
+        self._loop = asyncio.get_running_loop()
+        self._events = asyncio.Queue()
+        self._ready.set()
+        index = 0
+        message = None
+        try:
+            while index < len(self.steps):
+                step = self.steps[index]
+                self.state = "waiting"
+                self._report(index, message)
+                event = await self._events.get()
+                if event == CANCEL:
+                    self.state = "cancelled"
+                    self._report(index, "Kalibrierung abgebrochen.")
+                    return
+                if event == SKIP:
+                    if step.optional:
+                        message = f"'{step.key}' übersprungen."
+                        index += 1
+                    else:
+                        message = "Dieser Schritt kann nicht übersprungen werden."
+                    continue
+                self.results[step.key] = tuple(self.read_position())
+                message = f"{step.key}: {self.results[step.key]}"
+                index += 1
+            self.state = "done"
+            if self.on_finish:
+                self.on_finish(self.results)
+            self._report(index, message)
+        except Exception as e:  # z.B. ValueError aus inventory_from_points in on_finish
+            self.state = "failed"
+            self._report(index, f"Kalibrierung fehlgeschlagen: {e}")
+        finally:
+            self._loop = None
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Austauschbare Uhr (echt oder virtuell für Simulationen)
+"""
+Clock objects used for every timing call in the sorter.
+
+The sorter calls ``clock.perf_counter()``, ``clock.time()`` and
+``clock.sleep()`` instead of the ``time`` module; its ``asyncio.sleep`` calls
+follow the event loop's clock. ``RealClock`` is the default. For simulations,
+``VirtualClock`` plus ``run_virtual(coro, clock)`` run a whole round without
+real waiting:
+
+- ``VirtualTimeEventLoop.time()`` is the virtual clock, and whenever the loop
+  would block waiting for the next timer it jumps the clock forward instead
+- ``run_in_executor`` (and therefore ``asyncio.to_thread``) runs the function
+  inline, so blocking ``clock.sleep`` calls inside it advance the same clock
+  and the order of events stays deterministic
+
+The simulated elapsed time is ``clock.perf_counter()`` after the run.
+"""
+import asyncio
+import selectors
+import time
+
+
+class RealClock(object):
+    """Wall clock (the default)."""
+
+    perf_counter = staticmethod(time.perf_counter)
+    sleep = staticmethod(time.sleep)
+    time = staticmethod(time.time)
+
+
+class VirtualClock(object):
+    """Clock that only moves when something sleeps or the virtual event loop idles."""
+
+    def __init__(self, start=0.0, epoch=None):
+        self.now = float(start)
+        self.epoch = time.time() if epoch is None else float(epoch)
+        self.slept = 0.0  # Summe aller blockierenden sleep()-Aufrufe
+
+    def perf_counter(self):
+        return self.now
+
+    def time(self):
+        return self.epoch + self.now
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+            self.slept += seconds
+
+    def advance(self, seconds):
+        if seconds > 0:
+            self.now += seconds
+
+
+class _VirtualSelector(selectors.BaseSelector):
+    """Selector wrapper: never blocks, advances the virtual clock by the requested timeout instead."""
+
+    def __init__(self, clock, selector=None):
+        self.clock = clock
+        self._selector = selector or selectors.DefaultSelector()
+
+    def register(self, fileobj, events, data=None):
+        return self._selector.register(fileobj, events, data)
+
+    def unregister(self, fileobj):
+        return self._selector.unregister(fileobj)
+
+    def modify(self, fileobj, events, data=None):
+        return self._selector.modify(fileobj, events, data)
+
+    def select(self, timeout=None):
+        events = self._selector.select(0)
+        if events:
+            return events
+        if timeout is None:
+            # Nichts geplant: nur echte Ereignisse (z.B. call_soon_threadsafe) können weiterhelfen
+            return self._selector.select(None)
+        self.clock.advance(timeout)
+        return []
+
+    def close(self):
+        self._selector.close()
+
+    def get_key(self, fileobj):
+        return self._selector.get_key(fileobj)
+
+    def get_map(self):
+        return self._selector.get_map()
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """Event loop running on a VirtualClock: timers fire instantly, executor jobs run inline."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        super().__init__(_VirtualSelector(clock))
+        self._clock_resolution = 1e-9
+
+    def time(self):
+        return self.clock.perf_counter()
+
+    def run_in_executor(self, executor, func, *args):
+        future = self.create_future()
+        try:
+            future.set_result(func(*args))
+        except BaseException as e:
+            if isinstance(e, (KeyboardInterrupt, SystemExit)):
+                raise
+            future.set_exception(e)
+        return future
+
+
+def run_virtual(coro, clock=None):
+    """Like asyncio.run(coro), but on a VirtualTimeEventLoop. Returns the coroutine's result."""
+    loop = VirtualTimeEventLoop(clock or VirtualClock())
+    try:
+        asyncio.set_event_loop(loop)
+        return loop.run_until_complete(coro)
+    finally:
+        try:
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
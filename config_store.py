@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - config.json verzögert im Hintergrund und atomar schreiben
+"""
+Write-behind persistence for ``config.json``.
+
+``save_config`` in the sorter only calls ``ConfigWriter.mark_dirty()``; a
+background thread waits until no change arrived for ``DEBOUNCE`` seconds and
+then writes the file once, however many toggles, profile saves or
+calibrations happened in between. GUI actions therefore never wait on disk.
+
+Every write goes through ``write_atomic``: the new text is written to a temp
+file next to the target and fsynced, the current file is copied to
+``<name>.bak`` if it still parses as JSON (the last good version), and the
+temp file replaces the target with ``os.replace``. A crash at any point
+leaves either the old or the new file, never a truncated one;
+``read_json`` falls back to the backup if the file is corrupt anyway (e.g.
+after a hand edit).
+
+The writer serialises the live config dict on its own thread. A change that
+lands while a write is in progress bumps the version, so the writer simply
+writes again after the next debounce; a dict resized mid-serialisation
+(``RuntimeError``) is retried the same way.
+"""
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+DEBOUNCE = 0.5      # Sekunden ohne neue Änderung, bevor geschrieben wird
+RETRY_DELAY = 2.0   # nach einem Schreibfehler (z.B. Datei von einem anderen Programm gesperrt)
+BACKUP_SUFFIX = ".bak"
+
+
+def backup_path(path):
+    return path + BACKUP_SUFFIX
+
+
+def _is_valid_json(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            json.load(f)
+        return True
+    except (OSError, ValueError):
+        return False
+
+
+def write_atomic(path, text, keep_backup=True):
+    """Replaces ``path`` with ``text`` via temp file + os.replace; keeps the previous valid file as .bak."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if keep_backup and os.path.exists(path) and _is_valid_json(path):
+            backup_tmp = backup_path(path) + ".tmp"
+            shutil.copyfile(path, backup_tmp)
+            os.replace(backup_tmp, backup_path(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_json(path, data, keep_backup=True):
+    """Atomic write of a config dict in the repo's config.json format (indent 4, sorted keys)."""
+    write_atomic(path, json.dumps(data, indent=4, sort_keys=True), keep_backup)
+
+
+def read_json(path):
+    """
+    Loads a JSON file, falling back to its .bak if the file itself is corrupt.
+    Returns (data, used_backup). Raises the original error if neither is usable.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f), False
+    except ValueError:
+        if not os.path.exists(backup_path(path)):
+            raise
+        with open(backup_path(path), "r", encoding="utf-8") as f:
+            try:
+                return json.load(f), True
+            except ValueError:
+                pass
+        raise
+
+
+class ConfigWriter(object):
+    """Background writer: mark_dirty() from any thread, the file is written after the debounce."""
+
+    def __init__(self, path, snapshot, debounce=DEBOUNCE, keep_backup=True, clock=time.monotonic):
+        self.path = path
+        self.snapshot = snapshot  # () -> dict, wird im Writer-Thread serialisiert
+        self.debounce = debounce
+        self.keep_backup = keep_backup
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()  # Writer-Thread und flush() schreiben nie gleichzeitig
+        self._version = 0
+        self._written = 0
+        self._changed_at = 0.0
+        self._thread = None
+        self.writes = 0       # tatsächlich geschriebene Dateien
+        self.marks = 0        # Anzahl mark_dirty()
+        self.last_error = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="config-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    @property
+    def dirty(self):
+        with self._lock:
+            return self._version != self._written
+
+    def mark_dirty(self):
+        with self._lock:
+            self._version += 1
+            self._changed_at = self._clock()
+            self.marks += 1
+        self._wake.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait()
+            self._wake.clear()
+            while not self._stop.is_set():
+                with self._lock:
+                    if self._version == self._written:
+                        break
+                    remaining = self._changed_at + self.debounce - self._clock()
+                if remaining > 0:
+                    self._stop.wait(remaining)  # weitere Änderungen verlängern die Wartezeit
+                    continue
+                if not self._write():
+                    self._stop.wait(RETRY_DELAY)
+
+    def _write(self):
+        """Writes the current snapshot once; False if it failed (the config stays dirty)."""
+        with self._write_lock:
+            with self._lock:
+                version = self._version
+            try:
+                text = json.dumps(self.snapshot(), indent=4, sort_keys=True)
+                write_atomic(self.path, text, self.keep_backup)
+            except RuntimeError as e:  # Dict wurde während der Serialisierung geändert
+                logger.debug(f"Konfiguration während des Speicherns geändert, neuer Versuch: {e}")
+                return False
+            except Exception as e:
+                self.last_error = e
+                logger.error(f"Fehler beim Speichern der Konfiguration ({self.path}): {e}")
+                return False
+            with self._lock:
+                self._written = max(self._written, version)
+            self.writes += 1
+            self.last_error = None
+        logger.info(f"Konfiguration in {self.path} gespeichert.")
+        return True
+
+    def flush(self):
+        """Writes pending changes now on the calling thread (shutdown, tools); True if nothing is left."""
+        if self.dirty:
+            self._write()
+        return not self.dirty
+
+    def stop(self):
+        """Stops the thread and writes what is still pending."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        self.flush()
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Import von Loot-Filtern (.filter) als Routing-Regeln
+"""
+Imports the stash-relevant subset of a PoE item filter as routing rules.
+
+Supported conditions: Class, BaseType, Rarity, Quality, Sockets, ItemLevel and
+StackSize (with the usual =, ==, !=, <, <=, >, >= operators where they make
+sense). Conditions on the drop environment rather than the item (AreaLevel)
+are ignored and reported; a block with any other item condition is skipped,
+because dropping the condition would widen the rule to items the filter never
+meant. Style/sound actions are skipped silently.
+
+A block is routed to the stash tab named in a ``# Stash: TAB`` (or ``# Tab: TAB``)
+comment, either on the Show/Hide line or on its own line inside the block::
+
+    Show # Stash: RARE
+        Class == "Rings" "Amulets"
+        Rarity Rare
+        ItemLevel >= 60
+
+Show blocks without a tab use ``default_tab`` (or are skipped). By default
+(``hide_action`` "skip") a Hide block becomes a pass rule of the filter
+section: an item it matches skips all later filter blocks, including a
+``default_tab`` catch-all, and goes straight to the ``routing_rules``. With
+"ignore" Hide blocks become target-null rules that leave the items in the
+inventory - a typical filter hides whole classes, so that is opt-in. Blocks
+with ``Continue`` do not decide anything in the game, so they are skipped
+unless they carry their own tab comment.
+
+The result is a plain rule list for ``routing_rules.compile_routing_rules``,
+so an imported filter is compiled into the same indexed router as the JSON
+rules (class / rarity / base type dispatch, residual numeric predicates).
+"""
+import logging
+import os
+import re
+import sys
+from collections import Counter, namedtuple
+
+import routing_rules
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+FilterBlock = namedtuple("FilterBlock", ["line", "action", "conditions", "tab", "is_continue", "comment"])
+FilterCondition = namedtuple("FilterCondition", ["line", "keyword", "operator", "values"])
+ImportResult = namedtuple("ImportResult", ["rules", "skipped", "ignored_conditions", "block_count"])
+
+BLOCK_KEYWORDS = {"show": "Show", "hide": "Hide", "minimal": "Show"}
+SUPPORTED_CONDITIONS = {"Class", "BaseType", "Rarity", "Quality", "Sockets", "ItemLevel", "StackSize"}
+# Conditions on where the item dropped, not on the item: meaningless in the stash
+ENVIRONMENT_CONDITIONS = {"AreaLevel"}
+NUMERIC_CONDITIONS = {
+    # filter keyword -> routing rule key
+    "Quality": "quality",
+    "Sockets": "sockets",
+    "ItemLevel": "ilvl",
+    "StackSize": "stack_size",
+}
+ACTION_KEYWORDS = {
+    "SetTextColor", "SetBorderColor", "SetBackgroundColor", "SetFontSize",
+    "PlayAlertSound", "PlayAlertSoundPositional", "CustomAlertSound", "CustomAlertSoundOptional",
+    "PlayEffect", "MinimapIcon", "DisableDropSound", "EnableDropSound",
+    "DisableDropSoundIfAlertSound", "EnableDropSoundIfAlertSound", "Import",
+}
+RARITY_ORDER = ["normal", "magic", "rare", "unique"]
+FILTER_SECTION = "filter"  # routing rule section of all imported blocks
+OPERATORS = ("==", "!=", "<=", ">=", "=", "<", ">")
+
+_TAB_COMMENT = re.compile(r"#.*?\b(?:stash|tab)\s*[:=]\s*([A-Za-z0-9_]+)", re.IGNORECASE)
+_TOKEN = re.compile(r'"([^"]*)"|(\S+)')
+
+
+class FilterImportError(ValueError):
+    """Raised when a filter file cannot be read at all."""
+
+
+def _tokenize(text):
+    return [m.group(1) if m.group(1) is not None else m.group(2) for m in _TOKEN.finditer(text)]
+
+
+def _split_comment(line):
+    """Splits a line into (code, comment), ignoring '#' inside quotes."""
+    in_quotes = False
+    for i, ch in enumerate(line):
+        if ch == '"':
+            in_quotes = not in_quotes
+        elif ch == "#" and not in_quotes:
+            return line[:i], line[i:]
+    return line, ""
+
+
+def _tab_from_comment(comment):
+    match = _TAB_COMMENT.search(comment) if comment else None
+    return match.group(1).upper() if match else None
+
+
+def _parse_condition(line_no, code):
+    tokens = _tokenize(code)
+    keyword = tokens[0]
+    rest = tokens[1:]
+    operator = None
+    if rest:
+        first = rest[0]
+        for op in OPERATORS:
+            if first == op:
+                operator, rest = op, rest[1:]
+                break
+            if first.startswith(op) and not first.startswith(op + "="):
+                # "ItemLevel >=60"
+                operator, rest = op, [first[len(op):]] + rest[1:]
+                break
+    return FilterCondition(line_no, keyword, operator, rest)
+
+
+def parse_filter(lines):
+    """Parses filter text (iterable of lines) into FilterBlocks. Streams line by line."""
+    blocks = []
+    current = None
+    for line_no, raw in enumerate(lines, 1):
+        code, comment = _split_comment(raw.strip())
+        code = code.strip()
+        if not code:
+            # Comment-only line inside a block may carry the tab annotation
+            if current is not None and comment and current["tab"] is None:
+                current["tab"] = _tab_from_comment(comment)
+            continue
+
+        head = code.split(None, 1)[0]
+        if head.lower() in BLOCK_KEYWORDS and code.lower() == head.lower():
+            if current is not None:
+                blocks.append(FilterBlock(**current))
+            current = {"line": line_no, "action": BLOCK_KEYWORDS[head.lower()], "conditions": [],
+                       "tab": _tab_from_comment(comment), "is_continue": False,
+                       "comment": comment.lstrip("#").strip()}
+            continue
+
+        if current is None:
+            continue  # e.g. top-level Import lines
+        if head == "Continue":
+            current["is_continue"] = True
+        elif head not in ACTION_KEYWORDS:
+            current["conditions"].append(_parse_condition(line_no, code))
+
+    if current is not None:
+        blocks.append(FilterBlock(**current))
+    return blocks
+
+
+def _merge_range(ranges, key, lo, hi):
+    old_lo, old_hi = ranges.get(key, (None, None))
+    if old_lo is not None and (lo is None or old_lo > lo):
+        lo = old_lo
+    if old_hi is not None and (hi is None or old_hi < hi):
+        hi = old_hi
+    ranges[key] = (lo, hi)
+
+
+def _numeric_range(condition):
+    if len(condition.values) != 1:
+        raise ValueError(f"{condition.keyword}: genau ein Zahlenwert erwartet")
+    try:
+        value = int(condition.values[0])
+    except ValueError:
+        raise ValueError(f"{condition.keyword}: '{condition.values[0]}' ist keine Zahl")
+    op = condition.operator or "="
+    if op in ("=", "=="):
+        return value, value
+    if op == ">=":
+        return value, None
+    if op == ">":
+        return value + 1, None
+    if op == "<=":
+        return None, value
+    if op == "<":
+        return None, value - 1
+    raise ValueError(f"{condition.keyword}: Operator '{op}' wird nicht unterstützt")
+
+
+def _rarity_set(condition):
+    values = [v.lower() for v in condition.values]
+    unknown = [v for v in values if v not in RARITY_ORDER]
+    if unknown:
+        raise ValueError(f"Rarity: unbekannte Werte {unknown}")
+    op = condition.operator or "="
+    if op in ("=", "=="):
+        return set(values)
+    if op == "!=":
+        return set(RARITY_ORDER) - set(values)
+    if len(values) != 1:
+        raise ValueError(f"Rarity {op}: genau ein Wert erwartet")
+    pos = RARITY_ORDER.index(values[0])
+    return set({
+        "<": RARITY_ORDER[:pos], "<=": RARITY_ORDER[:pos + 1],
+        ">": RARITY_ORDER[pos + 1:], ">=": RARITY_ORDER[pos:],
+    }[op])
+
+
+def block_to_rule(block, target):
+    """Converts one FilterBlock into a routing rule dict.
+
+    Returns (rule, ignored_keywords). Raises ValueError for unsupported item
+    conditions and for supported ones in a form that cannot be expressed as a rule.
+    """
+    rule = {"name": f"Filter Zeile {block.line}" + (f": {block.comment}" if block.comment else ""),
+            "target": target}
+    ranges = {}
+    ignored = []
+    for condition in block.conditions:
+        keyword, op = condition.keyword, condition.operator
+        if keyword not in SUPPORTED_CONDITIONS:
+            if keyword not in ENVIRONMENT_CONDITIONS:
+                raise ValueError(f"nicht unterstützte Bedingung {keyword}")
+            ignored.append(keyword)
+            continue
+        if keyword in NUMERIC_CONDITIONS:
+            _merge_range(ranges, NUMERIC_CONDITIONS[keyword], *_numeric_range(condition))
+            continue
+        if keyword == "Rarity":
+            rarities = _rarity_set(condition)
+            if "rarity" in rule:
+                rarities &= set(rule["rarity"])
+            rule["rarity"] = sorted(rarities)
+            continue
+
+        # Class / BaseType: "==" is an exact match, everything else a substring match
+        if not condition.values:
+            raise ValueError(f"{keyword}: keine Werte")
+        if op not in (None, "=", "=="):
+            raise ValueError(f"{keyword}: Operator '{op}' wird nicht unterstützt")
+        if keyword == "Class":
+            key = "class" if op == "==" else "class_contains"
+            if "class" in rule or "class_contains" in rule:
+                raise ValueError("Class: mehrfach im Block")
+            rule[key] = [v.lower() for v in condition.values]
+        else:
+            if "base" in rule:
+                raise ValueError("BaseType: mehrfach im Block")
+            if op == "==":
+                rule["base"] = [f"^{re.escape(v)}$" for v in condition.values]
+            else:
+                rule["base"] = [re.escape(v) for v in condition.values]
+
+    for key, (lo, hi) in ranges.items():
+        bounds = {}
+        if lo is not None:
+            bounds["min"] = lo
+        if hi is not None:
+            bounds["max"] = hi
+        rule[key] = bounds
+    return rule, ignored
+
+
+def filter_to_rules(blocks, stash_tabs=None, default_tab=None, hide_action="skip"):
+    """Converts parsed blocks into routing rules. Returns an ImportResult."""
+    valid_tabs = None
+    if stash_tabs is not None:
+        valid_tabs = set(stash_tabs) | {routing_rules.AFFINITY_TARGET}
+
+    rules = []
+    skipped = []  # (line, reason)
+    ignored_conditions = Counter()
+    for block in blocks:
+        if block.tab:
+            target = block.tab
+        elif block.is_continue:
+            skipped.append((block.line, "Continue-Block ohne Tab"))
+            continue
+        elif block.action == "Hide":
+            target = None
+        elif default_tab:
+            target = default_tab
+        else:
+            skipped.append((block.line, "Show-Block ohne Tab"))
+            continue
+
+        if target is not None and valid_tabs is not None and target not in valid_tabs:
+            skipped.append((block.line, f"unbekannter Tab '{target}'"))
+            continue
+        try:
+            rule, ignored = block_to_rule(block, target)
+        except ValueError as e:
+            skipped.append((block.line, str(e)))
+            continue
+        ignored_conditions.update(ignored)
+        rule["section"] = FILTER_SECTION
+        if block.action == "Hide" and not block.tab and hide_action == "skip":
+            rule["pass"] = True
+        rules.append(rule)
+
+    return ImportResult(rules, skipped, ignored_conditions, len(blocks))
+
+
+def load_filter_rules(path, stash_tabs=None, default_tab=None, hide_action="skip"):
+    """Reads a .filter file and returns an ImportResult with its routing rules."""
+    try:
+        with open(path, "r", encoding="utf-8-sig", errors="replace") as f:
+            blocks = parse_filter(f)
+    except OSError as e:
+        raise FilterImportError(f"Filter-Datei {path} konnte nicht gelesen werden: {e}")
+    result = filter_to_rules(blocks, stash_tabs, default_tab, hide_action)
+    logger.info(f"Filter {os.path.basename(path)}: {len(result.rules)}/{result.block_count} Blöcke "
+                f"als Routing-Regeln importiert, {len(result.skipped)} übersprungen.")
+    if result.ignored_conditions:
+        summary = ", ".join(f"{k} ({n}x)" for k, n in result.ignored_conditions.most_common())
+        logger.info(f"Filter {os.path.basename(path)}: ignorierte Bedingungen: {summary}")
+    return result
+
+
+# --- Selbsttest (python filter_import.py --check) ---
+CHECK_FILTER = """\
+Show # Stash: CHANCE_ITEMS
+    BaseType == "Sapphire Ring"
+    Rarity <= Magic
+
+Hide
+    Class == "Rings"
+
+Show # Stash: RARE
+    Class == "Amulets"
+    Corrupted True
+
+Show
+    AreaLevel >= 65
+    SetFontSize 30
+"""
+CHECK_CASES = [
+    # (hide_action, default_tab, Klasse, Rarität, Namenszeile(n), erwartetes Ziel)
+    ("skip", None, "Rings", "Normal", "Sapphire Ring", "CHANCE_ITEMS"),
+    ("skip", None, "Rings", "Magic", "Sapphire Ring of the Whale", "CHANCE_ITEMS"),
+    ("skip", None, "Rings", "Magic", "Glinting Sapphire Ring of the Whale", "CHANCE_ITEMS"),
+    ("skip", None, "Rings", "Magic", "Glinting Gold Ring", None),
+    ("skip", None, "Rings", "Rare", "Storm Loop\nSapphire Ring", "RARE"),      # Hide fällt auf routing_rules durch
+    ("skip", "DUMP", "Rings", "Rare", "Storm Loop\nSapphire Ring", "RARE"),    # ... auch am Catch-all vorbei
+    ("skip", "DUMP", "Amulets", "Rare", "Doom Heart\nAmber Amulet", "DUMP"),   # Corrupted-Block übersprungen
+    ("ignore", None, "Rings", "Rare", "Storm Loop\nSapphire Ring", None),      # Hide-Block hält das Item zurück
+]
+
+
+def self_check():
+    """Routes sample items through CHECK_FILTER + the default rules; returns a list of failure strings."""
+    import item_classifier
+    failures = []
+    for hide_action, default_tab, item_class, rarity, name, expected in CHECK_CASES:
+        result = filter_to_rules(parse_filter(CHECK_FILTER.splitlines()), default_tab=default_tab,
+                                 hide_action=hide_action)
+        router = routing_rules.compile_routing_rules(result.rules + routing_rules.DEFAULT_ROUTING_RULES)
+        text = f"Item Class: {item_class}\nRarity: {rarity}\n{name}\n--------\nItem Level: 70\n"
+        target = router.route(item_classifier.check_item_types(text))
+        if target != expected:
+            failures.append(f"{hide_action}/{rarity} '{name.splitlines()[-1]}': {target!r} statt {expected!r}")
+    return failures
+
+
+def main(argv=None):
+    """Prints the import report for a filter file: python filter_import.py <datei.filter> [config.json]"""
+    import json
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Verwendung: python filter_import.py <datei.filter> [config.json] | --check", file=sys.stderr)
+        return 2
+    if argv[0] == "--check":
+        failures = self_check()
+        for failure in failures:
+            print(f"  FEHLER {failure}")
+        print(f"{len(CHECK_CASES) - len(failures)}/{len(CHECK_CASES)} Prüfungen bestanden.")
+        return 1 if failures else 0
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    stash_tabs, filter_config = None, {}
+    if len(argv) > 1:
+        with open(argv[1], "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        stash_tabs = cfg.get("stash_tabs")
+        filter_config = cfg.get("item_filter", {})
+
+    result = load_filter_rules(argv[0], stash_tabs, filter_config.get("default_tab"),
+                               filter_config.get("hide_action", "skip"))
+    for line, reason in result.skipped:
+        print(f"  übersprungen Zeile {line}: {reason}")
+    router = routing_rules.compile_routing_rules(result.rules, stash_tabs)
+    for diag in router.diagnostics:
+        print(f"  Regel #{diag.index + 1} '{diag.name}' ({diag.kind}): {diag.message}")
+    print(f"{len(router)} aktive Regel(n) aus {result.block_count} Filter-Blöcken.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
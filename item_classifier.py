@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Item-Erkennung (reiner Klassifizierungs-Kern)
+"""
+Pure item classification core: clipboard text -> item types -> destination tab.
+
+This module (together with routing_rules and filter_import) has no GUI or
+input dependencies (pyautogui, win32gui, tkinter), so it can be used by the
+sorter itself as well as by headless tools like batch_classify.py.
+"""
+import hashlib
+import logging
+import os
+import re
+from array import array
+from collections import namedtuple
+
+import filter_import
+import routing_rules
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+# --- Item Name Listen ---
+CHANCE_BASE_TYPES = [
+    "stellar amulet", "sapphire ring", "emerald ring",
+    "ornate belt", "gold ring", "gold amulet", "heavy belt",
+    "solar amulet"
+]
+ULTIMATUM_DJINN_NAMES = ["inscribed ultimatum", "djinn barya"]
+DEFAULT_IGNORE_LIST_BASES = ["Scroll of Wisdom", "Portal Scroll"]
+# ------------------------
+
+def _keyword_regex(keywords):
+    """One alternation per keyword group: a single scan over the text instead of one `in` per keyword."""
+    return re.compile("|".join(re.escape(k.lower()) for k in sorted(keywords, key=len, reverse=True))).search
+
+
+# Keyword groups searched in the whole (lower-cased) item text
+_find_chance_base = _keyword_regex(CHANCE_BASE_TYPES)
+_find_ultimatum_djinn = _keyword_regex(ULTIMATUM_DJINN_NAMES)
+_find_precursor_tablet = _keyword_regex(["precursor tablet"])
+
+_ignore_list_bases = [name.lower() for name in DEFAULT_IGNORE_LIST_BASES]
+_item_decision_cache = {}
+
+# Slot codes of classify_many() that are not tab indices
+SLOT_EMPTY = -1
+SLOT_IGNORED = -2      # should_click=False
+SLOT_NO_TARGET = -3    # should_click=True, aber keine Regel greift
+
+BatchResult = namedtuple("BatchResult", ["codes", "tabs", "types"])
+
+
+def configure(item_definitions):
+    """Applies config['item_definitions'] and drops cached decisions."""
+    global _ignore_list_bases
+    ignore_bases = (item_definitions or {}).get("IGNORE_LIST_BASES", DEFAULT_IGNORE_LIST_BASES)
+    _ignore_list_bases = [name.lower() for name in ignore_bases]
+    _item_decision_cache.clear()
+
+
+_INT_PATTERN = re.compile(r"\d[\d,.]*")
+
+def _first_int(text):
+    """Returns the first integer in text ("+20% (augmented)" -> 20, "1,234/5,000" -> 1234), or 0."""
+    match = _INT_PATTERN.search(text)
+    if not match:
+        return 0
+    digits = match.group(0).replace(",", "").replace(".", "")
+    return int(digits) if digits else 0
+
+
+def check_item_types(text):
+    """Optimierte Item-Typ-Analyse mit Caching und Early Returns"""
+    if not text: 
+        return {'should_click': False}
+        
+    # Schritt 1: Hash des Textes berechnen für Cache-Lookup
+    # MD5 ist schnell und für Caching ausreichend
+    text_hash = hashlib.md5(text.encode()).hexdigest()
+    
+    # Schritt 2: Cache prüfen für schnelle Antwort
+    if text_hash in _item_decision_cache:
+        return _item_decision_cache[text_hash]
+    
+    # Schritt 3: Beschleunigte Analyse
+    lines = text.strip().splitlines()
+    if not lines: 
+        return {'should_click': False}
+
+    # Basistyp-Dictionary erstellen
+    types = {
+        'precursor_tablet': False, 'jewel': False, 'rune': False, 'waystone': False,
+        'tablet': False, 'flask': False, 'unique': False, 'rare': False,
+        'normal': False, 'magic': False, 'quality': False, 'sockets': False,
+        'currency': False, 'is_chance_base': False, 'omen': False,
+        'ultimatum_djinn': False, 'stackable_currency': False,
+        'should_click': False, 'first_line': lines[0].strip(),
+        # Properties for the routing rules
+        'item_class': None, 'rarity': None, 'name': '', 'base_type': '',
+        'quality_value': 0, 'socket_count': 0, 'stack_size': 0, 'item_level': None
+    }
+    
+    # Schritt 4: Early-Return-Prüfungen für schnelle Entscheidungsfindung
+    # Ignorierte Basis-Typen sehr schnell prüfen (z.B. Weisheitsspruchrollen)
+    first_line_lower = lines[0].lower().strip()
+    if any(ignore_item in first_line_lower for ignore_item in _ignore_list_bases):
+        _item_decision_cache[text_hash] = {'should_click': False, 'first_line': lines[0].strip()}
+        return _item_decision_cache[text_hash]
+    
+    # Schritt 5: Textumwandlung für schnellere Verarbeitung
+    text_lower = text.lower()
+    
+    # Schnellere Methode als vollständige Liste - schaue nur nach benötigten Zeilen
+    rarity_line = None
+    class_line = None
+    stack_size_line = None
+    
+    # Ein einziger Durchlauf durch die Zeilen für alle Prüfungen
+    for line in text_lower.splitlines():
+        line = line.strip()
+        if line.startswith("rarity:"):
+            rarity_line = line
+        elif line.startswith("item class:"):
+            class_line = line
+        elif line.startswith("quality:"):
+            types['quality'] = True
+            types['quality_value'] = _first_int(line)
+        elif line.startswith("sockets:"):
+            types['sockets'] = True
+            types['socket_count'] = len(line.split(":", 1)[1].split())
+        elif "stack size:" in line:
+            stack_size_line = line
+            types['stack_size'] = _first_int(line.split(":", 1)[1])
+        elif line.startswith("item level:"):
+            types['item_level'] = _first_int(line)
+    
+    # Schritt 6: Rarität und Klasse extrahieren
+    rarity = "unknown"
+    if rarity_line:
+        rarity = rarity_line.split(":", 1)[1].strip()
+        if rarity == "unique": types['unique'] = True
+        elif rarity == "rare": types['rare'] = True
+        elif rarity == "magic": types['magic'] = True
+        elif rarity == "normal": types['normal'] = True
+        elif rarity == "currency": types['currency'] = True
+    
+    item_class = "unknown"
+    if class_line:
+        item_class = class_line.split(":", 1)[1].strip()
+        if "jewel" in item_class: types['jewel'] = True
+        if "flask" in item_class: types['flask'] = True
+    
+    types['item_class'] = item_class
+    types['rarity'] = rarity
+
+    # Rest der Analyselogik (ersetzt alte Methode)
+    item_name_line = lines[2].lower().strip() if len(lines) > 2 else ""
+    # Rares/Uniques haben Name + Basistyp, alle anderen nur eine Namenszeile
+    base_line = lines[3].lower().strip() if len(lines) > 3 else ""
+    types['name'] = item_name_line
+    types['base_type'] = base_line if rarity in ("rare", "unique") and base_line and not base_line.startswith("--") else item_name_line
+    if rarity == "magic":
+        # Magische Namen: "[Präfix] Basis [of Suffix]" - Suffix hier, Präfix im Router (bekannte Basen)
+        types['base_type'] = item_name_line.split(" of ", 1)[0].strip()
+    
+    # Spezielle Item-Typen erkennen
+    types['is_chance_base'] = _find_chance_base(text_lower) is not None
+    types['ultimatum_djinn'] = _find_ultimatum_djinn(text_lower) is not None
+    types['precursor_tablet'] = _find_precursor_tablet(text_lower) is not None
+    types['omen'] = "omen" in first_line_lower or "omen" in item_class
+    types['waystone'] = "waystone" in first_line_lower
+    types['tablet'] = "tablet" in item_class and not types['precursor_tablet']
+    types['rune'] = (rarity == "currency" and "rune" in item_name_line)
+    
+    # Stapelbare Währungsitems erkennen
+    is_stackable = (stack_size_line is not None) or \
+                   ("catalyst" in first_line_lower) or \
+                   ("essence" in first_line_lower) or \
+                   ("oil" in first_line_lower)
+    if is_stackable and rarity == "currency" and not types['rune']:
+        types['stackable_currency'] = True
+    
+    # Allgemeine Währungsprüfung
+    is_generic_currency_indicator = (rarity == "currency" or "currency" in item_class or stack_size_line is not None)
+    types['currency'] = (
+        is_generic_currency_indicator and
+        not types['rune'] and
+        not types['stackable_currency'] and
+        not types['ultimatum_djinn']
+    )
+    
+    # Schritt 7: Sollten wir klicken? Optimierte Logik
+    types['should_click'] = any([
+        types['precursor_tablet'], types['jewel'], types['rune'], types['waystone'],
+        types['tablet'], types['flask'], types['unique'], types['rare'],
+        types['quality'], types['sockets'], types['currency'],
+        types['is_chance_base'] and types['normal'],
+        types['omen'], types['ultimatum_djinn'], types['stackable_currency']
+    ])
+    
+    # Schritt 8: Cache-Ergebnis für zukünftige Aufrufe
+    _item_decision_cache[text_hash] = types.copy()
+    
+    # Wenn der Cache zu groß wird, älteste Einträge entfernen
+    if len(_item_decision_cache) > 1000:  # Begrenzung der Cache-Größe
+        # Einfachste Methode: Cache leeren
+        _item_decision_cache.clear()
+    
+    return types
+
+
+def rules_from_config(cfg, base_dir):
+    """Returns the routing rule list of a config dict: loot filter blocks first, then routing_rules.
+
+    Relative filter paths are resolved against ``base_dir`` (the config directory).
+    """
+    rules = list(cfg.get("routing_rules", routing_rules.DEFAULT_ROUTING_RULES))
+    filter_config = cfg.get("item_filter", {})
+    path = filter_config.get("path")
+    if not filter_config.get("enabled") or not path:
+        return rules
+    if not os.path.isabs(path):
+        path = os.path.join(base_dir, path)
+    try:
+        result = filter_import.load_filter_rules(path, cfg.get("stash_tabs"),
+                                                 filter_config.get("default_tab"),
+                                                 filter_config.get("hide_action", "skip"))
+    except filter_import.FilterImportError as e:
+        logger.error(f"{e} Loot-Filter wird ignoriert.")
+        return rules
+    if cfg.get("debug", {}).get("DEBUG_MODE", False):
+        for line, reason in result.skipped:
+            logger.debug(f"Filter-Block Zeile {line} übersprungen: {reason}")
+    return result.rules + rules
+
+
+def classify_text(text, router):
+    """Classifies one clipboard text. Returns (item_types, destination or None)."""
+    item_types = check_item_types(text)
+    if not item_types.get('should_click', False):
+        return item_types, None
+    return item_types, router.route(item_types)
+
+
+def classify_many(texts, router, classify=check_item_types):
+    """Classifies all item texts of a round (or a stash dump) in one pass.
+
+    Identical texts (stacks, duplicates) are classified and routed only once.
+    Returns a BatchResult aligned with ``texts``:
+
+    - ``codes``: array('h') per slot, an index into ``tabs`` or SLOT_EMPTY /
+      SLOT_IGNORED / SLOT_NO_TARGET
+    - ``tabs``: destination names in order of first appearance
+    - ``types``: check_item_types() result per slot (None for empty slots,
+      shared between duplicate texts)
+    """
+    codes = array('h', [SLOT_EMPTY]) * len(texts)
+    types_by_slot = [None] * len(texts)
+    tabs = []
+    tab_codes = {}
+    seen = {}  # text -> (code, item_types)
+
+    for slot, text in enumerate(texts):
+        if not text:
+            continue
+        known = seen.get(text)
+        if known is None:
+            item_types = classify(text)
+            if not item_types.get('should_click', False):
+                code = SLOT_IGNORED
+            else:
+                destination = router.route(item_types)
+                if destination:
+                    code = tab_codes.get(destination)
+                    if code is None:
+                        code = tab_codes[destination] = len(tabs)
+                        tabs.append(destination)
+                else:
+                    code = SLOT_NO_TARGET
+            known = seen[text] = (code, item_types)
+        codes[slot], types_by_slot[slot] = known
+
+    return BatchResult(codes, tabs, types_by_slot)
+
@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Log-Auswertung (Runden, Latenzen, Fehlerbilder, Tagestrends)
+"""
+Summarizes inventory_manager.log (plus rotated ``.1``, ``.2.gz`` ... files)
+per sorting round and per day, in one streaming pass.
+
+Rounds are rebuilt from the ``=== Starte ...`` / ``=== ... Runde beendet ===``
+markers. A round that is cut short ("Scan abgebrochen", "Verarbeitung
+abgebrochen") counts as aborted; one that never reaches its end marker
+(next start, script restart) as interrupted. Per round the report has
+
+- duration (start to end marker, or to the abort message) and the logged scan / processing phase times
+- slots read (the per-slot DEBUG lines "Quick success", "Wahrscheinlich leer"
+  and timed-out reads, counted like ``log_model``) and clipboard misses
+  (timed-out reads, empty reads the sorter's re-check found an item in,
+  failed clipboard clears)
+- items moved per destination tab and failed moves
+- warnings and errors grouped into classes (numbers, coordinates and item
+  snippets stripped, e.g. ``Exception beim Klick für Slot N: name 'num_slots'
+  is not defined``)
+
+Memory does not grow with the log: only the last ``--rounds`` round
+summaries, one small aggregate per day (durations in fixed-size reservoirs)
+and at most ``MAX_ERROR_CLASSES`` error classes are kept. ``--all-rounds``
+streams every round as it completes instead.
+
+::
+
+    python log_analytics.py inventory_manager.log
+    python log_analytics.py inventory_manager.log --json > report.json
+"""
+import argparse
+import json
+import logging
+import re
+import sys
+import time
+from collections import Counter, deque
+
+from log_model import (EMPTY_RE, MISS_RE, PROC_DONE_RE, QUICK_RE, SCAN_DONE_RE, TAB_DONE_RE, VERIFY_MISS_RE,
+                       Reservoir, iter_log_lines, iter_records, rotated_files)
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+MAX_ERROR_CLASSES = 200
+DAY_RESERVOIR_SIZE = 512
+
+ROUND_START_RE = re.compile(r"^=== Starte .*===$")
+ROUND_END_RE = re.compile(r"^=== .*Runde beendet ===$")
+ABORT_RE = re.compile(r"^(?:Scan|Verarbeitung) abgebrochen")
+SESSION_START = "Path of Exile Inventory Manager"  # "... (Async) wird gestartet..."
+CLEAR_FAILED_RE = re.compile(r"Slot \(\d+,\d+\): (?:Failed to clear clipboard|Clipboard clearing failed)")
+# Fehlerklassen: variable Teile entfernen
+SNIPPET_RE = re.compile(r"\s*Initial content snippet:.*$", re.S)
+COORDS_RE = re.compile(r"\(\d+,\d+\)")
+NUMBER_RE = re.compile(r"\d+(?:\.\d+)?")
+
+
+def error_class(level, message):
+    """Groups a WARNING/ERROR message: item snippets cut, coordinates and numbers replaced."""
+    message = SNIPPET_RE.sub("", message)
+    message = COORDS_RE.sub("(x,y)", message)
+    return f"{level} {NUMBER_RE.sub('N', message)}"
+
+
+class RoundSummary(object):
+    """One sorting round as reconstructed from the log."""
+
+    __slots__ = ("start", "end", "status", "scan_seconds", "process_seconds", "slots_read",
+                 "clipboard_misses", "clear_failures", "items", "failed_moves", "errors")
+
+    def __init__(self, start):
+        self.start = start
+        self.end = None
+        self.status = "running"
+        self.scan_seconds = None
+        self.process_seconds = None
+        self.slots_read = 0
+        self.clipboard_misses = 0
+        self.clear_failures = 0
+        self.items = Counter()    # Tab -> verschobene Items
+        self.failed_moves = 0
+        self.errors = Counter()   # Fehlerklasse -> Anzahl
+
+    @property
+    def duration(self):
+        return self.end - self.start if self.end is not None else None
+
+    def to_dict(self):
+        return {
+            "start": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.start)),
+            "status": self.status,
+            "duration": round(self.duration, 3) if self.duration is not None else None,
+            "scan_seconds": self.scan_seconds,
+            "process_seconds": self.process_seconds,
+            "slots_read": self.slots_read,
+            "clipboard_misses": self.clipboard_misses,
+            "clear_failures": self.clear_failures,
+            "items": dict(self.items),
+            "failed_moves": self.failed_moves,
+            "errors": dict(self.errors),
+        }
+
+
+class DayStats(object):
+    """Per-day aggregate of finished rounds."""
+
+    def __init__(self, day):
+        self.day = day
+        self.rounds = Counter()   # Status -> Anzahl
+        self.durations = Reservoir(DAY_RESERVOIR_SIZE)
+        self.slots_read = 0
+        self.clipboard_misses = 0
+        self.items = 0
+        self.failed_moves = 0
+        self.errors = 0
+
+    def add(self, summary):
+        self.rounds[summary.status] += 1
+        if summary.status == "completed":
+            self.durations.add(summary.duration)
+        self.slots_read += summary.slots_read
+        self.clipboard_misses += summary.clipboard_misses + summary.clear_failures
+        self.items += sum(summary.items.values())
+        self.failed_moves += summary.failed_moves
+        self.errors += sum(summary.errors.values())
+
+    def to_dict(self):
+        durations = self.durations.summary()
+        median = None
+        if durations["count"]:
+            median = next(value for q, value in durations["quantiles"] if q == 0.5)
+        return {
+            "day": self.day,
+            "rounds": dict(self.rounds),
+            "duration_mean": durations.get("mean"),
+            "duration_median": median,
+            "duration_max": durations.get("max"),
+            "slots_read": self.slots_read,
+            "clipboard_misses": self.clipboard_misses,
+            "miss_rate": round(self.clipboard_misses / self.slots_read, 4) if self.slots_read else None,
+            "items": self.items,
+            "failed_moves": self.failed_moves,
+            "errors": self.errors,
+        }
+
+
+class LogAnalyzer(object):
+    """Consumes log records; finished rounds go to ``on_round`` and the per-day aggregates."""
+
+    def __init__(self, keep_rounds=20, on_round=None):
+        self.recent = deque(maxlen=max(0, keep_rounds))
+        self.on_round = on_round
+        self.days = {}
+        self.error_classes = {}   # Klasse -> [Anzahl, erster ts, letzter ts]
+        self.errors_other = 0     # Meldungen jenseits von MAX_ERROR_CLASSES
+        self.errors_outside = 0   # WARNING/ERROR außerhalb einer Runde
+        self.lines = 0
+        self.first_ts = None
+        self.last_ts = None
+        self._round = None
+
+    def feed(self, ts, level, message):
+        self.lines += 1
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+        current = self._round
+
+        if message.startswith("==="):
+            if ROUND_START_RE.match(message):
+                if current:
+                    self._finish(ts, "interrupted")
+                self._round = RoundSummary(ts)
+                return
+            if current and ROUND_END_RE.match(message):
+                self._finish(ts, "completed")
+                return
+        if current is None:
+            if level in ("WARNING", "ERROR", "CRITICAL"):
+                self._error_class(ts, level, message)
+                self.errors_outside += 1
+            return
+
+        if message.startswith("Slot "):
+            # Lesevorgänge wie log_model zählen; Clipboard-Fehler separat, nicht als Fehlerklasse
+            if QUICK_RE.match(message) or EMPTY_RE.match(message):
+                current.slots_read += 1
+                return
+            if MISS_RE.match(message):
+                current.slots_read += 1
+                current.clipboard_misses += 1
+                return
+            if VERIFY_MISS_RE.match(message):  # Der leere Lesevorgang ist schon gezählt
+                current.clipboard_misses += 1
+                return
+            if CLEAR_FAILED_RE.match(message):
+                current.clear_failures += 1
+                return
+        m = TAB_DONE_RE.search(message)
+        if m:
+            done, intended, tab = int(m.group(1)), int(m.group(2)), m.group(3)
+            current.items[tab] += done
+            current.failed_moves += intended - done
+            return
+        m = SCAN_DONE_RE.search(message)
+        if m:
+            current.scan_seconds = float(m.group(1))
+            return
+        m = PROC_DONE_RE.search(message)
+        if m:
+            current.process_seconds = float(m.group(1))
+            return
+        if level in ("WARNING", "ERROR", "CRITICAL"):
+            if ABORT_RE.match(message) and current.status != "aborted":
+                current.status = "aborted"
+                current.end = ts  # Danach folgt oft kein Rundenende mehr
+            current.errors[self._error_class(ts, level, message)] += 1
+            return
+        if message.startswith(SESSION_START):
+            self._finish(ts, "interrupted")
+
+    def _error_class(self, ts, level, message):
+        name = error_class(level, message)
+        entry = self.error_classes.get(name)
+        if entry is None:
+            if len(self.error_classes) >= MAX_ERROR_CLASSES:
+                self.errors_other += 1
+                return "(weitere Fehlerklassen)"
+            entry = self.error_classes[name] = [0, ts, ts]
+        entry[0] += 1
+        entry[2] = ts
+        return name
+
+    def _finish(self, ts, status):
+        summary = self._round
+        self._round = None
+        if summary.end is None:
+            summary.end = ts
+        if summary.status != "aborted":  # Abbruch-Meldung hat Vorrang vor dem Ende der Runde
+            summary.status = status
+        day = time.strftime("%Y-%m-%d", time.localtime(summary.start))
+        stats = self.days.get(day)
+        if stats is None:
+            stats = self.days[day] = DayStats(day)
+        stats.add(summary)
+        self.recent.append(summary)
+        if self.on_round:
+            self.on_round(summary)
+
+    def close(self):
+        """Ends a round that is still open at the end of the log."""
+        if self._round:
+            self._finish(self.last_ts, "interrupted")
+
+    def report(self):
+        classes = sorted(self.error_classes.items(), key=lambda kv: -kv[1][0])
+        return {
+            "lines": self.lines,
+            "span_seconds": round(self.last_ts - self.first_ts, 1) if self.first_ts is not None else 0.0,
+            "days": [self.days[day].to_dict() for day in sorted(self.days)],
+            "error_classes": [
+                {"class": name, "count": count,
+                 "first": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(first)),
+                 "last": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(last))}
+                for name, (count, first, last) in classes],
+            "error_classes_truncated": self.errors_other,
+            "errors_outside_rounds": self.errors_outside,
+            "recent_rounds": [summary.to_dict() for summary in self.recent],
+        }
+
+
+def analyze(paths, keep_rounds=20, on_round=None):
+    """Streams all ``paths`` (in the given order); returns the finished LogAnalyzer."""
+    analyzer = LogAnalyzer(keep_rounds, on_round)
+    for ts, level, message in iter_records(iter_log_lines(paths)):
+        analyzer.feed(ts, level, message)
+    analyzer.close()
+    return analyzer
+
+
+# --- Textausgabe ---
+STATUS_TEXT = {"completed": "fertig", "aborted": "abgebrochen", "interrupted": "unterbrochen"}
+
+
+def _seconds(value):
+    return f"{value:7.1f}s" if value is not None else "      -"
+
+
+def format_round(summary):
+    items = ", ".join(f"{tab} {count}" for tab, count in summary.items.most_common()) or "-"
+    errors = sum(summary.errors.values())
+    return (f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(summary.start))}  "
+            f"{STATUS_TEXT.get(summary.status, summary.status):<12} {_seconds(summary.duration)} "
+            f"Scan {_seconds(summary.scan_seconds)} Verarb. {_seconds(summary.process_seconds)}  "
+            f"Slots {summary.slots_read:3d}  Clipboard-Fehler {summary.clipboard_misses + summary.clear_failures:3d}  "
+            f"Fehler {errors:3d}  Items: {items}"
+            + (f" ({summary.failed_moves} fehlgeschlagen)" if summary.failed_moves else ""))
+
+
+def format_report(report):
+    lines = ["", "Tagestrend:"]
+    lines.append(f"  {'Tag':<10}  {'Runden':>6} {'abgebr.':>7} {'unterbr.':>8}  {'Ø Dauer':>8} {'Median':>8} "
+                 f"{'Max':>8}  {'Slots':>6} {'Miss%':>6} {'Items':>6} {'Fehlgeschl.':>11} {'Fehler':>6}")
+    for day in report["days"]:
+        rounds = day["rounds"]
+        miss = f"{day['miss_rate']:.1%}" if day["miss_rate"] is not None else "-"
+        lines.append(
+            f"  {day['day']:<10}  {sum(rounds.values()):>6} {rounds.get('aborted', 0):>7} "
+            f"{rounds.get('interrupted', 0):>8}  {_seconds(day['duration_mean']):>8} "
+            f"{_seconds(day['duration_median']):>8} {_seconds(day['duration_max']):>8}  {day['slots_read']:>6} "
+            f"{miss:>6} {day['items']:>6} {day['failed_moves']:>11} {day['errors']:>6}")
+    lines.append("")
+    lines.append("Fehlerklassen:")
+    for entry in report["error_classes"][:25]:
+        lines.append(f"  {entry['count']:>6}  {entry['class'][:110]}  ({entry['first']} .. {entry['last']})")
+    if len(report["error_classes"]) > 25:
+        lines.append(f"  ... {len(report['error_classes']) - 25} weitere Klasse(n) (--json für alle)")
+    if report["error_classes_truncated"]:
+        lines.append(f"  {report['error_classes_truncated']} Meldung(en) jenseits von {MAX_ERROR_CLASSES} Klassen nicht gruppiert")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wertet inventory_manager.log pro Runde und pro Tag aus.")
+    parser.add_argument("logs", nargs="+", help="Log-Datei(en); rotierte Dateien (.1, .gz) werden automatisch mitgelesen")
+    parser.add_argument("--no-rotated", action="store_true", help="Nur die angegebenen Dateien lesen")
+    parser.add_argument("--rounds", type=int, default=20, help="Anzahl der zuletzt gezeigten Runden (Standard: 20)")
+    parser.add_argument("--all-rounds", action="store_true", help="Jede Runde ausgeben, sobald sie im Log endet")
+    parser.add_argument("--json", action="store_true", help="Bericht als JSON (mit --all-rounds: eine Runde pro Zeile)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    paths = []
+    for path in args.logs:
+        paths.extend([path] if args.no_rotated else rotated_files(path))
+
+    if args.all_rounds:
+        if args.json:
+            on_round = lambda summary: print(json.dumps(summary.to_dict(), ensure_ascii=False))
+        else:
+            on_round = lambda summary: print(format_round(summary))
+        analyzer = analyze(paths, 0, on_round)
+    else:
+        analyzer = analyze(paths, args.rounds)
+    report = analyzer.report()
+
+    if args.json:
+        print(json.dumps(report, indent=None if args.all_rounds else 2, ensure_ascii=False))
+    else:
+        for summary in analyzer.recent:
+            print(format_round(summary))
+        print(format_report(report))
+    logger.info(f"{report['lines']} Log-Zeilen aus {len(paths)} Datei(en) ausgewertet, "
+                f"{sum(sum(d['rounds'].values()) for d in report['days'])} Runde(n) an {len(report['days'])} Tag(en).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Latenz-Modell aus inventory_manager.log (für Simulator/Optimierer)
+"""
+Streams inventory_manager.log (plus rotated ``.1``, ``.2`` ... and ``.gz``
+files) and condenses the per-slot and per-tab timings into a compact JSON
+latency model.
+
+Everything is read line by line; distributions are kept in fixed-size
+reservoirs, so memory stays bounded for arbitrarily large logs. The model
+contains:
+
+- ``phases``: Move / Clear / CopyCmd / PasteWait / Total per slot ("Timing Slot" lines),
+  "Quick success after" and "Wahrscheinlich leer" durations
+- ``clipboard``: read outcomes, the raw miss rate (timed-out reads; empty
+  slots that went through the full wait count too, so this is an upper bound)
+  and the confirmed miss rate (timed out, but the next read of the same slot
+  found an item, or the sorter's re-check of an empty slot found one)
+- ``tabs``: per stash tab the switch time (tab click until the first move),
+  time per ctrl-click move and items per visit
+- ``rounds``: scan and processing phase durations
+- ``simulator``: the same data as ``simulator.SimulatedGame`` arguments
+  (``latencies`` and ``clipboard_miss_rate``), see ``simulator.load_latency_model``
+
+::
+
+    python log_model.py inventory_manager.log -o latency_model.json
+"""
+import argparse
+import glob
+import gzip
+import json
+import logging
+import os
+import random
+import re
+import sys
+from collections import Counter, defaultdict
+from datetime import datetime
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+MODEL_VERSION = 1
+RESERVOIR_SIZE = 4096
+QUANTILES = (0.0, 0.05, 0.25, 0.5, 0.75, 0.9, 0.95, 0.99, 1.0)
+
+LINE_RE = re.compile(r"^(\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),(\d{3}) - (\w+) - (.*)$")
+TIMING_RE = re.compile(
+    r"Timing Slot \((\d+),(\d+)\): Move=([\d.]+)s, Clear=([\d.]+)s, CopyCmd=([\d.]+)s, "
+    r"(?:PasteWaitLoop|Clipboard)=([\d.]+)s \((\d+) attempts\), Total=([\d.]+)s")
+QUICK_RE = re.compile(r"Slot \((\d+),(\d+)\): Quick success after ([\d.]+)s")
+EMPTY_RE = re.compile(r"Slot \((\d+),(\d+)\): Wahrscheinlich leer \(schnelles Return nach ([\d.]+)s\)")
+# Zeitüberschreitung beim Lesen: alte Builds ("Clipboard did not update ...") und der Sorter ab dem adaptiven Timing
+MISS_RE = re.compile(r"Slot \((\d+),(\d+)\): (?:Clipboard did not update or remained empty after ([\d.]+)s \((\d+) attempts\)"
+                     r"|Kein Item-Text nach ([\d.]+)s)")
+# Nachprüfung eines leer gelesenen Slots fand doch ein Item: bestätigter Fehlgriff
+VERIFY_MISS_RE = re.compile(r"Slot (\d+): Beim Nachprüfen doch ein Item gefunden")
+TAB_SWITCH_RE = re.compile(r"Wechsle zu Stash-Tab (\S+) bei")
+MOVE_RE = re.compile(r"(?:Slot \d+: Successfully ctrl\+clicked in tab (\S+)|Tab '([^']+)' Klick: Slot)")
+TAB_DONE_RE = re.compile(r"(\d+)/(\d+) Item(?:\(s\)|s)? für (?:Tab )?'([^']+)' verarbeitet")
+SCAN_DONE_RE = re.compile(r"Async Scan Phase beendet \(([\d.]+)s\)")
+PROC_DONE_RE = re.compile(r"Async Verarbeitungsphase beendet \(([\d.]+)s\)")
+ROUND_START = "=== Starte ASYNC"
+
+# Ctrl+C bis zum ersten Clipboard-Lesen im Script (0.03s vor keyUp + 0.045s danach).
+# "Quick success after X" zählt erst ab dort, die echte Latenz liegt also unter COPY_TO_FIRST_READ + X.
+COPY_TO_FIRST_READ = 0.075
+
+
+def rotated_files(path):
+    """Returns ``path`` and its rotated siblings (path.1, path.2.gz, path.2024-01-01 ...), oldest first."""
+    if not os.path.isfile(path) and not glob.glob(glob.escape(path) + ".*"):
+        raise FileNotFoundError(path)
+
+    def age_key(name):
+        suffix = name[len(path):].lstrip(".")
+        if suffix.endswith(".gz"):
+            suffix = suffix[:-3]
+        if not suffix:
+            return (0, 0, "")           # Aktuelle Datei zuletzt
+        if suffix.isdigit():
+            return (2, int(suffix), "")  # .1 ist neuer als .2
+        return (1, 0, suffix)           # Zeitstempel-Suffix: lexikographisch
+
+    siblings = [p for p in glob.glob(glob.escape(path) + ".*") if not p.endswith((".json", ".tmp"))]
+    candidates = siblings + ([path] if os.path.isfile(path) else [])
+    dated = sorted((p for p in candidates if age_key(p)[0] == 1), key=age_key)
+    numbered = sorted((p for p in candidates if age_key(p)[0] == 2), key=age_key, reverse=True)
+    return numbered + dated + [p for p in candidates if age_key(p)[0] == 0]
+
+
+def iter_log_lines(paths):
+    """Yields raw lines (without newline) from plain or gzip log files, one file after another."""
+    for path in paths:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                yield line.rstrip("\r\n")
+
+
+def iter_records(lines):
+    """Yields (timestamp_seconds, level, message) for well-formed log lines; continuation lines are skipped."""
+    last_stamp = None
+    last_base = 0.0
+    for line in lines:
+        m = LINE_RE.match(line)
+        if not m:
+            continue
+        stamp, millis, level, message = m.groups()
+        if stamp != last_stamp:
+            last_stamp = stamp
+            last_base = datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S").timestamp()
+        yield last_base + int(millis) / 1000.0, level, message
+
+
+class Reservoir(object):
+    """Bounded uniform sample of a stream plus exact count/mean/min/max."""
+
+    def __init__(self, size=RESERVOIR_SIZE, seed=0):
+        self.size = size
+        self.samples = []
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self._rng = random.Random(seed)
+
+    def add(self, value):
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self.samples) < self.size:
+            self.samples.append(value)
+        else:
+            j = self._rng.randrange(self.count)
+            if j < self.size:
+                self.samples[j] = value
+
+    def quantile_points(self):
+        ordered = sorted(self.samples)
+        n = len(ordered)
+        return [[q, round(ordered[min(n - 1, int(q * (n - 1) + 0.5))], 5)] for q in QUANTILES]
+
+    def summary(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 5),
+            "min": round(self.min, 5),
+            "max": round(self.max, 5),
+            "quantiles": self.quantile_points(),
+        }
+
+
+class LatencyModelBuilder(object):
+    """Consumes log records and accumulates the latency model."""
+
+    PHASES = ("move", "clear", "copy_cmd", "paste_wait", "total", "quick_success", "empty_return", "miss_wait")
+
+    def __init__(self):
+        self.lines = 0
+        self.phases = {name: Reservoir(seed=i) for i, name in enumerate(self.PHASES)}
+        self.attempts = Counter()
+        self.clipboard_latency = Reservoir(seed=len(self.PHASES))
+        self._slot_timed_out = set()  # Koordinaten, deren letzter Lesevorgang ins Timeout lief
+        self.outcomes = Counter()
+        self.tab_switch = defaultdict(Reservoir)
+        self.tab_move = defaultdict(Reservoir)
+        self.tab_items = defaultdict(Reservoir)
+        self.tab_failed = Counter()
+        self.scan_seconds = Reservoir()
+        self.process_seconds = Reservoir()
+        self.rounds = 0
+        self.first_ts = None
+        self.last_ts = None
+        self._tab = None            # Aktueller Tab-Block: Name
+        self._tab_started = None    # Zeitpunkt des Tab-Klicks
+        self._last_move = None      # Zeitpunkt des letzten Ctrl-Klicks im Block
+
+    def feed(self, ts, level, message):
+        self.lines += 1
+        if self.first_ts is None:
+            self.first_ts = ts
+        self.last_ts = ts
+
+        if message.startswith("Timing Slot"):
+            m = TIMING_RE.match(message)
+            if m:
+                move, clear, copy_cmd, paste_wait, attempts, total = m.group(3, 4, 5, 6, 7, 8)
+                for name, value in (("move", move), ("clear", clear), ("copy_cmd", copy_cmd),
+                                    ("paste_wait", paste_wait), ("total", total)):
+                    self.phases[name].add(float(value))
+                self.attempts[int(attempts)] += 1
+            return
+        if VERIFY_MISS_RE.match(message):
+            # Der Scan hatte den Slot als leer gelesen - dieser Lesevorgang war ein Fehlgriff
+            if self.outcomes["empty"]:
+                self.outcomes["empty"] -= 1
+            self.outcomes["miss"] += 1
+            self.outcomes["confirmed_miss"] += 1
+            return
+        if message.startswith("Slot ("):
+            m = QUICK_RE.match(message)
+            if m:
+                quick = float(m.group(3))
+                self.phases["quick_success"].add(quick)
+                self.clipboard_latency.add(COPY_TO_FIRST_READ + quick)
+                self.outcomes["quick_success"] += 1
+                self._slot_read(m.group(1, 2), timed_out=False)
+                return
+            m = EMPTY_RE.match(message)
+            if m:
+                self.phases["empty_return"].add(float(m.group(3)))
+                self.outcomes["empty"] += 1
+                return
+            m = MISS_RE.match(message)
+            if m:
+                self.phases["miss_wait"].add(float(m.group(3) or m.group(5)))
+                self.outcomes["miss"] += 1
+                self._slot_read(m.group(1, 2), timed_out=True)
+                return
+            if "Text copied:" in message:
+                self.outcomes["copied"] += 1
+            return
+
+        m = TAB_SWITCH_RE.search(message)
+        if m:
+            self._tab, self._tab_started, self._last_move = m.group(1), ts, None
+            return
+        m = MOVE_RE.search(message)
+        if m:
+            tab = m.group(1) or m.group(2)
+            if tab == self._tab:
+                if self._last_move is None:
+                    self.tab_switch[tab].add(ts - self._tab_started)
+                else:
+                    self.tab_move[tab].add(ts - self._last_move)
+                self._last_move = ts
+            return
+        m = TAB_DONE_RE.search(message)
+        if m:
+            done, intended, tab = int(m.group(1)), int(m.group(2)), m.group(3)
+            self.tab_items[tab].add(intended)
+            self.tab_failed[tab] += intended - done
+            self._tab = None
+            return
+        m = SCAN_DONE_RE.search(message)
+        if m:
+            self.scan_seconds.add(float(m.group(1)))
+            return
+        m = PROC_DONE_RE.search(message)
+        if m:
+            self.process_seconds.add(float(m.group(1)))
+            return
+        if message.startswith(ROUND_START):
+            self.rounds += 1
+
+    def _slot_read(self, coords, timed_out):
+        if timed_out:
+            self._slot_timed_out.add(coords)
+        elif coords in self._slot_timed_out:
+            self._slot_timed_out.discard(coords)
+            self.outcomes["confirmed_miss"] += 1
+
+    def _reads(self):
+        return self.outcomes["quick_success"] + self.outcomes["empty"] + self.outcomes["miss"]
+
+    def clipboard_miss_rate(self):
+        reads = self._reads()
+        return self.outcomes["miss"] / reads if reads else 0.0
+
+    def confirmed_miss_rate(self):
+        reads = self._reads()
+        return self.outcomes["confirmed_miss"] / reads if reads else 0.0
+
+    def simulator_params(self):
+        """Latency specs for simulator.SimulatedGame(latencies=..., clipboard_miss_rate=...)."""
+        latencies = {}
+        if self.clipboard_latency.count:
+            latencies["clipboard"] = {"kind": "quantiles", "points": self.clipboard_latency.quantile_points()}
+        # Die Tab-Wechselzeit im Log ist die Wartezeit des Scripts, nicht die des Spiels. Da der Wechsel
+        # damit immer geklappt hat, ist die kürzeste beobachtete Zeit eine obere Schranke für die Latenz.
+        switch_min = [r.min for r in self.tab_switch.values() if r.count]
+        if switch_min:
+            latencies["tab_switch"] = {"kind": "fixed", "value": round(min(switch_min), 5)}
+        return {"latencies": latencies, "clipboard_miss_rate": round(self.confirmed_miss_rate(), 5)}
+
+    def model(self, sources=()):
+        tabs = {}
+        for tab in sorted(set(self.tab_switch) | set(self.tab_move) | set(self.tab_items)):
+            tabs[tab] = {
+                "switch_seconds": self.tab_switch[tab].summary(),
+                "move_seconds": self.tab_move[tab].summary(),
+                "items_per_visit": self.tab_items[tab].summary(),
+                "failed_moves": self.tab_failed[tab],
+            }
+        span = (self.last_ts - self.first_ts) if self.first_ts is not None else 0.0
+        return {
+            "version": MODEL_VERSION,
+            "sources": [os.path.basename(p) for p in sources],
+            "lines": self.lines,
+            "span_seconds": round(span, 1),
+            "phases": {name: reservoir.summary() for name, reservoir in self.phases.items()},
+            "clipboard": {
+                "outcomes": dict(self.outcomes),
+                "miss_rate": round(self.clipboard_miss_rate(), 5),
+                "confirmed_miss_rate": round(self.confirmed_miss_rate(), 5),
+                "attempts": {str(k): v for k, v in sorted(self.attempts.items())},
+            },
+            "tabs": tabs,
+            "rounds": {
+                "started": self.rounds,
+                "scan_seconds": self.scan_seconds.summary(),
+                "process_seconds": self.process_seconds.summary(),
+            },
+            "simulator": self.simulator_params(),
+        }
+
+
+def build_model(paths):
+    """Streams all ``paths`` (in the given order) and returns the model dict."""
+    builder = LatencyModelBuilder()
+    for ts, level, message in iter_records(iter_log_lines(paths)):
+        builder.feed(ts, level, message)
+    return builder.model(paths)
+
+
+# --- Selbsttest (python log_model.py --check) ---
+CHECK_LOG = """\
+2025-05-01 10:00:00,000 - DEBUG - Slot (1634,906): Quick success after 0.0012s
+2025-05-01 10:00:00,200 - DEBUG - Slot (1713,906): Wahrscheinlich leer (schnelles Return nach 0.2150s)
+2025-05-01 10:00:00,900 - WARNING - Slot (1792,906): Clipboard did not update or remained empty after 0.5012s (9 attempts)
+2025-05-01 10:00:01,100 - DEBUG - Slot (1792,906): Quick success after 0.0020s
+2025-05-01 10:00:01,300 - DEBUG - Slot (1871,906): Wahrscheinlich leer (schnelles Return nach 0.1900s)
+2025-05-01 10:00:01,800 - WARNING - Slot (1950,906): Kein Item-Text nach 0.55s, obwohl der Slot in der letzten Runde belegt war.
+2025-05-01 10:00:02,000 - DEBUG - Slot (1871,906): Quick success after 0.0015s
+2025-05-01 10:00:02,010 - WARNING - Slot 4: Beim Nachprüfen doch ein Item gefunden - Scan-Wartezeiten werden erhöht.
+"""
+# Lesevorgänge: 3x Quick, 1x leer, 1x alte Meldung, 1x aktuelle Meldung, 1x leer -> nachgeprüft = Fehlgriff
+CHECK_OUTCOMES = {"quick_success": 3, "empty": 1, "miss": 3, "confirmed_miss": 2}
+
+
+def self_check():
+    """Feeds CHECK_LOG (old and current miss formats) through the builder; returns a list of failure strings."""
+    builder = LatencyModelBuilder()
+    for ts, level, message in iter_records(CHECK_LOG.splitlines()):
+        builder.feed(ts, level, message)
+    failures = [f"{key}: erwartet {expected}, gezählt {builder.outcomes[key]}"
+                for key, expected in CHECK_OUTCOMES.items() if builder.outcomes[key] != expected]
+    if builder.phases["miss_wait"].count != 2:
+        failures.append(f"miss_wait: erwartet 2 Werte, gezählt {builder.phases['miss_wait'].count}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Erstellt ein Latenz-Modell aus inventory_manager.log.")
+    parser.add_argument("logs", nargs="*", help="Log-Datei(en); rotierte Dateien (.1, .gz) werden automatisch mitgelesen")
+    parser.add_argument("-o", "--output", default="-", help="Ausgabe-JSON (Standard: stdout)")
+    parser.add_argument("--no-rotated", action="store_true", help="Nur die angegebenen Dateien lesen")
+    parser.add_argument("--check", action="store_true", help="Selbsttest des Parsers mit Beispielzeilen (alte und aktuelle Formate)")
+    args = parser.parse_args(argv)
+    if args.check:
+        failures = self_check()
+        for failure in failures:
+            print(f"FEHLER: {failure}")
+        print(f"Parser-Selbsttest {'fehlgeschlagen' if failures else 'bestanden'}.")
+        return 1 if failures else 0
+    if not args.logs:
+        parser.error("mindestens eine Log-Datei angeben (oder --check)")
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    paths = []
+    for path in args.logs:
+        paths.extend([path] if args.no_rotated else rotated_files(path))
+    model = build_model(paths)
+    text = json.dumps(model, indent=2, ensure_ascii=False)
+    if args.output == "-":
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    logger.info(f"Latenz-Modell aus {model['lines']} Log-Zeilen ({len(paths)} Datei(en)) erstellt, "
+                f"Clipboard-Fehlrate {model['clipboard']['miss_rate']:.1%} "
+                f"(bestätigt {model['clipboard']['confirmed_miss_rate']:.1%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
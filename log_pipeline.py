@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Nicht-blockierendes Logging (Queue + rotierende, komprimierte Logdateien)
+"""
+Logging setup that keeps file and console I/O off the scan loop.
+
+Every record goes through a ``QueueHandler`` into a ``queue.SimpleQueue``;
+a ``QueueListener`` thread owns the real handlers (log file and console) and
+does all formatting (timestamp, level, tracebacks) and writing. The calling
+thread only runs the cheap filters, resolves ``msg % args`` and does a queue
+put: ``DeferredQueueHandler`` replaces ``QueueHandler.prepare``, which would
+otherwise run the formatter on the calling thread.
+
+The log file handler rotates when the file exceeds ``max_bytes`` or is older
+than ``rotate_hours``. Old segments are numbered like ``RotatingFileHandler``
+(``inventory_manager.log.1.gz`` is the newest) and gzip-compressed in the
+listener thread, which is the layout ``log_model.rotated_files`` reads.
+
+Per-slot DEBUG lines (messages starting with ``"Slot "``) make up most of a
+debug session's log. ``SlotDebugSampler`` lets a burst of them through and
+then at most ``slot_debug_per_second``; the next line that passes reports how
+many were dropped in between.
+"""
+import copy
+import gzip
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import time
+
+DEFAULT_SETTINGS = {
+    "max_bytes": 5 * 1024 * 1024,
+    "backup_count": 5,
+    "rotate_hours": 24,          # 0 = nur nach Größe rotieren
+    "compress": True,
+    "slot_debug_per_second": 20,  # 0 = keine Begrenzung
+    "slot_debug_burst": 60,
+}
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that also rotates by age and gzips the rotated segments."""
+
+    def __init__(self, filename, max_bytes=0, backup_count=0, rotate_hours=0, compress=True, encoding="utf-8"):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding=encoding)
+        self.compress = compress
+        self.rotate_seconds = float(rotate_hours) * 3600
+        try:
+            started = os.path.getmtime(filename) if os.path.getsize(filename) else time.time()
+        except OSError:
+            started = time.time()
+        self.rollover_at = started + self.rotate_seconds if self.rotate_seconds else None
+
+    def namer(self, default_name):
+        return default_name + ".gz" if self.compress else default_name
+
+    def rotator(self, source, dest):
+        if not self.compress:
+            os.replace(source, dest)
+            return
+        with open(source, "rb") as src, gzip.open(dest, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and time.time() >= self.rollover_at:
+            # Leere Datei nicht rotieren (z.B. direkt nach dem Start)
+            if self.stream is None or self.stream.tell() > 0:
+                return True
+            self.rollover_at = time.time() + self.rotate_seconds
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        if self.backupCount > 0:
+            super().doRollover()
+        else:
+            # RotatingFileHandler schreibt ohne Backups einfach weiter - Datei stattdessen neu beginnen
+            if self.stream:
+                self.stream.close()
+            with open(self.baseFilename, "w", encoding=self.encoding):
+                pass
+            self.stream = self._open()
+        if self.rotate_seconds:
+            self.rollover_at = time.time() + self.rotate_seconds
+
+
+class SlotDebugSampler(logging.Filter):
+    """Token bucket for per-slot DEBUG records; everything else passes untouched."""
+
+    def __init__(self, per_second=20, burst=60, clock=time.monotonic):
+        super().__init__()
+        self._clock = clock
+        self.configure(per_second, burst)
+        self.dropped = 0
+        self.dropped_total = 0
+
+    def configure(self, per_second, burst):
+        self.rate = max(0.0, float(per_second))
+        self.burst = max(1.0, float(burst))
+        self.tokens = self.burst
+        self.last = self._clock()
+
+    def filter(self, record):
+        if record.levelno != logging.DEBUG or not self.rate:
+            return True
+        msg = record.msg
+        if not isinstance(msg, str) or not msg.startswith("Slot "):
+            return True
+        now = self._clock()
+        self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+        if self.tokens < 1.0:
+            self.dropped += 1
+            self.dropped_total += 1
+            return False
+        self.tokens -= 1.0
+        if self.dropped:
+            record.msg = f"{msg} [{self.dropped} Slot-DEBUG-Zeilen unterdrückt]"
+            self.dropped = 0
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves formatting to the listener thread."""
+
+    def prepare(self, record):
+        # Nur msg % args auflösen (die Argumente könnten sich danach noch ändern);
+        # exc_info bleibt am Record, der Traceback wird erst im Listener formatiert
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class LogPipeline(object):
+    """Root logger -> QueueHandler -> listener thread -> rotating file + console."""
+
+    def __init__(self, log_file, settings=None, level=logging.INFO, console=True):
+        settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        formatter = logging.Formatter(LOG_FORMAT)
+        self.file_handler = CompressingRotatingFileHandler(
+            log_file, settings["max_bytes"], settings["backup_count"], settings["rotate_hours"], settings["compress"])
+        self.file_handler.setFormatter(formatter)
+        handlers = [self.file_handler]
+        if console:
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setFormatter(formatter)
+            handlers.append(console_handler)
+
+        self.queue = queue.SimpleQueue()
+        self.sampler = SlotDebugSampler(settings["slot_debug_per_second"], settings["slot_debug_burst"])
+        self.queue_handler = DeferredQueueHandler(self.queue)
+        self.queue_handler.addFilter(self.sampler)
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.level = level
+
+    def start(self):
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(self.queue_handler)
+        root.setLevel(self.level)
+        self.listener.start()
+        return self
+
+    def configure(self, settings):
+        """Applies a (possibly changed) ``logging`` config block to the running pipeline."""
+        settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+        handler = self.file_handler
+        handler.maxBytes = int(settings["max_bytes"])
+        handler.backupCount = int(settings["backup_count"])
+        handler.compress = bool(settings["compress"])
+        rotate_seconds = float(settings["rotate_hours"]) * 3600
+        if rotate_seconds != handler.rotate_seconds:
+            handler.rotate_seconds = rotate_seconds
+            handler.rollover_at = time.time() + rotate_seconds if rotate_seconds else None
+        self.sampler.configure(settings["slot_debug_per_second"], settings["slot_debug_burst"])
+
+    def stop(self):
+        """Flushes the queue and joins the listener thread."""
+        logging.getLogger().removeHandler(self.queue_handler)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Metriken (Counter/Histogramme) mit Prometheus-Textformat
+"""
+Minimal metrics registry for long sorting sessions.
+
+Recording never blocks and takes no lock: ``Counter.inc`` and
+``Histogram.observe`` only append a tuple to the registry's ``deque``
+(atomic in CPython), from whichever thread the sorter runs on. Everything
+else (applying the events to the aggregates, rendering, writing snapshots)
+happens on the single ``MetricsExporter`` thread, so aggregation needs no
+lock either and never competes with the asyncio scan loop or the input
+executor.
+
+The exporter serves ``GET /metrics`` in the Prometheus text format
+(version 0.0.4) from a one-thread ``http.server`` bound to localhost and can
+additionally write the same text to a snapshot file every
+``snapshot_interval`` seconds (temp file + os.replace, usable with the node
+exporter's textfile collector)::
+
+    "metrics": {"enabled": true, "port": 9464, "snapshot_path": "metrics.prom"}
+
+    curl http://127.0.0.1:9464/metrics
+"""
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+PREFIX = "poe2_sorter_"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_SETTINGS = {
+    "enabled": False,
+    "host": "127.0.0.1",
+    "port": 9464,            # 0 = kein HTTP-Endpunkt (nur Snapshot-Datei)
+    "snapshot_path": "",     # leer = kein Snapshot
+    "snapshot_interval": 60,
+}
+
+SLOT_LATENCY_BUCKETS = (0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5, 0.75, 1.0, 2.0)
+ROUND_DURATION_BUCKETS = (1, 2, 5, 10, 15, 20, 30, 45, 60, 90, 120, 300)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter(object):
+    """Monotonic counter, optionally with one label."""
+
+    kind = "counter"
+
+    def __init__(self, events, name, help_text, label=None):
+        self._events = events
+        self.name = name
+        self.help = help_text
+        self.label = label
+        self.values = {}  # Labelwert (oder None) -> Summe, nur im Exporter-Thread geändert
+
+    def inc(self, label_value=None, amount=1):
+        self._events.append((self, label_value, amount))
+
+    def _apply(self, label_value, amount):
+        self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def render(self, lines):
+        if not self.values and self.label is None:
+            lines.append(f"{self.name} 0")
+        for label_value, value in sorted(self.values.items(), key=lambda kv: str(kv[0])):
+            if self.label is None or label_value is None:
+                lines.append(f"{self.name} {_format_value(value)}")
+            else:
+                lines.append(f"{self.name}{{{self.label}=\"{_escape(label_value)}\"}} {_format_value(value)}")
+
+
+class Histogram(object):
+    """Fixed-bucket histogram (seconds)."""
+
+    kind = "histogram"
+
+    def __init__(self, events, name, help_text, buckets):
+        self._events = events
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # letzter Eintrag: > größter Bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self._events.append((self, None, value))
+
+    def _apply(self, _label_value, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, lines):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), self.counts):
+            cumulative += count
+            lines.append(f"{self.name}_bucket{{le=\"{_format_value(bound)}\"}} {cumulative}")
+        lines.append(f"{self.name}_sum {_format_value(round(self.sum, 6))}")
+        lines.append(f"{self.name}_count {self.count}")
+
+
+class MetricsRegistry(object):
+    """Holds the metrics and the shared event queue."""
+
+    def __init__(self, prefix=PREFIX):
+        self.prefix = prefix
+        self.metrics = []
+        self._events = deque()
+
+    def counter(self, name, help_text, label=None):
+        metric = Counter(self._events, self.prefix + name, help_text, label)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, help_text, buckets):
+        metric = Histogram(self._events, self.prefix + name, help_text, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self):
+        """Applies all queued events. Only call from one thread (the exporter)."""
+        events = self._events
+        applied = 0
+        while events:
+            try:
+                metric, label_value, value = events.popleft()
+            except IndexError:
+                break
+            metric._apply(label_value, value)
+            applied += 1
+        return applied
+
+    def render(self):
+        """Prometheus text format of the aggregated values (call collect() first)."""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            metric.render(lines)
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+class SorterMetrics(object):
+    """The sorter's metric set."""
+
+    def __init__(self, registry=None):
+        self.registry = registry or MetricsRegistry()
+        r = self.registry
+        self.rounds = r.counter("rounds_total", "Completed sorting rounds")
+        self.slots_scanned = r.counter("slots_scanned_total", "Inventory slots read with Ctrl+C")
+        self.slots_empty = r.counter("slots_empty_total", "Slots that returned no item text")
+        self.clipboard_rechecks = r.counter("clipboard_rechecks_total",
+                                            "Item texts that only showed up at the clipboard re-check")
+        self.clipboard_misses = r.counter("clipboard_misses_total",
+                                          "Clipboard reads that failed (clear failed, timeout, error)", "reason")
+        self.items_routed = r.counter("items_routed_total", "Items queued for a move, per destination tab", "tab")
+        self.tab_switches = r.counter("tab_switches_total", "Stash tab switches", "result")
+        self.click_failures = r.counter("click_failures_total", "Ctrl-clicks that failed")
+        self.round_duration = r.histogram("round_duration_seconds", "Duration of a sorting round",
+                                          ROUND_DURATION_BUCKETS)
+        self.slot_latency = r.histogram("slot_latency_seconds", "Time to read one inventory slot",
+                                        SLOT_LATENCY_BUCKETS)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        registry = self.server.registry
+        registry.collect()
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Kein Log pro Scrape
+
+
+class _MetricsHTTPServer(HTTPServer):
+    def __init__(self, address, registry, exporter):
+        self.registry = registry
+        self.exporter = exporter
+        super().__init__(address, _MetricsHandler)
+
+    def service_actions(self):
+        # Läuft im serve_forever-Thread zwischen den Anfragen
+        self.exporter._tick()
+
+
+class MetricsExporter(object):
+    """Background thread: HTTP endpoint and/or periodic snapshot file. All aggregation happens here."""
+
+    def __init__(self, registry, host="127.0.0.1", port=9464, snapshot_path="", snapshot_interval=60,
+                 clock=None):
+        self.registry = registry
+        self.address = (host, int(port or 0))
+        self.snapshot_path = snapshot_path
+        self.snapshot_interval = max(1.0, float(snapshot_interval))
+        self._monotonic = clock or time.monotonic
+        self._next_snapshot = self._monotonic() + self.snapshot_interval
+        self._server = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Binds the port (raises OSError if taken) and starts the thread."""
+        if self.address[1]:
+            self._server = _MetricsHTTPServer(self.address, self.registry, self)
+        self._thread = threading.Thread(target=self._run, name="metrics-exporter", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        if self._server:
+            self._server.serve_forever(poll_interval=0.5)
+            self._server.server_close()
+        else:
+            while not self._stop.wait(0.5):
+                self._tick()
+        self._write_snapshot()  # Letzter Stand beim Beenden
+
+    def _tick(self):
+        self.registry.collect()
+        if self.snapshot_path and self._monotonic() >= self._next_snapshot:
+            self._next_snapshot = self._monotonic() + self.snapshot_interval
+            self._write_snapshot()
+
+    def _write_snapshot(self):
+        if not self.snapshot_path:
+            return
+        self.registry.collect()
+        try:
+            self.registry.write_snapshot(self.snapshot_path)
+        except OSError as e:
+            logger.warning(f"Metrik-Snapshot konnte nicht geschrieben werden ({self.snapshot_path}): {e}")
+
+    def stop(self):
+        self._stop.set()
+        if self._server:
+            self._server.shutdown()
+        if self._thread:
+            self._thread.join(timeout=2)
@@ -0,0 +1,490 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Deklarative Routing-Regeln (Feature 18.2)
+"""
+JSON routing rules that decide which stash tab an item is moved to.
+
+A rule is a plain dict (as stored under ``"routing_rules"`` in config.json)::
+
+    {
+        "name": "Juwelen",              # only used for logs / diagnostics
+        "target": "JEWEL",              # stash tab, "AFFINITY" or null (= ignore item)
+        "class": ["Jewels"],            # item class, exact, case-insensitive
+        "class_contains": ["armour"],   # item class, substring
+        "rarity": ["Rare", "Magic"],
+        "quality": {"min": 1},          # numeric ranges, "min" and/or "max"
+        "sockets": {"min": 1},
+        "stack_size": {"min": 2},
+        "ilvl": {"min": 60, "max": 74},
+        "name_patterns": ["^djinn"],    # regexes, searched in the item name
+        "base": ["ring$"],              # regexes, searched in the base type
+        "flags": ["jewel"],             # check_item_types flags, all must be set
+        "any_flags": ["rare", "unique"],  # at least one must be set
+        "not_flags": ["flask"],         # none may be set
+        "section": "filter",            # optional group name, see "pass"
+        "pass": false,
+        "enabled": true
+    }
+
+Rules are evaluated first-match-wins in list order. A matching ``"pass": true``
+rule decides nothing itself: the remaining rules of its ``section`` are
+skipped and the search continues with the first rule outside it (an imported
+filter's Hide blocks use this to hand items straight to the JSON rules). ``compile_routing_rules``
+turns the list into a ``CompiledRouter``: rules are bucketed by the item class,
+rarity and base type they accept, so an item only evaluates the residual
+predicates (numbers, name patterns, flags) of rules that can apply to it. The
+bucket for a (class, rarity, base) key is resolved once and then cached, which
+keeps the per-item cost flat for large rule lists such as imported loot
+filters. The compiler also reports rules that can never fire.
+
+Magic item names carry affixes around the base ("Glinting Sapphire Ring";
+the classifier already drops the " of ..." suffix). Exact base patterns
+(``^Sapphire Ring$``, e.g. from a filter's ``BaseType ==``) double as the
+list of known bases: the router reduces a magic base type to the longest
+known base it contains before bucketing, so exact conditions match magic
+items and affix variants share one bucket.
+"""
+import logging
+import re
+from collections import namedtuple
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+# Reproduces the former hard-coded determine_target_destination() 1:1.
+_HANDLED_BY_SPECIFIC_TAB = [
+    "precursor_tablet", "omen", "jewel", "rune", "ultimatum_djinn",
+    "stackable_currency", "currency"
+]
+DEFAULT_ROUTING_RULES = [
+    {"name": "Precursor Tablets & Omens", "target": "PRECURSOR_TABLET",
+     "any_flags": ["precursor_tablet", "omen"]},
+    {"name": "Juwelen", "target": "JEWEL", "flags": ["jewel"]},
+    {"name": "Runen", "target": "RUNE", "flags": ["rune"]},
+    {"name": "Ultimatum & Djinn", "target": "ULTIMATUM_DJINN", "flags": ["ultimatum_djinn"]},
+    {"name": "Stapelbare Währung", "target": "CURRENCY_CATALYST", "flags": ["stackable_currency"]},
+    {"name": "Währung (Affinity)", "target": "AFFINITY", "flags": ["currency"]},
+    {"name": "Chance-Basen", "target": "CHANCE_ITEMS", "flags": ["normal", "is_chance_base"],
+     "not_flags": _HANDLED_BY_SPECIFIC_TAB + ["flask", "waystone", "tablet"]},
+    {"name": "Rares & Uniques", "target": "RARE", "any_flags": ["rare", "unique"],
+     "not_flags": list(_HANDLED_BY_SPECIFIC_TAB)},
+    {"name": "Qualität & Sockel", "target": "QUALITY_SOCKET", "any_flags": ["quality", "sockets"],
+     "not_flags": _HANDLED_BY_SPECIFIC_TAB + ["rare", "unique", "flask", "waystone", "tablet"]},
+]
+
+# Special targets that are not stash tabs
+AFFINITY_TARGET = "AFFINITY"
+
+_RANGE_FIELDS = {
+    # rule key -> key in the check_item_types() result
+    "quality": "quality_value",
+    "sockets": "socket_count",
+    "stack_size": "stack_size",
+    "ilvl": "item_level",
+}
+_PATTERN_FIELDS = {"name_patterns": "name", "base": "base_type"}
+_FLAG_FIELDS = ("flags", "any_flags", "not_flags")
+_KNOWN_KEYS = {"name", "target", "class", "class_contains", "rarity", "section", "pass", "enabled"} | \
+              set(_RANGE_FIELDS) | set(_PATTERN_FIELDS) | set(_FLAG_FIELDS)
+
+# Upper bound for lazily built (class, rarity, base) buckets
+_MAX_BUCKETS = 16384
+
+RuleDiagnostic = namedtuple("RuleDiagnostic", ["index", "name", "kind", "message"])
+
+
+class RuleCompileError(ValueError):
+    """Raised when a routing rule is malformed (wrong types, bad regex, unknown keys)."""
+
+
+class CompiledRule(object):
+    """One routing rule after validation, with its residual predicate."""
+    __slots__ = ("index", "name", "target", "classes", "class_contains", "rarities", "ranges",
+                 "patterns", "base_search", "flags", "any_flags", "not_flags", "predicate",
+                 "section", "passes")
+
+    def __init__(self, index, name, target):
+        self.index = index
+        self.name = name
+        self.target = target
+        self.classes = None      # frozenset of lower-case classes, None = any
+        self.class_contains = None  # tuple of lower-case substrings, None = any
+        self.rarities = None     # frozenset of lower-case rarities, None = any
+        self.ranges = {}         # item key -> (min, max), None = open end
+        self.patterns = {}       # item key -> tuple of regex source strings
+        self.base_search = None  # compiled base type regex (indexed, not residual)
+        self.flags = frozenset()
+        self.any_flags = None    # frozenset or None
+        self.not_flags = frozenset()
+        self.predicate = None    # callable(item) -> bool, None = always true
+        self.section = None      # group name, None = no section
+        self.passes = False      # True = a match only skips the rest of the section
+
+    def accepts(self, item_class, rarity, base_type):
+        """True if the indexed dimensions (class, rarity, base) allow this rule to fire."""
+        if self.classes is not None and item_class not in self.classes:
+            return False
+        if self.class_contains is not None and \
+                not (item_class and any(sub in item_class for sub in self.class_contains)):
+            return False
+        if self.rarities is not None and rarity not in self.rarities:
+            return False
+        if self.base_search is not None and not (base_type and self.base_search(base_type)):
+            return False
+        return True
+
+    def covers(self, other):
+        """True if every item matched by ``other`` is also matched by this rule."""
+        if self.classes is not None and (other.classes is None or not other.classes <= self.classes):
+            return False
+        if self.class_contains is not None:
+            if other.classes is not None:
+                other_values = other.classes
+            elif other.class_contains is not None:
+                other_values = other.class_contains
+            else:
+                return False
+            if not all(any(sub in value for sub in self.class_contains) for value in other_values):
+                return False
+        if self.rarities is not None and (other.rarities is None or not other.rarities <= self.rarities):
+            return False
+        for key, (lo, hi) in self.ranges.items():
+            if key not in other.ranges:
+                return False
+            o_lo, o_hi = other.ranges[key]
+            if lo is not None and (o_lo is None or o_lo < lo):
+                return False
+            if hi is not None and (o_hi is None or o_hi > hi):
+                return False
+        for key, sources in self.patterns.items():
+            if key not in other.patterns or not set(other.patterns[key]) <= set(sources):
+                return False
+        if not self.flags <= other.flags or not self.not_flags <= other.not_flags:
+            return False
+        if self.any_flags is not None:
+            if not (self.any_flags & other.flags) and \
+                    (other.any_flags is None or not other.any_flags <= self.any_flags):
+                return False
+        return True
+
+    def __repr__(self):
+        return f"<Rule #{self.index + 1} '{self.name}' -> {self.target}>"
+
+
+def _as_str_list(value, rule_label, key):
+    if isinstance(value, str):
+        value = [value]
+    if not isinstance(value, (list, tuple)) or not all(isinstance(v, str) for v in value):
+        raise RuleCompileError(f"{rule_label}: '{key}' muss ein String oder eine Liste von Strings sein.")
+    return value
+
+
+def _as_str_set(value, rule_label, key):
+    return frozenset(v.strip().lower() for v in _as_str_list(value, rule_label, key))
+
+
+def _parse_range(value, rule_label, key):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (value, value)
+    if not isinstance(value, dict) or not set(value) <= {"min", "max"}:
+        raise RuleCompileError(f"{rule_label}: '{key}' muss eine Zahl oder {{\"min\": .., \"max\": ..}} sein.")
+    lo, hi = value.get("min"), value.get("max")
+    for bound in (lo, hi):
+        if bound is not None and (isinstance(bound, bool) or not isinstance(bound, (int, float))):
+            raise RuleCompileError(f"{rule_label}: Grenzen von '{key}' müssen Zahlen sein.")
+    return (lo, hi)
+
+
+def _make_range_check(key, lo, hi):
+    if lo is not None and hi is not None:
+        def check(item):
+            v = item.get(key)
+            return v is not None and lo <= v <= hi
+    elif lo is not None:
+        def check(item):
+            v = item.get(key)
+            return v is not None and v >= lo
+    else:
+        def check(item):
+            v = item.get(key)
+            return v is not None and v <= hi
+    return check
+
+
+def _compile_patterns(sources):
+    return re.compile("|".join(f"(?:{s})" for s in sources), re.IGNORECASE).search
+
+
+_LITERAL_PATTERN = re.compile(r"^\^((?:\\.|[^\\^$.*+?()\[\]{}|])+)\$$")
+
+
+def _literal_base(source):
+    """'^Sapphire\\ Ring$' -> 'sapphire ring'; None if the pattern is not an exact literal."""
+    match = _LITERAL_PATTERN.match(source)
+    return re.sub(r"\\(.)", r"\1", match.group(1)).lower() if match else None
+
+
+def _make_pattern_check(key, sources):
+    search = _compile_patterns(sources)
+
+    def check(item):
+        value = item.get(key)
+        return bool(value) and search(value) is not None
+    return check
+
+
+def _make_flag_checks(flags, any_flags, not_flags):
+    checks = []
+    if flags:
+        required = tuple(flags)
+        checks.append(lambda item: all(item.get(f) for f in required))
+    if any_flags is not None:
+        options = tuple(any_flags)
+        checks.append(lambda item: any(item.get(f) for f in options))
+    if not_flags:
+        forbidden = tuple(not_flags)
+        checks.append(lambda item: not any(item.get(f) for f in forbidden))
+    return checks
+
+
+def _combine(checks):
+    if not checks:
+        return None
+    if len(checks) == 1:
+        return checks[0]
+    checks = tuple(checks)
+
+    def predicate(item):
+        for check in checks:
+            if not check(item):
+                return False
+        return True
+    return predicate
+
+
+def compile_rule(index, rule):
+    """Validates one rule dict and returns a CompiledRule (or None if disabled)."""
+    if not isinstance(rule, dict):
+        raise RuleCompileError(f"Regel #{index + 1}: muss ein JSON-Objekt sein.")
+    name = str(rule.get("name") or f"Regel {index + 1}")
+    rule_label = f"Regel #{index + 1} '{name}'"
+    unknown = set(rule) - _KNOWN_KEYS
+    if unknown:
+        raise RuleCompileError(f"{rule_label}: unbekannte Schlüssel {sorted(unknown)}.")
+    if "target" not in rule:
+        raise RuleCompileError(f"{rule_label}: 'target' fehlt (Tab-Name oder null).")
+    target = rule["target"]
+    if target is not None and not isinstance(target, str):
+        raise RuleCompileError(f"{rule_label}: 'target' muss ein String oder null sein.")
+    section = rule.get("section")
+    if section is not None and not isinstance(section, str):
+        raise RuleCompileError(f"{rule_label}: 'section' muss ein String sein.")
+    if rule.get("pass") and section is None:
+        raise RuleCompileError(f"{rule_label}: 'pass' braucht eine 'section'.")
+    if not rule.get("enabled", True):
+        return None
+
+    compiled = CompiledRule(index, name, target)
+    compiled.section = section
+    compiled.passes = bool(rule.get("pass", False))
+    if "class" in rule:
+        compiled.classes = _as_str_set(rule["class"], rule_label, "class")
+    if "class_contains" in rule:
+        compiled.class_contains = tuple(sorted(_as_str_set(rule["class_contains"], rule_label, "class_contains")))
+    if "rarity" in rule:
+        compiled.rarities = _as_str_set(rule["rarity"], rule_label, "rarity")
+
+    checks = []
+    for rule_key, item_key in _RANGE_FIELDS.items():
+        if rule_key in rule:
+            lo, hi = _parse_range(rule[rule_key], rule_label, rule_key)
+            compiled.ranges[item_key] = (lo, hi)
+            if lo is not None or hi is not None:
+                checks.append(_make_range_check(item_key, lo, hi))
+
+    for rule_key, item_key in _PATTERN_FIELDS.items():
+        if rule_key in rule:
+            # Regexes are matched case-insensitively, so keep their source untouched
+            sources = tuple(sorted(set(_as_str_list(rule[rule_key], rule_label, rule_key))))
+            try:
+                if item_key == "base_type":
+                    compiled.base_search = _compile_patterns(sources)
+                else:
+                    checks.append(_make_pattern_check(item_key, sources))
+            except re.error as e:
+                raise RuleCompileError(f"{rule_label}: ungültiger Regex in '{rule_key}': {e}")
+            compiled.patterns[item_key] = sources
+
+    if "flags" in rule:
+        compiled.flags = _as_str_set(rule["flags"], rule_label, "flags")
+    if "any_flags" in rule:
+        compiled.any_flags = _as_str_set(rule["any_flags"], rule_label, "any_flags")
+    if "not_flags" in rule:
+        compiled.not_flags = _as_str_set(rule["not_flags"], rule_label, "not_flags")
+    checks.extend(_make_flag_checks(compiled.flags, compiled.any_flags, compiled.not_flags))
+
+    compiled.predicate = _combine(checks)
+    return compiled
+
+
+def _unsatisfiable_reason(rule):
+    if rule.classes is not None and not rule.classes:
+        return "leere 'class'-Liste"
+    if rule.class_contains is not None and not rule.class_contains:
+        return "leere 'class_contains'-Liste"
+    if rule.classes is not None and rule.class_contains is not None and \
+            not any(sub in c for c in rule.classes for sub in rule.class_contains):
+        return "'class' und 'class_contains' schließen sich aus"
+    if rule.rarities is not None and not rule.rarities:
+        return "leere 'rarity'-Liste"
+    if rule.any_flags is not None and not rule.any_flags:
+        return "leere 'any_flags'-Liste"
+    for key, sources in rule.patterns.items():
+        if not sources:
+            return f"leere Muster-Liste für {key}"
+    for key, (lo, hi) in rule.ranges.items():
+        if lo is not None and hi is not None and lo > hi:
+            return f"Bereich {key} min={lo} > max={hi}"
+    if rule.flags & rule.not_flags:
+        return f"Flags gleichzeitig gefordert und verboten: {sorted(rule.flags & rule.not_flags)}"
+    if rule.any_flags is not None and rule.any_flags <= rule.not_flags:
+        return "alle 'any_flags' sind auch in 'not_flags'"
+    return None
+
+
+class CompiledRouter(object):
+    """Decision structure built from a routing rule list.
+
+    ``route(item)`` takes the dict returned by ``check_item_types`` and returns
+    the target tab name, "AFFINITY", or None.
+    """
+
+    def __init__(self, rules, diagnostics):
+        self.rules = tuple(rules)
+        self.diagnostics = list(diagnostics)
+        self._buckets = {}
+        # Rules without any indexed condition are part of every bucket
+        self._has_index = any(r.classes is not None or r.class_contains is not None or
+                              r.rarities is not None or r.base_search is not None for r in self.rules)
+        self._catch_all = tuple((r, r.predicate) for r in self.rules)
+        known_bases = sorted({base for r in self.rules for source in r.patterns.get("base_type", ())
+                              for base in [_literal_base(source)] if base}, key=len, reverse=True)
+        self._known_base_search = re.compile(
+            r"\b(?:" + "|".join(re.escape(base) for base in known_bases) + r")\b").search if known_bases else None
+
+    def _key(self, item):
+        """(class, rarity, base) bucket key; magic base types are reduced to a known base."""
+        rarity, base_type = item.get("rarity"), item.get("base_type")
+        if rarity == "magic" and base_type and self._known_base_search is not None:
+            found = self._known_base_search(base_type)
+            if found:
+                base_type = found.group(0)
+        return item.get("item_class"), rarity, base_type
+
+    def _bucket(self, item_class, rarity, base_type):
+        if not self._has_index:
+            return self._catch_all
+        key = (item_class, rarity, base_type)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = tuple((r, r.predicate) for r in self.rules if r.accepts(item_class, rarity, base_type))
+            if len(self._buckets) >= _MAX_BUCKETS:
+                self._buckets.clear()
+            self._buckets[key] = bucket
+        return bucket
+
+    def match(self, item):
+        """Returns the first deciding CompiledRule matching ``item``, or None."""
+        key = self._key(item)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._bucket(*key)
+        skip_section = None
+        for rule, predicate in bucket:
+            if skip_section is not None and rule.section == skip_section:
+                continue
+            if predicate is None or predicate(item):
+                if not rule.passes:
+                    return rule
+                skip_section = rule.section
+        return None
+
+    def route(self, item):
+        """Returns the destination for ``item`` (tab name, "AFFINITY" or None)."""
+        rule = self.match(item)
+        return rule.target if rule is not None else None
+
+    def attach_profiler(self, profiler):
+        """Swaps in the profiler's instrumented match(); route() picks it up automatically.
+
+        Without a profiler the plain class method runs, so there is no per-item cost.
+        """
+        self.match = profiler.instrument(self)
+
+    def detach_profiler(self):
+        self.__dict__.pop("match", None)
+
+    def lookup_bucket(self, item):
+        """Returns the (rule, predicate) bucket for ``item`` (used by the profiler)."""
+        key = self._key(item)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._bucket(*key)
+        return bucket
+
+    def __len__(self):
+        return len(self.rules)
+
+
+def _always_reaches(prev, rule, pass_sections):
+    """True if every item that reaches ``rule`` has been offered to ``prev`` first.
+
+    A matching pass rule skips the rest of its section, so rules behind it can
+    only shadow rules of the same section.
+    """
+    if prev.section == rule.section:
+        return True
+    if prev.passes:
+        return False
+    first_pass = pass_sections.get(prev.section)
+    return first_pass is None or first_pass > prev.index
+
+
+def compile_routing_rules(rules, stash_tabs=None):
+    """Compiles a list of rule dicts into a CompiledRouter.
+
+    ``stash_tabs`` (the config dict of tabs) is optional; when given, rules that
+    point to unknown tabs are reported. Raises RuleCompileError on malformed rules.
+    """
+    if not isinstance(rules, (list, tuple)):
+        raise RuleCompileError("'routing_rules' muss eine Liste sein.")
+
+    compiled_rules = []
+    diagnostics = []
+    pass_sections = {}  # section -> index of its first pass rule
+    for index, rule in enumerate(rules):
+        compiled = compile_rule(index, rule)
+        if compiled is None:
+            continue
+
+        reason = _unsatisfiable_reason(compiled)
+        if reason:
+            diagnostics.append(RuleDiagnostic(index, compiled.name, "unreachable",
+                                              f"Regel kann nie greifen ({reason})."))
+            continue
+
+        shadow = next((prev for prev in compiled_rules
+                       if prev.covers(compiled) and _always_reaches(prev, compiled, pass_sections)), None)
+        if shadow is not None:
+            diagnostics.append(RuleDiagnostic(
+                index, compiled.name, "shadowed",
+                f"Regel wird vollständig von Regel #{shadow.index + 1} '{shadow.name}' verdeckt."))
+            continue
+
+        if stash_tabs is not None and compiled.target not in (None, AFFINITY_TARGET) \
+                and compiled.target not in stash_tabs:
+            diagnostics.append(RuleDiagnostic(index, compiled.name, "unknown_tab",
+                                              f"Ziel-Tab '{compiled.target}' ist nicht konfiguriert."))
+        compiled_rules.append(compiled)
+        if compiled.passes:
+            pass_sections.setdefault(compiled.section, compiled.index)
+
+    return CompiledRouter(compiled_rules, diagnostics)
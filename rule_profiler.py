@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Profiler für Item-Erkennung und Routing-Regeln
+"""
+Optional hit-count / cost profiler for check_item_types and the routing rules.
+
+The profiler is attached to a ``routing_rules.CompiledRouter`` with
+``router.attach_profiler(profiler)``, which replaces the router's ``match``
+with an instrumented copy. Detached, the router runs its plain method again,
+so a disabled profiler costs nothing in the hot path.
+
+Hits are counted for every item; timings are only taken for every
+``sample_every``-th item to keep the instrumented path cheap.
+"""
+import time
+from collections import Counter, defaultdict
+
+NO_MATCH = "<kein Ziel>"
+
+
+class RoutingProfiler(object):
+    """Collects per-rule and per-tab statistics across rounds."""
+
+    def __init__(self, sample_every=8):
+        self.sample_every = max(1, int(sample_every))
+        self.reset()
+
+    def reset(self):
+        self.items = 0
+        self.rounds = 0
+        self.rule_names = {}                 # rule index -> name
+        self.rule_hits = Counter()           # rule index -> matches
+        self.rule_evaluations = Counter()    # rule index -> predicate runs
+        self.rule_time_ns = defaultdict(int)  # rule index -> sampled ns
+        self.rule_samples = Counter()        # rule index -> sampled predicate runs
+        self.tab_hits = Counter()            # target -> matches
+        self.classify_calls = 0
+        self.classify_time_ns = 0
+        self.classify_samples = 0
+        self.route_time_ns = 0
+        self.route_samples = 0
+
+    # --- Instrumentation ---
+    def instrument(self, router):
+        """Returns an instrumented match(item) for ``router``."""
+        perf_ns = time.perf_counter_ns
+        lookup_bucket = router.lookup_bucket
+        rule_names = self.rule_names
+        for rule in router.rules:
+            rule_names[rule.index] = rule.name
+
+        def profiled_match(item):
+            self.items += 1
+            sampled = self.items % self.sample_every == 0
+            start = perf_ns() if sampled else 0
+            bucket = lookup_bucket(item)
+            matched = None
+            skip_section = None
+            evaluations = self.rule_evaluations
+            for rule, predicate in bucket:
+                if skip_section is not None and rule.section == skip_section:
+                    continue
+                evaluations[rule.index] += 1
+                if predicate is None:
+                    ok = True
+                elif sampled:
+                    t0 = perf_ns()
+                    ok = predicate(item)
+                    self.rule_time_ns[rule.index] += perf_ns() - t0
+                    self.rule_samples[rule.index] += 1
+                else:
+                    ok = predicate(item)
+                if ok:
+                    if rule.passes:
+                        self.rule_hits[rule.index] += 1
+                        skip_section = rule.section
+                        continue
+                    matched = rule
+                    break
+            if sampled:
+                self.route_time_ns += perf_ns() - start
+                self.route_samples += 1
+            if matched is not None:
+                self.rule_hits[matched.index] += 1
+                self.tab_hits[matched.target or "IGNORIEREN"] += 1
+            else:
+                self.tab_hits[NO_MATCH] += 1
+            return matched
+
+        return profiled_match
+
+    def wrap_classifier(self, classify):
+        """Returns a check_item_types wrapper that samples its run time."""
+        perf_ns = time.perf_counter_ns
+
+        def profiled_classify(text):
+            self.classify_calls += 1
+            if self.classify_calls % self.sample_every:
+                return classify(text)
+            t0 = perf_ns()
+            result = classify(text)
+            self.classify_time_ns += perf_ns() - t0
+            self.classify_samples += 1
+            return result
+
+        return profiled_classify
+
+    def end_round(self):
+        self.rounds += 1
+
+    # --- Report ---
+    def report_lines(self, top=15):
+        """Ranked, human readable report (German, like the rest of the log)."""
+        lines = [f"Routing-Profil: {self.items} Item(s) in {self.rounds} Runde(n), "
+                 f"Stichprobe jedes {self.sample_every}. Item"]
+        if self.classify_samples:
+            mean_us = self.classify_time_ns / self.classify_samples / 1000
+            lines.append(f"  check_item_types: {self.classify_calls} Aufrufe, Ø {mean_us:.1f} µs")
+        if self.route_samples:
+            mean_us = self.route_time_ns / self.route_samples / 1000
+            lines.append(f"  Routing gesamt: Ø {mean_us:.1f} µs pro Item")
+
+        def est_cost_us(index):
+            samples = self.rule_samples.get(index, 0)
+            if not samples:
+                return 0.0
+            return self.rule_time_ns[index] / samples * self.rule_evaluations[index] / 1000
+
+        lines.append("  Regeln nach Treffern:")
+        for index, hits in self.rule_hits.most_common(top):
+            lines.append(f"    #{index + 1:<4} {self.rule_names.get(index, '?')[:40]:<40} "
+                         f"{hits:>6} Treffer, {self.rule_evaluations[index]:>7} Prüfungen")
+        lines.append("  Regeln nach geschätzten Kosten:")
+        ranked = sorted(self.rule_evaluations, key=est_cost_us, reverse=True)[:top]
+        for index in ranked:
+            samples = self.rule_samples.get(index, 0)
+            mean_ns = self.rule_time_ns[index] / samples if samples else 0
+            lines.append(f"    #{index + 1:<4} {self.rule_names.get(index, '?')[:40]:<40} "
+                         f"Ø {mean_ns:>7.0f} ns x {self.rule_evaluations[index]:>7} = {est_cost_us(index):>9.1f} µs")
+        lines.append("  Treffer pro Ziel-Tab:")
+        for tab, hits in self.tab_hits.most_common():
+            lines.append(f"    {tab:<20} {hits:>6}")
+        return lines
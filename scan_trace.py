@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Scan-Aufzeichnung und Wiedergabe (Record & Replay)
+"""
+Compact per-round trace of what the scan loop saw and did, and a replay of
+recorded rounds through the classifier and the move scheduler.
+
+Recording (``ScanTraceWriter``, enabled with ``debug.SCAN_TRACE``) appends one
+JSON object per line to ``scan_trace.jsonl``. Strings (item texts, tab names)
+are interned: the first occurrence is written once as ``{"k": "s", "i": id,
+"v": text}``, later records only carry the id, so a stash of recurring
+currency stacks costs a few bytes per slot. Records of a round are buffered in
+memory and appended together when the round ends, so the scan loop never
+touches the disk. Record kinds:
+
+- ``r``: round start (epoch time, geometry/tabs/timing snapshot, scanned slots)
+- ``slot``: slot index, coordinates, text id (-1 = empty), phase durations in
+  ms (move, settle, clear, copy, read, i.e. Ctrl+C until the text was read),
+  total ms and whether the text only showed up at the re-check
+- ``plan``: the move queue as [slot, destination id] pairs
+- ``tab`` / ``mv``: tab switches and ctrl-clicks with outcome and duration
+- ``end``: scan/processing seconds, moved items, aborted flag
+
+Replay (``python scan_trace.py replay scan_trace.jsonl``) rebuilds every
+recorded round as a ``simulator.SimulatedGame``: each non-empty slot gets its
+recorded text, and the clipboard answers after the recorded Ctrl+C-to-read
+time. The round then runs through the current build's
+copy_and_process_inventory_items_async with the recorded geometry, tabs and
+timing, either at maximum speed (virtual clock) or paced as recorded (real
+clock). The report compares routing (recorded destination vs. the current
+rules), the simulated outcome and the round timing, so two builds can be
+compared on identical real-world input::
+
+    python scan_trace.py info scan_trace.jsonl
+    python scan_trace.py replay scan_trace.jsonl --pace max --json replay.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+TRACE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scan_trace.jsonl")
+
+# Phasen von copy_text_at_position in Aufzeichnungs-Reihenfolge
+PHASES = ("move", "settle", "clear", "copy", "read")
+EMPTY = -1
+REPLAY_PROFILE = "REPLAY"
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+class ScanTraceWriter(object):
+    """Buffers one round of trace records and appends them to ``path`` at the end of the round."""
+
+    def __init__(self, path=TRACE_FILE):
+        self.path = path
+        self.strings = {}
+        self._buffer = []
+        self._round_open = False
+        if os.path.exists(path):
+            # Stringtabelle der bestehenden Datei übernehmen, damit IDs eindeutig bleiben
+            for record in _iter_records(path):
+                if record.get("k") == "s":
+                    self.strings[record["v"]] = record["i"]
+
+    def intern(self, text):
+        sid = self.strings.get(text)
+        if sid is None:
+            sid = self.strings[text] = len(self.strings)
+            self._buffer.append({"k": "s", "i": sid, "v": text})
+        return sid
+
+    def begin_round(self, epoch, config, scan_slots):
+        self._buffer = [record for record in self._buffer if record["k"] == "s"]
+        self._round_open = True
+        self._buffer.append({
+            "k": "r", "t": round(epoch, 3), "scan": list(scan_slots),
+            "cfg": {key: config.get(key, {}) for key in ("inventory", "stash_tabs", "timing", "adaptive_timing")},
+        })
+
+    def slot(self, slot_idx, x, y, text, start, end, phases):
+        """phases: dict of perf_counter marks from copy_text_at_position (may miss entries on early returns)."""
+        durations = []
+        previous = start
+        for name in PHASES:
+            mark = phases.get(name)
+            if mark is None:
+                durations.append(None)
+                continue
+            durations.append(_ms(mark - previous))
+            previous = mark
+        self._buffer.append({"k": "slot", "n": slot_idx, "x": x, "y": y,
+                             "txt": self.intern(text) if text else EMPTY,
+                             "ph": durations, "dt": _ms(end - start), "late": int(bool(phases.get("late")))})
+
+    def plan(self, item_queue):
+        self._buffer.append({"k": "plan", "q": [[slot_idx, self.intern(destination)]
+                                                for slot_idx, _x, _y, destination in item_queue]})
+
+    def tab_switch(self, tab, ok, seconds):
+        self._buffer.append({"k": "tab", "dst": self.intern(tab), "ok": int(bool(ok)), "dt": _ms(seconds)})
+
+    def move(self, slot_idx, tab, ok, seconds):
+        self._buffer.append({"k": "mv", "n": slot_idx, "dst": self.intern(tab), "ok": int(bool(ok)),
+                             "dt": _ms(seconds)})
+
+    def end_round(self, scan_seconds, proc_seconds, moved, aborted=False):
+        """Appends the buffered round to the file. Write errors are logged, never raised."""
+        if not self._round_open:
+            return
+        self._round_open = False
+        self._buffer.append({"k": "end", "scan": round(scan_seconds, 3), "proc": round(proc_seconds, 3),
+                             "moved": moved, "aborted": int(aborted)})
+        lines = "".join(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+                        for record in self._buffer)
+        try:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(lines)
+            self._buffer = []
+        except OSError as e:
+            # Neue Strings behalten, sonst fehlen ihre Definitionen beim nächsten Schreiben
+            self._buffer = [record for record in self._buffer if record["k"] == "s"]
+            logger.error(f"Scan-Aufzeichnung konnte nicht geschrieben werden ({self.path}): {e}")
+
+
+def _iter_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # Abgeschnittene letzte Zeile (Absturz beim Schreiben) überspringen
+                logger.warning(f"{path}: Zeile {line_no} ist kein gültiges JSON, übersprungen.")
+
+
+def iter_rounds(path):
+    """Yields every complete recorded round as a dict with strings resolved."""
+    strings = {EMPTY: ""}
+    current = None
+    for record in _iter_records(path):
+        kind = record.get("k")
+        if kind == "s":
+            strings[record["i"]] = record["v"]
+        elif kind == "r":
+            current = {"time": record["t"], "config": record["cfg"], "scan": record["scan"],
+                       "slots": [], "plan": {}, "tabs": [], "moves": []}
+        elif current is None:
+            continue
+        elif kind == "slot":
+            current["slots"].append({
+                "index": record["n"], "x": record["x"], "y": record["y"], "text": strings[record["txt"]],
+                "phases": dict(zip(PHASES, record["ph"])), "ms": record["dt"], "late": bool(record["late"]),
+            })
+        elif kind == "plan":
+            current["plan"] = {slot_idx: strings[sid] for slot_idx, sid in record["q"]}
+        elif kind == "tab":
+            current["tabs"].append((strings[record["dst"]], bool(record["ok"]), record["dt"]))
+        elif kind == "mv":
+            current["moves"].append((record["n"], strings[record["dst"]], bool(record["ok"]), record["dt"]))
+        elif kind == "end":
+            current.update(scan_seconds=record["scan"], proc_seconds=record["proc"],
+                           moved=record["moved"], aborted=bool(record["aborted"]))
+            yield current
+            current = None
+
+
+# --- Replay ---
+
+def _replay_game_class():
+    import simulator
+
+    class ReplayGame(simulator.SimulatedGame):
+        """SimulatedGame whose clipboard answers after each item's recorded Ctrl+C-to-read time."""
+
+        def __init__(self, config, clock, copy_latency):
+            # Tooltip und Tab-Wechsel sofort bereit: die Aufnahme hat beides bereits bestanden
+            zero = {"kind": "fixed", "value": 0.0}
+            super().__init__(config, clock=clock, latencies={"hover": zero, "tab_switch": zero})
+            self.copy_latency = copy_latency  # item_id -> seconds
+
+        def _sample(self, name):
+            if name == "clipboard":
+                item = self.item_at(*self.mouse)
+                return self.copy_latency.get(item.item_id, 0.0) if item else 0.0
+            return super()._sample(name)
+
+    return ReplayGame
+
+
+def _replay_config(base_config, recorded, use_recorded_timing=True):
+    """Current config with the recorded geometry/tabs (and timing) pinned in a replay profile."""
+    cfg = json.loads(json.dumps(base_config))
+    profile = {"inventory": recorded["inventory"], "stash_tabs": recorded["stash_tabs"]}
+    if use_recorded_timing:
+        profile["timing"] = recorded["timing"]
+        cfg["timing"] = dict(cfg.get("timing", {}), **recorded["timing"])
+        if recorded.get("adaptive_timing"):
+            cfg["adaptive_timing"] = recorded["adaptive_timing"]
+    cfg.setdefault("profiles", {})[REPLAY_PROFILE] = profile
+    cfg["active_profile"] = REPLAY_PROFILE
+    cfg["debug"] = dict(cfg.get("debug", {}), DEBUG_MODE=False, PROGRESSIVE_SCAN=True, SCAN_TRACE=False)
+    return cfg
+
+
+def replay_round(round_record, base_config, pace="max", use_recorded_timing=True):
+    """Replays one recorded round with the current build. Returns a comparison dict."""
+    import clocks
+    import item_classifier
+    import simulator
+
+    sorter = simulator.load_sorter(config=_replay_config(base_config, round_record["config"], use_recorded_timing))
+    clock = clocks.RealClock() if pace == "recorded" else clocks.VirtualClock()
+    copy_latency = {}
+    game = _replay_game_class()(sorter.config, clock, copy_latency)
+
+    routing_changes = []
+    for slot in round_record["slots"]:
+        if not slot["text"]:
+            continue
+        recorded_dst = round_record["plan"].get(slot["index"])
+        _types, current_dst = item_classifier.classify_text(slot["text"], sorter.routing_router)
+        if current_dst != recorded_dst:
+            routing_changes.append({"slot": slot["index"], "first_line": slot["text"].splitlines()[0][:60],
+                                    "recorded": recorded_dst, "current": current_dst})
+        cell = game.cell_at(slot["x"], slot["y"])
+        if cell is None or cell in game.cells:
+            continue
+        item_id = game.place_item(cell[0], cell[1], slot["text"], affinity_tab="AFFINITY" if recorded_dst == "AFFINITY" else None,
+                                  expected_tab=recorded_dst)
+        read_ms = slot["phases"].get("read")
+        copy_latency[item_id] = read_ms / 1000.0 if read_ms is not None else 0.0
+
+    num_slots = len(sorter.ALL_COORDINATES)
+    sorter.slots_found_empty_or_ignored = set(range(num_slots)) - set(round_record["scan"])
+    sorter.slots_known_occupied = set()
+    result = simulator.run_round(sorter, game)
+    outcome = game.outcome()
+    recorded_moves = [move for move in round_record["moves"] if move[2]]
+    return {
+        "time": round_record["time"],
+        "slots": len(round_record["slots"]),
+        "items": len(copy_latency),
+        "recorded_seconds": round(round_record["scan_seconds"] + round_record["proc_seconds"], 3),
+        "replay_seconds": round(result.seconds, 3),
+        "recorded_moves": len(recorded_moves),
+        "replay_moves": result.stats.get("items_moved", 0),
+        "recorded_tab_switches": sum(1 for tab in round_record["tabs"] if tab[1]),
+        "replay_tab_switches": result.stats.get("tab_switches", 0),
+        "routing_changes": routing_changes,
+        "missed": outcome.missed,
+        "misrouted": outcome.misrouted,
+        "unexpected": outcome.unexpected,
+    }
+
+
+def summarize(path):
+    rounds = list(iter_rounds(path))
+    slots = sum(len(r["slots"]) for r in rounds)
+    texts = {slot["text"] for r in rounds for slot in r["slots"] if slot["text"]}
+    return {"file": path, "bytes": os.path.getsize(path), "rounds": len(rounds), "slots": slots,
+            "unique_texts": len(texts), "aborted": sum(1 for r in rounds if r["aborted"]),
+            "moved": sum(r["moved"] for r in rounds)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan-Aufzeichnungen anzeigen und wiedergeben.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="Übersicht einer Aufzeichnung")
+    info.add_argument("trace", nargs="?", default=TRACE_FILE)
+    replay = sub.add_parser("replay", help="Aufgezeichnete Runden mit dem aktuellen Stand wiedergeben")
+    replay.add_argument("trace", nargs="?", default=TRACE_FILE)
+    replay.add_argument("--config", default=os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json"),
+                        help="config.json mit den Routing-Regeln des aktuellen Stands")
+    replay.add_argument("--pace", choices=("max", "recorded"), default="max",
+                        help="max = virtuelle Uhr (so schnell wie möglich), recorded = echte Wartezeiten wie aufgezeichnet")
+    replay.add_argument("--round", type=int, action="append", help="Nur diese Runde(n) (ab 1)")
+    replay.add_argument("--current-timing", action="store_true",
+                        help="Timing aus config.json statt des aufgezeichneten verwenden")
+    replay.add_argument("--json", help="Vergleich zusätzlich als JSON in diese Datei schreiben")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    if not os.path.exists(args.trace):
+        logger.error(f"Aufzeichnung {args.trace} nicht gefunden.")
+        return 1
+    if args.command == "info":
+        print(json.dumps(summarize(args.trace), indent=2, ensure_ascii=False))
+        return 0
+
+    with open(args.config, "r", encoding="utf-8") as f:
+        base_config = json.load(f)
+    selected = set(args.round or ())
+    results = []
+    t0 = time.perf_counter()
+    logger.setLevel(logging.WARNING)  # Sorter-Logs während der Wiedergabe unterdrücken
+    try:
+        for number, round_record in enumerate(iter_rounds(args.trace), 1):
+            if selected and number not in selected:
+                continue
+            result = replay_round(round_record, base_config, args.pace, not args.current_timing)
+            result["round"] = number
+            results.append(result)
+    finally:
+        logger.setLevel(logging.INFO)
+
+    print(f"{'Runde':>5} {'Slots':>5} {'Items':>5} {'Aufn. s':>8} {'Replay s':>8} {'Moves':>9} {'Tabs':>7} "
+          f"{'Routing':>7} {'Fehler':>6}")
+    for r in results:
+        errors = r["missed"] + r["misrouted"] + r["unexpected"]
+        print(f"{r['round']:>5} {r['slots']:>5} {r['items']:>5} {r['recorded_seconds']:>8.2f} {r['replay_seconds']:>8.2f} "
+              f"{r['recorded_moves']:>4}/{r['replay_moves']:<4} {r['recorded_tab_switches']:>3}/{r['replay_tab_switches']:<3} "
+              f"{len(r['routing_changes']):>7} {errors:>6}")
+        for change in r["routing_changes"]:
+            print(f"      Slot {change['slot'] + 1}: '{change['first_line']}' {change['recorded']} -> {change['current']}")
+    logger.info(f"{len(results)} Runde(n) in {time.perf_counter() - t0:.2f}s Echtzeit wiedergegeben ({args.pace}).")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+            f.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
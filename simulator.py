@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Deterministischer Spiel-Simulator (ohne Windows / PoE2-Client)
+"""
+Headless stand-in for the game, implementing the backends.SorterBackend interface.
+
+The simulator keeps an inventory grid (items may span several cells), stash
+tabs with capacities, the clipboard, window focus and the mouse/keyboard
+state. Timing behaviour is driven by seeded latency distributions:
+
+- ``hover``: time after the mouse arrives until the item tooltip is ready;
+  a Ctrl+C before that copies nothing
+- ``clipboard``: time from Ctrl+C until the item text shows up in the clipboard
+- ``tab_switch``: time from clicking a tab button until the tab is active;
+  ctrl-clicks before that land in the previously open tab
+
+By default the game runs on a clocks.VirtualClock, so rounds cost no real
+waiting; pass ``clock=clocks.RealClock()`` to watch it in real time.
+
+Ctrl-click semantics follow the game: with the stash open, the item under the
+cursor goes to its affinity tab if it has one, otherwise to the open tab (if
+that tab still has room).
+
+The unmodified sorter runs against it::
+
+    sorter = simulator.load_sorter()
+    game = simulator.SimulatedGame(sorter.config, seed=1)
+    game.place_item(0, 0, ITEM_TEXT)
+    result = simulator.run_round(sorter, game)
+"""
+import asyncio
+import importlib.util
+import math
+import os
+import random
+import sys
+from collections import Counter, namedtuple
+
+import backends
+import clocks
+
+SORTER_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "working mario shown.py")
+SORTER_MODULE_NAME = "poe2_sorter"
+
+# Default latencies, roughly matching inventory_manager.log on a normal machine
+DEFAULT_LATENCIES = {
+    "hover": {"kind": "uniform", "low": 0.02, "high": 0.06},
+    "clipboard": {"kind": "lognormal", "median": 0.03, "sigma": 0.35},
+    "tab_switch": {"kind": "uniform", "low": 0.08, "high": 0.18},
+}
+DEFAULT_TAB_CAPACITY = 144  # Normaler Stash-Tab: 12x12
+TAB_BUTTON_RADIUS = 20      # Pixel um die kalibrierte Tab-Position, die als Treffer zählt
+
+# Representative items for generated inventories: (template, width, height).
+# {n} becomes a random number so neighbouring items don't copy identical texts.
+SAMPLE_ITEMS = [
+    ("Item Class: Rings\nRarity: Rare\nDoom Loop {n}\nSapphire Ring\n--------\nItem Level: 70\n", 1, 1),
+    ("Item Class: Stackable Currency\nRarity: Currency\nExalted Orb\n--------\nStack Size: {n}/20\n", 1, 1),
+    ("Item Class: Stackable Currency\nRarity: Currency\nFlesh Catalyst\n--------\nStack Size: {n}/10\n", 1, 1),
+    ("Item Class: Socketable\nRarity: Currency\nDesert Rune\n--------\nStack Size: {n}/10\n", 1, 1),
+    ("Item Class: Jewels\nRarity: Magic\nEmerald of the Fox {n}\n--------\nItem Level: 70\n", 1, 1),
+    ("Item Class: Tablet\nRarity: Magic\nPrecursor Tablet of the Exile\n--------\nUses Remaining: {n}\n", 1, 1),
+    ("Item Class: Omen\nRarity: Currency\nOmen of Refreshment\n--------\nStack Size: {n}/10\n", 1, 1),
+    ("Item Class: Inscribed Ultimatum\nRarity: Normal\nInscribed Ultimatum\n--------\nItem Level: {n}\n", 1, 1),
+    ("Item Class: Trial Coins\nRarity: Normal\nDjinn Barya\n--------\nItem Level: {n}\n", 1, 1),
+    ("Item Class: Belts\nRarity: Normal\nHeavy Belt\n--------\nItem Level: {n}\n", 2, 1),
+    ("Item Class: Body Armours\nRarity: Normal\nChain Mail\n--------\nQuality: +20% (augmented)\n--------\nItem Level: {n}\n", 2, 3),
+    ("Item Class: Shields\nRarity: Rare\nGale Guard {n}\nTower Shield\n--------\nItem Level: 70\n", 2, 2),
+    ("Item Class: Boots\nRarity: Magic\nSwift Leather Boots\n--------\nItem Level: {n}\n", 2, 2),
+]
+
+SimItem = namedtuple("SimItem", ["item_id", "text", "row", "col", "width", "height", "affinity_tab", "expected_tab"])
+RoundResult = namedtuple("RoundResult", ["seconds", "stats", "moved", "remaining"])
+Outcome = namedtuple("Outcome", ["expected", "moved_ok", "missed", "misrouted", "unexpected", "error_rate"])
+
+
+class LatencyDist(object):
+    """Seeded latency distribution (seconds).
+
+    spec: a number (fixed), or {"kind": "fixed"|"uniform"|"lognormal"|"empirical"|"quantiles", ...}.
+    "quantiles" takes "points": [[q, seconds], ...] (as written by log_model.py)
+    and samples by linear interpolation between them.
+    """
+
+    def __init__(self, spec):
+        if isinstance(spec, (int, float)):
+            spec = {"kind": "fixed", "value": spec}
+        self.spec = dict(spec)
+        self.kind = self.spec.get("kind", "fixed")
+        if self.kind not in ("fixed", "uniform", "lognormal", "empirical", "quantiles"):
+            raise ValueError(f"Unbekannte Latenz-Verteilung '{self.kind}'")
+        if self.kind == "empirical" and not self.spec.get("samples"):
+            raise ValueError("Empirische Latenz-Verteilung ohne 'samples'")
+        if self.kind == "quantiles":
+            points = sorted((float(q), float(v)) for q, v in self.spec.get("points", []))
+            if len(points) < 2 or points[0][0] > 0.0 or points[-1][0] < 1.0:
+                raise ValueError("Quantil-Verteilung braucht Punkte von q=0 bis q=1")
+            self._points = points
+
+    def sample(self, rng):
+        spec = self.spec
+        if self.kind == "fixed":
+            return float(spec.get("value", 0.0))
+        if self.kind == "uniform":
+            return rng.uniform(spec["low"], spec["high"])
+        if self.kind == "lognormal":
+            return rng.lognormvariate(math.log(spec["median"]), spec.get("sigma", 0.25))
+        if self.kind == "empirical":
+            return rng.choice(spec["samples"])
+        u = rng.random()
+        points = self._points
+        for (q0, v0), (q1, v1) in zip(points, points[1:]):
+            if u <= q1:
+                return v0 if q1 == q0 else v0 + (v1 - v0) * (u - q0) / (q1 - q0)
+        return points[-1][1]
+
+
+class _SimInput(backends.InputBackend):
+    def __init__(self, game):
+        self.game = game
+
+    def move_to(self, x, y, duration=0.0):
+        self.game._move_to(x, y, duration)
+
+    def click(self):
+        self.game._click()
+
+    def key_down(self, key):
+        self.game.keys_held.add(key)
+
+    def key_up(self, key):
+        self.game.keys_held.discard(key)
+
+    def press(self, key):
+        self.game._press(key)
+
+    def position(self):
+        return self.game.mouse
+
+
+class _SimClipboard(backends.ClipboardBackend):
+    def __init__(self, game):
+        self.game = game
+
+    def paste(self):
+        return self.game._paste()
+
+    def copy(self, text):
+        self.game.clipboard_text = text
+        self.game.stats["clipboard_writes"] += 1
+
+
+class _SimWindow(backends.WindowBackend):
+    def __init__(self, game):
+        self.game = game
+
+    def foreground_title(self):
+        return self.game.window_title if self.game.focused else "Desktop"
+
+    def foreground_geometry(self):
+        return self.game.client_geometry if self.game.focused else None
+
+
+class _SimScreen(backends.ScreenBackend):
+    def __init__(self, game):
+        self.game = game
+
+    def screenshot(self, region=None):
+        image = self.game.screen_image
+        if image is not None and region is not None:
+            left, top, width, height = region
+            image = image.crop((left, top, left + width, top + height))
+        return image
+
+
+class SimulatedGame(backends.SorterBackend):
+    """Deterministic PoE2 inventory/stash model usable as the sorter's backend."""
+
+    def __init__(self, config, seed=0, latencies=None, tab_capacity=None,
+                 clock=None, window_title="Path of Exile 2", clipboard_miss_rate=0.0):
+        super().__init__(_SimInput(self), _SimClipboard(self), _SimWindow(self), _SimScreen(self))
+        inv = config.get("inventory", {})
+        self.rows = inv["ROWS"]
+        self.cols = inv["COLUMNS"]
+        self.origin = (inv["FIRST_SLOT_TOP_LEFT_X"], inv["FIRST_SLOT_TOP_LEFT_Y"])
+        self.slot_size = (inv["SLOT_WIDTH"], inv["SLOT_HEIGHT"])
+        self.tab_buttons = {name: (pos.get("X", 0), pos.get("Y", 0))
+                            for name, pos in config.get("stash_tabs", {}).items()}
+        self.tab_capacity = dict(tab_capacity or {})
+
+        self.rng = random.Random(seed)
+        merged = dict(DEFAULT_LATENCIES)
+        merged.update(latencies or {})
+        self.latencies = {name: LatencyDist(spec) for name, spec in merged.items()}
+        self.clipboard_miss_rate = clipboard_miss_rate  # Anteil Ctrl+C, die nichts kopieren
+        self.clock = clock or clocks.VirtualClock()
+        self.window_title = window_title
+        self.focused = True
+        self.screen_image = None
+        self.client_geometry = None  # (left, top, width, height, dpi) des Spielfensters, None = unbekannt
+
+        self.items = {}            # item_id -> SimItem
+        self.cells = {}            # (row, col) -> item_id
+        self.stash = {name: [] for name in self.tab_buttons}
+        self.stash.setdefault("AFFINITY", [])
+        self.open_tab = None
+        self._pending_tab = None   # (tab, ready_at)
+        self.clipboard_text = ""
+        self._pending_clipboard = None  # (text, ready_at)
+        self.mouse = (0, 0)
+        self._tooltip_ready_at = None
+        self.keys_held = set()
+        self.stats = Counter()
+        self.slot_latencies = []   # seconds from hover start to successful copy
+        self._hover_started = None
+        self._next_id = 0
+
+    # --- Setup ---
+    def place_item(self, row, col, text, width=1, height=1, affinity_tab=None, expected_tab=None):
+        """Puts an item into the inventory with its top-left cell at (row, col)."""
+        cells = [(r, c) for r in range(row, row + height) for c in range(col, col + width)]
+        for r, c in cells:
+            if not (0 <= r < self.rows and 0 <= c < self.cols):
+                raise ValueError(f"Item ragt aus dem Inventar: ({r},{c})")
+            if (r, c) in self.cells:
+                raise ValueError(f"Zelle ({r},{c}) ist bereits belegt")
+        item = SimItem(self._next_id, text, row, col, width, height, affinity_tab, expected_tab)
+        self._next_id += 1
+        self.items[item.item_id] = item
+        for cell in cells:
+            self.cells[cell] = item.item_id
+        return item.item_id
+
+    def now(self):
+        return self.clock.perf_counter()
+
+    def _sample(self, name):
+        return self.latencies[name].sample(self.rng)
+
+    def cell_at(self, x, y):
+        ox, oy = self.origin
+        w, h = self.slot_size
+        col, row = (x - ox) // w, (y - oy) // h
+        if 0 <= row < self.rows and 0 <= col < self.cols:
+            return int(row), int(col)
+        return None
+
+    def item_at(self, x, y):
+        cell = self.cell_at(x, y)
+        item_id = self.cells.get(cell) if cell else None
+        return self.items.get(item_id) if item_id is not None else None
+
+    def active_tab(self):
+        """Currently open stash tab, applying a finished tab switch."""
+        if self._pending_tab and self.now() >= self._pending_tab[1]:
+            self.open_tab = self._pending_tab[0]
+            self._pending_tab = None
+        return self.open_tab
+
+    # --- Input behaviour ---
+    def _move_to(self, x, y, duration):
+        if duration:
+            self.clock.sleep(duration)
+        px, py = self.mouse
+        self.stats["mouse_path_px"] += math.hypot(x - px, y - py)
+        self.stats["mouse_moves"] += 1
+        self.mouse = (x, y)
+        self._hover_started = self.now()
+        if self.cell_at(x, y) is not None:
+            self.stats["slots_hovered"] += 1
+        item = self.item_at(x, y)
+        self._tooltip_ready_at = self._hover_started + self._sample("hover") if item else None
+
+    def _press(self, key):
+        if key != "c" or "ctrl" not in self.keys_held:
+            return
+        self.stats["copy_commands"] += 1
+        item = self.item_at(*self.mouse)
+        if item is None:
+            return
+        now = self.now()
+        if self._tooltip_ready_at is None or now < self._tooltip_ready_at:
+            self.stats["copy_too_early"] += 1
+            return
+        if self.clipboard_miss_rate and self.rng.random() < self.clipboard_miss_rate:
+            self.stats["copy_missed"] += 1
+            return
+        self._pending_clipboard = (item.text, now + self._sample("clipboard"))
+
+    def _paste(self):
+        self.stats["clipboard_reads"] += 1
+        pending = self._pending_clipboard
+        if pending and self.now() >= pending[1]:
+            self.clipboard_text = pending[0]
+            self._pending_clipboard = None
+            if self._hover_started is not None:
+                self.slot_latencies.append(self.now() - self._hover_started)
+        return self.clipboard_text
+
+    def _click(self):
+        x, y = self.mouse
+        if "ctrl" in self.keys_held:
+            self._ctrl_click(x, y)
+            return
+        for tab, (tx, ty) in self.tab_buttons.items():
+            if (tx, ty) != (0, 0) and math.hypot(x - tx, y - ty) <= TAB_BUTTON_RADIUS:
+                self.stats["tab_switches"] += 1
+                self._pending_tab = (tab, self.now() + self._sample("tab_switch"))
+                return
+        self.stats["plain_clicks"] += 1
+
+    def _ctrl_click(self, x, y):
+        self.stats["ctrl_clicks"] += 1
+        item = self.item_at(x, y)
+        if item is None:
+            self.stats["ctrl_clicks_empty"] += 1
+            return
+        tab = item.affinity_tab or self.active_tab()
+        if tab is None:
+            self.stats["click_failures"] += 1
+            return
+        contents = self.stash.setdefault(tab, [])
+        if len(contents) >= self.tab_capacity.get(tab, DEFAULT_TAB_CAPACITY):
+            self.stats["click_failures"] += 1
+            self.stats["tab_full"] += 1
+            return
+        contents.append(item.item_id)
+        for r in range(item.row, item.row + item.height):
+            for c in range(item.col, item.col + item.width):
+                del self.cells[(r, c)]
+        self.stats["items_moved"] += 1
+        if item.expected_tab and item.expected_tab != tab:
+            self.stats["misrouted"] += 1
+
+    def populate(self, rng, fill=0.6, items=SAMPLE_ITEMS, destination_of=None):
+        """Fills about ``fill`` of the grid with random ``items`` (list of (template, width, height)).
+
+        destination_of(text) -> tab name or None sets each item's expected tab
+        ("AFFINITY" also makes it an affinity item). Returns the number of placed items.
+        """
+        cells = [(r, c) for r in range(self.rows) for c in range(self.cols)]
+        rng.shuffle(cells)
+        target = int(fill * len(cells))
+        placed = used = 0
+        for row, col in cells:
+            if used >= target:
+                break
+            template, width, height = rng.choice(items)
+            text = template.replace("{n}", str(rng.randint(1, 99)))
+            expected = destination_of(text) if destination_of else None
+            try:
+                self.place_item(row, col, text, width, height,
+                                affinity_tab="AFFINITY" if expected == "AFFINITY" else None,
+                                expected_tab=expected)
+            except ValueError:
+                continue
+            placed += 1
+            used += width * height
+        return placed
+
+    # --- Results ---
+    def outcome(self):
+        """Compares where items ended up with their expected_tab."""
+        location = {item_id: tab for tab, ids in self.stash.items() for item_id in ids}
+        expected = moved_ok = missed = misrouted = unexpected = 0
+        for item in self.items.values():
+            tab = location.get(item.item_id)
+            if item.expected_tab:
+                expected += 1
+                if tab is None:
+                    missed += 1
+                elif tab == item.expected_tab:
+                    moved_ok += 1
+                else:
+                    misrouted += 1
+            elif tab is not None:
+                unexpected += 1
+        errors = missed + misrouted + unexpected
+        return Outcome(expected, moved_ok, missed, misrouted, unexpected,
+                       errors / expected if expected else float(errors > 0))
+
+    def moved_items(self):
+        return {tab: list(ids) for tab, ids in self.stash.items() if ids}
+
+    def remaining_items(self):
+        return sorted({item_id for item_id in self.cells.values()})
+
+
+def load_latency_model(path):
+    """Reads a log_model.py model file; returns SimulatedGame keyword arguments."""
+    import json
+    with open(path, "r", encoding="utf-8") as f:
+        model = json.load(f)
+    params = model.get("simulator", {})
+    return {"latencies": params.get("latencies", {}),
+            "clipboard_miss_rate": params.get("clipboard_miss_rate", 0.0)}
+
+
+def load_sorter(path=SORTER_PATH, config=None):
+    """Imports the sorter script as a module (its file name has spaces) and loads a config into it.
+
+    config: dict to use instead of config.json (nothing is written to disk).
+    """
+    module = sys.modules.get(SORTER_MODULE_NAME)
+    if module is None:
+        spec = importlib.util.spec_from_file_location(SORTER_MODULE_NAME, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[SORTER_MODULE_NAME] = module
+        spec.loader.exec_module(module)
+    if config is None:
+        import json
+        with open(os.path.join(os.path.dirname(path), "config.json"), "r", encoding="utf-8") as f:
+            config = json.load(f)
+    module.load_config(config)
+    return module
+
+
+def run_round(sorter, game):
+    """Runs one copy_and_process_inventory_items_async() round against ``game``.
+
+    With the game's default VirtualClock the round takes milliseconds of real
+    time; RoundResult.seconds is the simulated round time.
+    """
+    sorter.set_backend(game)
+    sorter.set_clock(game.clock)
+    sorter.running = True
+    start = game.now()
+    round_coro = sorter.copy_and_process_inventory_items_async()
+    if isinstance(game.clock, clocks.VirtualClock):
+        clocks.run_virtual(round_coro, game.clock)
+    else:
+        asyncio.run(round_coro)
+    seconds = game.now() - start
+    return RoundResult(seconds, dict(game.stats), game.moved_items(), game.remaining_items())
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Span-Tracing der Runden (Chrome/Perfetto Trace-Export)
+"""
+Lightweight span recorder for the sorter's round loop.
+
+Spans are complete intervals (name, start, end, optional argument) taken with
+the sorter's clock, so simulated rounds produce traces in simulated time.
+They are written into a ring buffer that is allocated once: four slot stores
+and an index increment per span, no dicts, no formatting, no I/O. When the
+buffer is full the oldest spans are overwritten, so it can stay enabled for a
+whole session; at about a dozen spans per inventory slot the default capacity
+holds the last few hundred rounds.
+
+``export_chrome(path)`` writes the buffered spans as trace-event JSON
+(``"ph": "X"`` complete events, microseconds), which loads in
+chrome://tracing and https://ui.perfetto.dev. Span names used by the sorter:
+
+- ``round`` > ``scan`` > ``slot`` > ``move`` / ``settle`` / ``clear`` / ``copy`` / ``paste_wait``
+- ``round`` > ``classify`` (batch classification after the scan)
+- ``round`` > ``process`` > ``tab_switch`` / ``ctrl_click``
+"""
+import json
+import os
+from array import array
+
+DEFAULT_CAPACITY = 1 << 16
+
+# Kategorien für den Trace-Viewer (Farben/Filter)
+CATEGORIES = {
+    "round": "round", "scan": "phase", "classify": "phase", "process": "phase",
+    "slot": "slot", "move": "slot", "settle": "slot", "clear": "slot", "copy": "slot", "paste_wait": "slot",
+    "tab_switch": "move", "ctrl_click": "move",
+}
+# Name des einen Span-Arguments im exportierten Event
+ARG_NAMES = {"scan": "slots", "slot": "slot", "process": "items", "tab_switch": "tab", "ctrl_click": "slot"}
+
+
+class SpanTracer(object):
+    """Fixed-size ring buffer of (name, start, end, arg) spans."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = max(1, int(capacity))
+        self._names = [None] * self.capacity
+        self._args = [None] * self.capacity
+        self._starts = array('d', bytes(8 * self.capacity))
+        self._ends = array('d', bytes(8 * self.capacity))
+        self._next = 0   # Index des nächsten Eintrags
+        self.total = 0   # Anzahl aller je aufgezeichneten Spans
+
+    def add(self, name, start, end, arg=None):
+        i = self._next
+        self._names[i] = name
+        self._starts[i] = start
+        self._ends[i] = end
+        self._args[i] = arg
+        self._next = i + 1 if i + 1 < self.capacity else 0
+        self.total += 1
+
+    def clear(self):
+        self._next = 0
+        self.total = 0
+
+    @property
+    def buffered(self):
+        """Number of spans currently in the buffer."""
+        return min(self.total, self.capacity)
+
+    def spans(self):
+        """Buffered spans oldest first as (name, start, end, arg)."""
+        count = self.buffered
+        first = (self._next - count) % self.capacity
+        for k in range(count):
+            i = (first + k) % self.capacity
+            yield self._names[i], self._starts[i], self._ends[i], self._args[i]
+
+    def trace_events(self, epoch=None, pid=1, tid=1):
+        """Chrome trace events. epoch: clock value mapped to ts 0 (default: the earliest span start)."""
+        spans = list(self.spans())
+        if epoch is None:
+            # Eltern-Spans werden erst an ihrem Ende eingetragen, daher das Minimum statt des ersten Eintrags
+            epoch = min((start for _name, start, _end, _arg in spans), default=0.0)
+        events = []
+        for name, start, end, arg in spans:
+            event = {"name": name, "cat": CATEGORIES.get(name, "other"), "ph": "X",
+                     "ts": round((start - epoch) * 1e6, 1), "dur": round(max(0.0, end - start) * 1e6, 1),
+                     "pid": pid, "tid": tid}
+            if arg is not None:
+                event["args"] = {ARG_NAMES.get(name, "value"): arg}
+            events.append(event)
+        # Viewer erwarten Eltern vor Kindern bei gleichem Start
+        events.sort(key=lambda e: (e["ts"], -e["dur"]))
+        return events
+
+    def export_chrome(self, path, metadata=None):
+        """Writes the buffer as trace-event JSON. Returns the number of exported spans."""
+        events = self.trace_events()
+        events.insert(0, {"name": "process_name", "ph": "M", "pid": 1, "tid": 1,
+                          "args": {"name": "POE2 Stash Sorter"}})
+        document = {"traceEvents": events, "displayTimeUnit": "ms", "otherData": dict(metadata or {})}
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(document, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+        return len(events) - 1
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Status-Postfach zwischen Worker-Thread und Tk-GUI
+"""
+Coalescing status channel from the sorting thread to the Tk status window.
+
+The worker only overwrites fields of one ``StatusMailbox`` (the latest status
+line, the latest structured progress, the latest timing summary) and bumps a
+version counter; it never calls into Tk. The Tk thread polls the mailbox at a
+fixed rate (``REFRESH_HZ``) with ``take()`` and redraws only when something
+changed since the last poll. However many updates the worker posts between
+two polls, the GUI applies exactly one, so no callbacks pile up in Tk's event
+queue during a fast scan.
+
+Progress is a plain dict with the fields
+
+- ``phase``: ``"scan"`` or ``"process"``
+- ``done`` / ``total``: slots scanned or items moved so far / planned
+- ``queued``: items found (scan) or still waiting to be moved (process)
+- ``tab``: current destination tab while moving
+- ``started``: ``time.monotonic()`` at the start of the phase, for the ETA
+
+The mailbox also carries the per-slot state for the overlay heatmap
+(``SLOT_STATES``). Slot updates are coalesced per slot: ``take()`` hands over
+only the cells that changed since the last poll, each with its latest state,
+so the overlay recolours a handful of persistent canvas items per refresh
+instead of redrawing the grid.
+"""
+import threading
+import time
+
+REFRESH_HZ = 15
+
+# Slot-Zustände der Heatmap -> Füllfarbe (None = nur Gitterlinie)
+SLOT_STATES = {
+    "idle": None,
+    "pending": "#4a4a4a",    # wird in dieser Runde gescannt
+    "skipped": "#1f3a5f",    # vom progressiven Scan übersprungen
+    "empty": "#2e2e2e",
+    "read": "#2e8b57",       # Text gelesen, kein Ziel-Tab
+    "queued": "#d4a017",     # für einen Tab vorgemerkt
+    "moved": "#1e90ff",
+    "failed": "#dc143c",
+}
+# Latenz-Schattierung gelesener Slots: schnell (grün) -> langsam (rot)
+LATENCY_FAST = 0.10
+LATENCY_SLOW = 0.60
+
+
+class StatusMailbox(object):
+    """Single-slot 'latest value' mailbox; post from any thread, take() from the Tk thread."""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._status = ("Initialisiere...", "black")
+        self._progress = None
+        self._timing = None
+        self._slots = {}   # Slot-Index -> (Zustand, Tab, Latenz), nur geänderte Zellen
+        self._calibration = None  # Fortschritt der laufenden Kalibrierung (calibration.Calibrator.progress)
+        self._version = 0
+        self._taken = -1
+        self.posted = 0   # Anzahl aller Updates (zum Vergleich mit den tatsächlichen Neuzeichnungen)
+
+    def post(self, message, color="black"):
+        with self._lock:
+            self._status = (message, color)
+            self._version += 1
+            self.posted += 1
+
+    def timing(self, text):
+        with self._lock:
+            self._timing = text
+            self._version += 1
+            self.posted += 1
+
+    def start_phase(self, phase, total, **fields):
+        """Begins a new progress phase (resets done and the ETA start)."""
+        progress = {"phase": phase, "done": 0, "total": total, "queued": 0, "tab": None,
+                    "started": self._clock()}
+        progress.update(fields)
+        with self._lock:
+            self._progress = progress
+            self._version += 1
+            self.posted += 1
+
+    def progress(self, **fields):
+        """Updates fields of the current progress phase."""
+        with self._lock:
+            if self._progress is None:
+                return
+            self._progress = dict(self._progress, **fields)
+            self._version += 1
+            self.posted += 1
+
+    def clear_progress(self):
+        with self._lock:
+            if self._progress is not None:
+                self._progress = None
+                self._version += 1
+
+    def slot(self, slot_idx, state, tab=None, latency=None):
+        """Sets one slot's heatmap state; only its latest state reaches the GUI."""
+        with self._lock:
+            self._slots[slot_idx] = (state, tab, latency)
+            self._version += 1
+            self.posted += 1
+
+    def slots(self, states):
+        """Sets many slots at once: {slot_idx: state} (e.g. at the start of a round)."""
+        with self._lock:
+            for slot_idx, state in states.items():
+                self._slots[slot_idx] = (state, None, None)
+            self._version += 1
+            self.posted += 1
+
+    def calibration(self, state):
+        with self._lock:
+            self._calibration = state
+            self._version += 1
+            self.posted += 1
+
+    def take(self):
+        """
+        Returns (status, progress, timing, changed_slots, calibration) if anything changed
+        since the last take(), else None. changed_slots and calibration are handed over once
+        (calibration is None when it did not change).
+        """
+        with self._lock:
+            if self._version == self._taken:
+                return None
+            self._taken = self._version
+            changed, self._slots = self._slots, {}
+            calibration, self._calibration = self._calibration, None
+            return self._status, self._progress, self._timing, changed, calibration
+
+
+def eta_seconds(progress, now):
+    """Remaining seconds extrapolated from the phase's rate so far, or None."""
+    done, total = progress.get("done", 0), progress.get("total", 0)
+    if done <= 0 or total <= done:
+        return None
+    return (now - progress["started"]) / done * (total - done)
+
+
+def format_progress(progress, now=None):
+    """One-line German progress text for the status window."""
+    if not progress:
+        return ""
+    now = time.monotonic() if now is None else now
+    done, total = progress.get("done", 0), progress.get("total", 0)
+    if progress.get("phase") == "scan":
+        text = f"Scan: {done}/{total} Slots · {progress.get('queued', 0)} Item(s) gefunden"
+    else:
+        text = f"Verschieben: {done}/{total} Item(s)"
+        if progress.get("tab"):
+            text += f" · Tab {progress['tab']}"
+    eta = eta_seconds(progress, now)
+    if eta is not None:
+        text += f" · noch ca. {eta:.0f}s"
+    return text
+
+
+def progress_fraction(progress):
+    if not progress or not progress.get("total"):
+        return 0.0
+    return min(1.0, progress.get("done", 0) / progress["total"])
+
+
+def _mix(color_a, color_b, t):
+    a = [int(color_a[i:i + 2], 16) for i in (1, 3, 5)]
+    b = [int(color_b[i:i + 2], 16) for i in (1, 3, 5)]
+    return "#" + "".join(f"{round(x + (y - x) * t):02x}" for x, y in zip(a, b))
+
+
+def slot_fill(state, latency=None, shade_latency=False):
+    """Fill colour for a heatmap cell; read slots are shaded by latency if enabled."""
+    if shade_latency and latency is not None and state in ("read", "queued", "empty"):
+        t = (latency - LATENCY_FAST) / (LATENCY_SLOW - LATENCY_FAST)
+        t = min(1.0, max(0.0, t))
+        return _mix("#32cd32", "#ffd700", t * 2) if t < 0.5 else _mix("#ffd700", "#dc143c", t * 2 - 1)
+    return SLOT_STATES.get(state)
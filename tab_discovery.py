@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Stash-Tab-Buttons aus einem Screenshot finden (NumPy)
+"""
+Finds the stash tab list in one screenshot of the open stash, segments the
+individual tab buttons and assigns them to the configured ``stash_tabs``
+names in one batched pass.
+
+1. Segmentation: horizontal edges (``|dy|`` above a contrast threshold) are
+   cut into runs per row. Button borders are runs that all start and end at
+   the same columns (the list's left and right edge) and are about as wide
+   as a button, so the densest cell of a 2D histogram over (run start, run
+   end) is the tab list; text, items and the much wider stash grid lines
+   fall elsewhere. Rows of those runs merge into separator bands; the gaps
+   between bands with a plausible button height are the buttons.
+2. Signatures: every button is area-resampled to ``SIGNATURE_SHAPE`` (grey,
+   zero mean, unit norm), so the same label gives the same signature at any
+   resolution. Signatures are cached per tab name in a JSON file.
+3. Assignment: cosine similarities of all buttons against all cached
+   signatures in one matrix product, assigned greedily best-first above
+   ``tab_discovery.min_similarity``. Tabs without a signature fall back to
+   the user-confirmed order (``tab_discovery.order``: tab names top to
+   bottom, ``""`` for buttons to skip) or, once, to the current
+   coordinates (the button under the calibrated point). Every assignment
+   refreshes the tab's cached signature.
+
+``synthetic_stash_screenshot`` draws a test screen with a tab list and a
+stash grid::
+
+    python tab_discovery.py stash.png --learn        # Signaturen aus den aktuellen Koordinaten lernen
+    python tab_discovery.py stash.png --write        # Koordinaten ins aktive Profil schreiben
+    python tab_discovery.py --synthetic 3840x2160 --seed 3 --check
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+import config_store
+from auto_calibration import load_screenshot, to_gray
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+DEFAULT_SETTINGS = {
+    "min_similarity": 0.8,
+    "order": [],            # Tab-Namen von oben nach unten, "" = Button überspringen
+    "search_region": None,  # [links, oben, breite, höhe] in Bildschirm-Pixeln, None = SEARCH_REGION
+}
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+DEFAULT_SIGNATURE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tab_signatures.json")
+
+SEARCH_REGION = (0.25, 0.04, 0.35, 0.92)  # Anteil von Breite/Höhe: links, oben, breite, höhe
+BUTTON_WIDTH_RANGE = (0.05, 0.25)         # relativ zur Bildschirmhöhe (die UI skaliert mit der Höhe)
+BUTTON_HEIGHT_RANGE = (0.012, 0.045)      # relativ zur Bildschirmhöhe
+EDGE_CONTRAST = 12.0                      # Mindest-Grauwertsprung einer Button-Kante
+SIGNATURE_SHAPE = (8, 48)
+
+
+class TabDiscoveryError(Exception):
+    """The tab list could not be found in the screenshot."""
+
+
+class TabButton(object):
+    """One segmented tab button (screen coordinates, x1/y1 exclusive)."""
+
+    __slots__ = ("x0", "y0", "x1", "y1", "signature")
+
+    def __init__(self, x0, y0, x1, y1, signature=None):
+        self.x0, self.y0, self.x1, self.y1 = x0, y0, x1, y1
+        self.signature = signature
+
+    @property
+    def center(self):
+        return (self.x0 + self.x1) // 2, (self.y0 + self.y1) // 2
+
+    def contains(self, x, y):
+        return self.x0 <= x < self.x1 and self.y0 <= y < self.y1
+
+    def __repr__(self):
+        return f"TabButton({self.x0}, {self.y0}, {self.x1}, {self.y1})"
+
+
+# --- Segmentierung ---
+def _horizontal_runs(edges):
+    """(row, start, end) of every run of True along the rows of a boolean image (end exclusive)."""
+    padded = np.zeros((edges.shape[0], edges.shape[1] + 2), dtype=np.int8)
+    padded[:, 1:-1] = edges
+    steps = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(steps == 1)
+    _rows, ends = np.nonzero(steps == -1)  # gleiche Reihenfolge (zeilenweise)
+    return rows, starts, ends
+
+
+def _merge_rows(rows, distance):
+    """Groups sorted row indices into bands [(first, last)] with gaps <= distance."""
+    if len(rows) == 0:
+        return []
+    breaks = np.nonzero(np.diff(rows) > distance)[0]
+    firsts = np.concatenate(([rows[0]], rows[breaks + 1]))
+    lasts = np.concatenate((rows[breaks], [rows[-1]]))
+    return list(zip(firsts.tolist(), lasts.tolist()))
+
+
+def resample(patch, shape=SIGNATURE_SHAPE):
+    """Area-average resampling of a 2D patch to ``shape`` (each output cell = mean of its input block)."""
+    rows = np.linspace(0, patch.shape[0], shape[0] + 1).astype(int)
+    cols = np.linspace(0, patch.shape[1], shape[1] + 1).astype(int)
+    if np.any(np.diff(rows) == 0) or np.any(np.diff(cols) == 0):
+        patch = np.repeat(np.repeat(patch, shape[0], axis=0), shape[1], axis=1)  # kleiner als shape
+        rows, cols = rows * shape[0], cols * shape[1]
+    sums = np.add.reduceat(np.add.reduceat(patch, rows[:-1], axis=0), cols[:-1], axis=1)
+    return sums / np.outer(np.diff(rows), np.diff(cols))
+
+
+def signature(gray, button):
+    """Normalized appearance of a button's inside (zero mean, unit norm)."""
+    inset = max(1, (button.y1 - button.y0) // 10)
+    patch = gray[button.y0 + inset:button.y1 - inset, button.x0 + inset:button.x1 - inset]
+    values = resample(patch.astype(np.float64)).ravel()
+    values -= values.mean()
+    norm = np.linalg.norm(values)
+    return values / norm if norm > 1e-9 else values
+
+
+def find_buttons(image, settings=None):
+    """
+    Segments the tab list. Returns the buttons top to bottom (with signatures).
+    Raises TabDiscoveryError if no list of at least two buttons is found.
+    """
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    gray = to_gray(image)
+    screen_h, screen_w = gray.shape
+    region = settings.get("search_region")
+    if region:
+        left, top, width, height = (int(v) for v in region)
+    else:
+        left, top = int(screen_w * SEARCH_REGION[0]), int(screen_h * SEARCH_REGION[1])
+        width, height = int(screen_w * SEARCH_REGION[2]), int(screen_h * SEARCH_REGION[3])
+    crop = gray[top:top + height, left:left + width]
+    if crop.shape[0] < 4 or crop.shape[1] < 4:
+        raise TabDiscoveryError(f"Suchregion {region} liegt außerhalb des Screenshots ({screen_w}x{screen_h}).")
+
+    # Horizontale Kanten -> Läufe pro Zeile, nur Läufe in Button-Breite
+    edges = np.abs(np.diff(crop, axis=0)) > EDGE_CONTRAST
+    rows, starts, ends = _horizontal_runs(edges)
+    lengths = ends - starts
+    min_w, max_w = (screen_h * f for f in BUTTON_WIDTH_RANGE)
+    keep = (lengths >= min_w) & (lengths <= max_w)
+    rows, starts, ends = rows[keep], starts[keep], ends[keep]
+    if len(rows) < 3:
+        raise TabDiscoveryError("Keine Tab-Liste gefunden (keine Button-Kanten).")
+
+    # Dichteste Zelle im (Start, Ende)-Histogramm = linke/rechte Kante der Tab-Liste
+    q = max(2, int(round(screen_w * 0.002)))
+    bins = crop.shape[1] // q + 1
+    hist = np.zeros((bins + 2, bins + 2))
+    np.add.at(hist, (starts // q + 1, ends // q + 1), 1)
+    smooth = sum(hist[1 + dy:bins + 1 + dy, 1 + dx:bins + 1 + dx] for dy in (-1, 0, 1) for dx in (-1, 0, 1))
+    start_bin, end_bin = np.unravel_index(int(np.argmax(smooth)), smooth.shape)
+    near = (np.abs(starts // q - start_bin) <= 1) & (np.abs(ends // q - end_bin) <= 1)
+    x0 = int(np.median(starts[near]))
+    x1 = int(np.median(ends[near]))
+
+    # Zeilen dieser Läufe -> Trennbänder; dazwischen liegen die Buttons
+    min_h, max_h = (screen_h * f for f in BUTTON_HEIGHT_RANGE)
+    bands = _merge_rows(np.unique(rows[near]), max(3, int(round(screen_h * 0.004))))
+    buttons = []
+    for (_first, last), (first, _last) in zip(bands, bands[1:]):
+        y0, y1 = last + 1, first + 1  # Kanten-Index i liegt zwischen Zeile i und i+1
+        if min_h <= y1 - y0 <= max_h:
+            button = TabButton(left + x0, top + y0, left + x1, top + y1)
+            button.signature = signature(gray, button)
+            buttons.append(button)
+    if len(buttons) < 2:
+        raise TabDiscoveryError(f"Keine Tab-Liste gefunden ({len(buttons)} Button(s) bei x={left + x0}..{left + x1}).")
+    return buttons
+
+
+# --- Zuordnung ---
+def assign_tabs(buttons, tab_names, signatures, order=None, min_similarity=DEFAULT_SETTINGS["min_similarity"],
+                learn_from=None):
+    """
+    Assigns buttons to tab names. Returns {name: (button_index, source, similarity)} with source
+    "signature", "order" or "coordinates". One matrix product scores every button against every
+    cached signature; pairs are taken best-first so each button and each name is used once.
+    """
+    assigned = {}
+    used = set()
+    known = [name for name in tab_names if name in signatures]
+    if known and buttons:
+        matrix = np.stack([button.signature for button in buttons])
+        reference = np.stack([np.asarray(signatures[name], dtype=np.float64) for name in known])
+        if matrix.shape[1] == reference.shape[1]:
+            similarity = matrix @ reference.T
+            for flat in np.argsort(similarity, axis=None)[::-1]:
+                index, column = divmod(int(flat), len(known))
+                score = float(similarity[index, column])
+                if score < min_similarity:
+                    break
+                name = known[column]
+                if index in used or name in assigned:
+                    continue
+                assigned[name] = (index, "signature", round(score, 3))
+                used.add(index)
+    # Bestätigte Reihenfolge (ein Eintrag pro Button, von oben)
+    for index, name in enumerate(order or []):
+        if index < len(buttons) and name in tab_names and name not in assigned and index not in used:
+            assigned[name] = (index, "order", None)
+            used.add(index)
+    # Aktuelle Koordinaten: Button unter dem kalibrierten Punkt
+    for name, (x, y) in (learn_from or {}).items():
+        if name in tab_names and name not in assigned and (x, y) != (0, 0):
+            for index, button in enumerate(buttons):
+                if index not in used and button.contains(x, y):
+                    assigned[name] = (index, "coordinates", None)
+                    used.add(index)
+                    break
+    return assigned
+
+
+def discover(image, tab_names, signatures=None, settings=None, learn_from=None):
+    """
+    Finds the tab buttons and assigns them. Returns a dict with ``tabs`` ({name: {"X", "Y",
+    "source", "similarity"}}), ``missing`` (names without a button), ``buttons`` (count),
+    ``signatures`` (cache updated with every assigned tab) and ``seconds``.
+    """
+    started = time.perf_counter()
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    signatures = dict(signatures or {})
+    buttons = find_buttons(image, settings)
+    assigned = assign_tabs(buttons, list(tab_names), signatures, settings.get("order"),
+                           settings["min_similarity"], learn_from)
+    tabs = {}
+    for name, (index, source, similarity) in sorted(assigned.items()):
+        x, y = buttons[index].center
+        tabs[name] = {"X": int(x), "Y": int(y), "source": source, "similarity": similarity}
+        signatures[name] = buttons[index].signature
+    return {
+        "tabs": tabs,
+        "missing": [name for name in tab_names if name not in tabs],
+        "buttons": len(buttons),
+        "signatures": signatures,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def coordinates(result):
+    """Only the ``stash_tabs`` config values of a discover() result."""
+    return {name: {"X": tab["X"], "Y": tab["Y"]} for name, tab in result["tabs"].items()}
+
+
+# --- Signatur-Cache ---
+def load_signatures(path):
+    """{tab name: signature} from the JSON cache; {} if missing, unreadable or for another SIGNATURE_SHAPE."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("shape") != list(SIGNATURE_SHAPE):
+        return {}
+    return {name: np.asarray(values, dtype=np.float64) for name, values in data.get("tabs", {}).items()}
+
+
+def save_signatures(path, signatures):
+    data = {"shape": list(SIGNATURE_SHAPE),
+            "tabs": {name: [round(float(v), 4) for v in values] for name, values in sorted(signatures.items())}}
+    config_store.write_atomic(path, json.dumps(data), keep_backup=False)
+
+
+def write_profile_tabs(config_path, profile, stash_tabs):
+    """Merges ``stash_tabs`` into profiles[profile]["stash_tabs"] (and the top-level block if active)."""
+    with open(config_path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    cfg.setdefault("profiles", {}).setdefault(profile, {}).setdefault("stash_tabs", {}).update(stash_tabs)
+    if cfg.get("active_profile") == profile:
+        cfg.setdefault("stash_tabs", {}).update(stash_tabs)
+    config_store.write_json(config_path, cfg)
+
+
+# --- Testbilder ---
+_GLYPH_ROWS, _GLYPH_COLS = 5, 3
+
+
+def _text_bitmap(text):
+    """Deterministic 5-pixel-high 'font': one random 5x3 glyph per character, one column spacing."""
+    glyphs = []
+    for char in text:
+        glyph = np.random.default_rng(ord(char)).random((_GLYPH_ROWS, _GLYPH_COLS)) < 0.55
+        glyphs.append(np.hstack([glyph, np.zeros((_GLYPH_ROWS, 1), dtype=bool)]))
+    return np.hstack(glyphs)[:, :-1] if glyphs else np.zeros((_GLYPH_ROWS, 1), dtype=bool)
+
+
+def synthetic_stash_screenshot(width=2560, height=1440, names=None, fillers=18, seed=0):
+    """
+    Draws an open stash (uint8 H x W x 3): stash grid on the left, tab list right of it with the
+    given names and unnamed filler tabs in a seed-dependent order. Returns (image, {name: (x, y)}).
+    """
+    rng = np.random.default_rng(seed)
+    names = list(names or ["RARE", "RUNE", "JEWEL", "QUALITY_SOCKET", "PRECURSOR_TABLET",
+                           "CHANCE_ITEMS", "ULTIMATUM_DJINN", "CURRENCY_CATALYST"])
+    labels = names + [f"TAB {i + 1}" for i in range(fillers)]
+    labels = [labels[i] for i in rng.permutation(len(labels))]
+    image = rng.normal(22, 6, size=(height, width)).astype(np.float32)
+
+    cell = int(round(height * 0.052 * 0.7))  # Stash-Gitter (wie in auto_calibration)
+    gx, gy = int(width * 0.02), int(height * 0.15)
+    for r in range(12):
+        for c in range(12):
+            x, y = gx + c * cell, gy + r * cell
+            image[y:y + cell, x:x + cell] = 55
+            image[y + 2:y + cell - 2, x + 2:x + cell - 2] = 16 + rng.uniform(0, 40) * (rng.random() < 0.3)
+
+    border = max(1, int(round(height / 720)))
+    button_h, button_w = int(round(height * 0.023)), int(round(height * 0.124))
+    x0, y = int(width * 0.42), int(height * 0.1)
+    truth = {}
+    for label in labels:
+        if y + button_h > height:
+            break  # Liste länger als der Bildschirm
+        image[y:y + button_h, x0:x0 + button_w] = 70
+        image[y + border:y + button_h - border, x0 + border:x0 + button_w - border] = 34
+        # Schrift: 4-fach überabgetastet und flächengemittelt (Kantenglättung), lange Namen kleiner
+        bitmap = _text_bitmap(label)
+        zoom = min(button_h * 0.45 / _GLYPH_ROWS, (button_w - 4 * border) / float(bitmap.shape[1]))
+        text_h, text_w = max(1, int(round(_GLYPH_ROWS * zoom))), max(1, int(round(bitmap.shape[1] * zoom)))
+        fine = bitmap[(np.arange(4 * text_h) * _GLYPH_ROWS // (4 * text_h))[:, None],
+                      (np.arange(4 * text_w) * bitmap.shape[1] // (4 * text_w))[None, :]]
+        alpha = fine.reshape(text_h, 4, text_w, 4).mean(axis=(1, 3))
+        ty, tx = y + (button_h - text_h) // 2, x0 + (button_w - text_w) // 2
+        region = image[ty:ty + text_h, tx:tx + text_w]
+        region += (190 - region) * alpha
+        if label in names:
+            truth[label] = (x0 + button_w // 2, y + button_h // 2)
+        y += button_h + border
+    rgb = np.clip(np.stack([image, image * 0.95, image * 0.85], axis=-1), 0, 255).astype(np.uint8)
+    return rgb, truth
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Findet die Stash-Tab-Buttons in einem Screenshot.")
+    parser.add_argument("screenshot", nargs="?", help="Screenshot des offenen Stashs (.npy, .png, ...)")
+    parser.add_argument("--synthetic", metavar="BxH", help="Stattdessen ein Testbild erzeugen, z.B. 3840x2160")
+    parser.add_argument("--seed", type=int, default=0, help="Reihenfolge der Tabs im Testbild")
+    parser.add_argument("--check", action="store_true",
+                        help="Signaturen an einem 2560x1440-Testbild (Seed 0) lernen und das Ergebnis prüfen")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_FILE, help="config.json (tab_discovery-Block, Ziel für --write)")
+    parser.add_argument("--signatures", default=DEFAULT_SIGNATURE_FILE, help="Signatur-Cache (JSON)")
+    parser.add_argument("--learn", action="store_true", help="Signaturen aus den aktuellen Tab-Koordinaten lernen")
+    parser.add_argument("--profile", help="Ziel-Profil (Standard: aktives Profil)")
+    parser.add_argument("--write", action="store_true", help="Koordinaten ins Profil und Signaturen in den Cache schreiben")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    config = {}
+    if os.path.isfile(args.config):
+        with open(args.config, "r", encoding="utf-8") as f:
+            config = json.load(f)
+    settings = config.get("tab_discovery") or {}
+    stash_tabs = config.get("stash_tabs", {})
+    tab_names = sorted(stash_tabs)
+    signatures = load_signatures(args.signatures)
+    learn_from = {name: (pos.get("X", 0), pos.get("Y", 0)) for name, pos in stash_tabs.items()} if args.learn else None
+
+    truth = None
+    if args.synthetic:
+        width, height = (int(v) for v in args.synthetic.lower().split("x"))
+        image, truth = synthetic_stash_screenshot(width, height, seed=args.seed)
+        tab_names = sorted(truth)
+        if args.check:
+            reference, points = synthetic_stash_screenshot(2560, 1440, seed=0)
+            signatures = discover(reference, tab_names, learn_from=points)["signatures"]
+            learn_from = None
+    elif args.screenshot:
+        image = load_screenshot(args.screenshot)
+    else:
+        parser.error("Screenshot oder --synthetic angeben")
+
+    try:
+        result = discover(image, tab_names, signatures, settings, learn_from)
+    except TabDiscoveryError as e:
+        logger.error(str(e))
+        return 1
+    print(json.dumps({key: value for key, value in result.items() if key != "signatures"}, indent=2))
+    if args.check and truth:
+        errors = {name: (result["tabs"].get(name), point) for name, point in truth.items()
+                  if name not in result["tabs"]
+                  or abs(result["tabs"][name]["X"] - point[0]) > 2 or abs(result["tabs"][name]["Y"] - point[1]) > 2}
+        if errors:
+            logger.error(f"Abweichung vom Testbild (gefunden, erwartet): {errors}")
+            return 1
+        logger.info("Testbild korrekt erkannt.")
+    if args.write:
+        profile = args.profile or config.get("active_profile", "default")
+        if profile == "default":
+            logger.warning("Aktives Profil ist 'default' - bitte --profile angeben.")
+            return 1
+        write_profile_tabs(args.config, profile, coordinates(result))
+        save_signatures(args.signatures, result["signatures"])
+        logger.info(f"{len(result['tabs'])} Tab(s) in Profil '{profile}' geschrieben, Signaturen in {args.signatures}.")
+    elif args.learn:
+        save_signatures(args.signatures, result["signatures"])
+        logger.info(f"Signaturen für {len(result['tabs'])} Tab(s) in {args.signatures} gespeichert.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
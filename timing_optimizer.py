@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Timing-Optimierer (Parameter-Suche mit dem Simulator)
+"""
+Searches the ``timing`` config block for the fastest setting that still sorts
+correctly in the simulator.
+
+Every candidate is evaluated on the same set of generated inventories
+(``--scenarios``, seeded) with ``simulator.SimulatedGame`` on a virtual clock,
+optionally using latencies from ``log_model.py``. Candidates run in a process
+pool; each worker imports the sorter once.
+
+Search strategies:
+
+- ``grid``: every combination of ``--levels`` values per parameter (only
+  sensible with ``--params`` limiting the parameter set)
+- ``random``: uniform samples within PARAM_SPACE
+- ``refine``: rounds of random samples drawn around the best candidates so
+  far, narrowing each round (cross-entropy style)
+
+A candidate is feasible if its mean error rate (missed, misrouted or
+unexpectedly moved items per expected item) stays at or below
+``--max-error`` (default: the error rate of the current settings, so the
+result is never less reliable than today). The fastest feasible candidate is written into the
+profile's ``timing`` block (``--profile``, default: the active profile)::
+
+    python timing_optimizer.py --model latency_model.json --strategy refine --budget 200 --write
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import config_store
+
+logger = logging.getLogger("poe2_inventory_manager")
+
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+
+# name -> (low, high); MOVE_BATCH_SIZE is an integer
+PARAM_SPACE = {
+    "MINIMUM_DURATION": (0.0, 0.01),
+    "CLIPBOARD_WAIT": (0.005, 0.15),
+    "CLIPBOARD_CLEAR_WAIT": (0.0, 0.05),
+    "CLIPBOARD_RECLEAR_WAIT": (0.0, 0.04),
+    "HOVER_SETTLE": (0.0, 0.15),
+    "COPY_KEY_HOLD": (0.0, 0.05),
+    "POST_COPY_WAIT": (0.0, 0.1),
+    "EMPTY_RECHECK_WAIT": (0.0, 0.1),
+    "SUCCESS_PAD": (0.0, 0.05),
+    "CTRL_CLICK_HOLD": (0.0, 0.04),
+    "TAB_CLICK_SETTLE": (0.0, 0.1),
+    "TAB_SWITCH_WAIT": (0.05, 0.6),
+    "POST_TAB_SWITCH_WAIT": (0.0, 0.2),
+    "POST_CLICK_WAIT": (0.0, 0.2),
+    "POST_MOVE_WAIT": (0.0, 0.1),
+    "BATCH_PAUSE": (0.0, 0.2),
+    "MOVE_BATCH_SIZE": (1, 12),
+}
+INTEGER_PARAMS = {"MOVE_BATCH_SIZE"}
+
+# Per worker process (set by _init_worker)
+_worker = {}
+
+
+def _init_worker(config, sim_kwargs, scenarios, fill):
+    logging.getLogger("poe2_inventory_manager").setLevel(logging.ERROR)
+    import simulator
+    import item_classifier
+    sorter = simulator.load_sorter(config=config)
+    base_timing = dict(sorter.config.get("timing", {}))
+    _worker.update(simulator=simulator, sorter=sorter, base_timing=base_timing,
+                   sim_kwargs=sim_kwargs, scenarios=scenarios, fill=fill,
+                   destination_of=lambda text: item_classifier.classify_text(text, sorter.routing_router)[1])
+
+
+def evaluate(params):
+    """Worker: runs all scenarios with ``params`` merged into the timing block."""
+    simulator = _worker["simulator"]
+    sorter = _worker["sorter"]
+    timing = dict(_worker["base_timing"], **params)
+    sorter.config["timing"] = timing
+    seconds = errors = expected = 0.0
+    worst = 0.0
+    for seed in range(_worker["scenarios"]):
+        sorter.slots_found_empty_or_ignored = set()
+        sorter.slots_known_occupied = set()
+        game = simulator.SimulatedGame(sorter.config, seed=seed, **_worker["sim_kwargs"])
+        game.populate(random.Random(seed), _worker["fill"], destination_of=_worker["destination_of"])
+        result = simulator.run_round(sorter, game)
+        outcome = game.outcome()
+        seconds += result.seconds
+        expected += outcome.expected
+        errors += outcome.missed + outcome.misrouted + outcome.unexpected
+        worst = max(worst, outcome.error_rate)
+    n = _worker["scenarios"]
+    return {
+        "params": {name: timing[name] for name in (params or PARAM_SPACE) if name in timing},
+        "round_seconds": round(seconds / n, 4),
+        "error_rate": round(errors / expected, 5) if expected else 0.0,
+        "worst_error_rate": round(worst, 5),
+    }
+
+
+def _round_param(name, value):
+    low, high = PARAM_SPACE[name]
+    value = min(high, max(low, value))
+    return int(round(value)) if name in INTEGER_PARAMS else round(value, 4)
+
+
+def grid_candidates(names, levels):
+    axes = []
+    for name in names:
+        low, high = PARAM_SPACE[name]
+        axes.append(sorted({_round_param(name, low + (high - low) * i / max(1, levels - 1)) for i in range(levels)}))
+    for values in itertools.product(*axes):
+        yield dict(zip(names, values))
+
+
+def random_candidates(names, count, rng):
+    for _ in range(count):
+        yield {name: _round_param(name, rng.uniform(*PARAM_SPACE[name])) for name in names}
+
+
+def refine_candidates(names, elites, count, spread, rng):
+    """Samples around the elite candidates; spread is a fraction of each parameter's range."""
+    for i in range(count):
+        parent = elites[i % len(elites)]["params"]
+        candidate = {}
+        for name in names:
+            low, high = PARAM_SPACE[name]
+            candidate[name] = _round_param(name, rng.gauss(parent[name], spread * (high - low)))
+        yield candidate
+
+
+def _rank_key(result, max_error):
+    # Zulässige Kandidaten zuerst (nach Zeit), danach nach Fehlerrate
+    feasible = max_error is None or result["error_rate"] <= max_error
+    return (0, result["round_seconds"]) if feasible else (1, result["error_rate"], result["round_seconds"])
+
+
+def optimize(config, names, strategy="refine", budget=100, max_error=None, scenarios=4, fill=0.6,
+             sim_kwargs=None, workers=None, levels=3, seed=0, progress=None):
+    """Runs the search and returns all results sorted best first (baseline included, tagged).
+
+    max_error None uses the baseline's error rate. Every result gets a "feasible" flag.
+    """
+    rng = random.Random(seed)
+    workers = workers or os.cpu_count() or 1
+    results = []
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(config, sim_kwargs or {}, scenarios, fill)) as pool:
+        def run(candidates):
+            batch = list(pool.map(evaluate, candidates))
+            results.extend(batch)
+            if progress:
+                best = min(results, key=lambda r: _rank_key(r, max_error))
+                progress(len(results), best)
+            return batch
+
+        # Ausgangswerte: leere Parameter = wirksame Timing-Werte (config.json + Defaults)
+        base_result = run([{}])[0]
+        base_result["params"] = {name: base_result["params"][name] for name in names if name in base_result["params"]}
+        base_result["baseline"] = True
+        if max_error is None:
+            max_error = base_result["error_rate"]
+        if strategy == "grid":
+            run(itertools.islice(grid_candidates(names, levels), budget))
+        elif strategy == "random":
+            run(random_candidates(names, budget, rng))
+        elif strategy == "refine":
+            rounds = 5
+            per_round = max(workers, budget // rounds)
+            run(random_candidates(names, per_round, rng))
+            spread = 0.25
+            for _ in range(rounds - 1):
+                ranked = sorted(results, key=lambda r: _rank_key(r, max_error))
+                elites = [r for r in ranked[:max(2, per_round // 5)] if set(r["params"]) >= set(names)]
+                run(refine_candidates(names, elites or [base_result], per_round, spread, rng))
+                spread *= 0.6
+        else:
+            raise ValueError(f"Unbekannte Strategie '{strategy}'")
+
+    for result in results:
+        result["feasible"] = result["error_rate"] <= max_error
+    return sorted(results, key=lambda r: _rank_key(r, max_error))
+
+
+def write_profile_timing(config_path, profile, timing):
+    """Merges ``timing`` into profiles[profile]["timing"] of the config file."""
+    with open(config_path, "r", encoding="utf-8") as f:
+        cfg = json.load(f)
+    cfg.setdefault("profiles", {}).setdefault(profile, {}).setdefault("timing", {}).update(timing)
+    config_store.write_json(config_path, cfg)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Optimiert die Timing-Werte mit dem Simulator.")
+    parser.add_argument("--config", default=DEFAULT_CONFIG_FILE, help="config.json")
+    parser.add_argument("--model", help="Latenz-Modell von log_model.py (Standard: Simulator-Defaults)")
+    parser.add_argument("--strategy", choices=("grid", "random", "refine"), default="refine")
+    parser.add_argument("--budget", type=int, default=100, help="Anzahl Kandidaten")
+    parser.add_argument("--params", help="Kommagetrennte Parameter (Standard: alle)")
+    parser.add_argument("--levels", type=int, default=3, help="Stufen pro Parameter bei --strategy grid")
+    parser.add_argument("--max-error", type=float, default=None,
+                        help="Maximale Fehlerrate (0.01 = 1%%, Standard: Fehlerrate der aktuellen Werte)")
+    parser.add_argument("--scenarios", type=int, default=4, help="Inventare pro Kandidat")
+    parser.add_argument("--fill", type=float, default=0.6, help="Füllgrad der Inventare")
+    parser.add_argument("--workers", type=int, default=None, help="Anzahl Prozesse (Standard: CPU-Kerne)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", help="Ziel-Profil (Standard: aktives Profil)")
+    parser.add_argument("--write", action="store_true", help="Bestes Ergebnis ins Profil schreiben")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    with open(args.config, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    names = [n.strip() for n in args.params.split(",")] if args.params else list(PARAM_SPACE)
+    unknown = [n for n in names if n not in PARAM_SPACE]
+    if unknown:
+        parser.error(f"Unbekannte Parameter: {', '.join(unknown)}")
+    sim_kwargs = {}
+    if args.model:
+        import simulator
+        sim_kwargs = simulator.load_latency_model(args.model)
+
+    def progress(done, best):
+        logger.info(f"{done} Kandidaten bewertet, bester: {best['round_seconds']:.2f}s/Runde, "
+                    f"Fehlerrate {best['error_rate']:.1%}")
+
+    t0 = time.perf_counter()
+    results = optimize(config, names, args.strategy, args.budget, args.max_error, args.scenarios,
+                       args.fill, sim_kwargs, args.workers, args.levels, args.seed, progress)
+    baseline = next(r for r in results if r.get("baseline"))
+    best = results[0]
+    logger.info(f"{len(results)} Kandidaten in {time.perf_counter() - t0:.1f}s. "
+                f"Ausgangswerte: {baseline['round_seconds']:.2f}s/Runde (Fehlerrate {baseline['error_rate']:.1%}), "
+                f"bester: {best['round_seconds']:.2f}s/Runde (Fehlerrate {best['error_rate']:.1%}).")
+    print(json.dumps({"baseline": baseline, "best": best}, indent=2))
+
+    if not best["feasible"]:
+        logger.warning("Kein Kandidat unterschreitet die maximale Fehlerrate, nichts geschrieben.")
+        return 1
+    if args.write:
+        profile = args.profile or config.get("active_profile", "default")
+        if profile == "default":
+            logger.warning("Aktives Profil ist 'default' - bitte --profile angeben.")
+            return 1
+        write_profile_timing(args.config, profile, best["params"])
+        logger.info(f"Timing in Profil '{profile}' geschrieben ({args.config}).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
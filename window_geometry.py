@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# Path of Exile 2 Inventory Manager - Profile je Fenstergeometrie (Client-Größe + DPI) wählen und skalieren
+"""
+Resolution-aware profiles.
+
+Profiles hold raw screen coordinates, which are only valid for the client
+area of the game window they were calibrated in. ``save_profile`` tags a
+profile with that ``Geometry`` (client origin, size and DPI). When the game
+window's geometry changes, the sorter switches to the profile tagged with the
+same client size and DPI (``select_profile``); if there is none, it derives
+one from the active profile (``scale_profile``) and stores it as a new
+profile, so every geometry seen once has its own inventory and tab tables and
+switching back and forth needs neither recalibration nor rescaling.
+
+Scaling follows PoE's UI layout: everything scales with the client height,
+the inventory panel is anchored to the right edge of the client area and the
+stash with its tab list to the left edge. Clients of the same size (a moved
+window) differ only by the client origin, which ``scale_profile`` handles as
+a pure translation.
+
+Profile fields written here::
+
+    "geometry":    {"left": 0, "top": 0, "width": 2560, "height": 1440, "dpi": 96}
+    "scaled_from": "ASDAWD"    # nur bei abgeleiteten Profilen
+"""
+DEFAULT_DPI = 96
+
+DEFAULT_SETTINGS = {
+    "auto_select": True,  # Profil mit passender Client-Größe + DPI automatisch laden (aus = nie umschalten)
+    "auto_scale": True,   # fehlt eins, ein Profil aus dem aktiven ableiten (skalieren) und speichern
+}
+
+
+class Geometry(object):
+    """Client area of the game window in screen pixels, plus its DPI."""
+    __slots__ = ("left", "top", "width", "height", "dpi")
+
+    def __init__(self, left, top, width, height, dpi=DEFAULT_DPI):
+        self.left = int(left)
+        self.top = int(top)
+        self.width = int(width)
+        self.height = int(height)
+        self.dpi = int(dpi or DEFAULT_DPI)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Geometry from a profile tag, or None if the tag is missing or unusable."""
+        if not isinstance(data, dict):
+            return None
+        try:
+            geometry = cls(data.get("left", 0), data.get("top", 0), data["width"], data["height"],
+                           data.get("dpi", DEFAULT_DPI))
+        except (KeyError, TypeError, ValueError):
+            return None
+        return geometry if geometry.width > 0 and geometry.height > 0 else None
+
+    def to_dict(self):
+        return {"left": self.left, "top": self.top, "width": self.width, "height": self.height, "dpi": self.dpi}
+
+    def _tuple(self):
+        return self.left, self.top, self.width, self.height, self.dpi
+
+    def __eq__(self, other):
+        return isinstance(other, Geometry) and self._tuple() == other._tuple()
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self._tuple())
+
+    def same_size(self, other):
+        """Same client size and DPI (the origin may differ)."""
+        return (self.width, self.height, self.dpi) == (other.width, other.height, other.dpi)
+
+    @property
+    def label(self):
+        return f"{self.width}x{self.height}" + (f"@{self.dpi}dpi" if self.dpi != DEFAULT_DPI else "")
+
+    def __repr__(self):
+        return f"Geometry({self.label} bei {self.left},{self.top})"
+
+
+def profile_geometry(profile):
+    return Geometry.from_dict(profile.get("geometry")) if isinstance(profile, dict) else None
+
+
+def profile_root(profiles, name):
+    """Name of the profile a derived profile was scaled from (the profile itself otherwise)."""
+    return profiles.get(name, {}).get("scaled_from") or name
+
+
+def select_profile(profiles, geometry, preferred=None):
+    """
+    Name of the profile tagged with the geometry's client size and DPI, or None. Prefers
+    ``preferred`` itself, then profiles derived from the same source, then the first by name.
+    """
+    tags = {name: profile_geometry(profile) for name, profile in profiles.items()}
+    matches = sorted(name for name, tag in tags.items() if tag is not None and tag.same_size(geometry))
+    if not matches:
+        return None
+    if preferred in matches:
+        return preferred
+    if preferred in profiles:
+        root = profile_root(profiles, preferred)
+        related = [name for name in matches if profile_root(profiles, name) == root]
+        if related:
+            return related[0]
+    return matches[0]
+
+
+def scale_source(profiles, preferred):
+    """Tagged profile to derive a new geometry from: the source of ``preferred``, or None if untagged."""
+    if preferred not in profiles:
+        return None
+    root = profile_root(profiles, preferred)
+    for name in (root, preferred):
+        if name in profiles and profile_geometry(profiles[name]) is not None:
+            return name
+    return None
+
+
+def derived_name(source, geometry, profiles):
+    """Unused profile name for ``source`` scaled to ``geometry`` (e.g. 'ASDAWD 1920x1080')."""
+    name = f"{source} {geometry.label}"
+    suffix = 2
+    while name in profiles:
+        name = f"{source} {geometry.label} ({suffix})"
+        suffix += 1
+    return name
+
+
+def scale_inventory(inventory, source, target):
+    """Inventory values for ``target``; the panel is right-anchored and scales with the client height."""
+    scale = target.height / source.height
+    source_right, target_right = source.left + source.width, target.left + target.width
+    scaled = dict(inventory)
+    scaled["FIRST_SLOT_TOP_LEFT_X"] = round(target_right - (source_right - inventory["FIRST_SLOT_TOP_LEFT_X"]) * scale)
+    scaled["FIRST_SLOT_TOP_LEFT_Y"] = round(target.top + (inventory["FIRST_SLOT_TOP_LEFT_Y"] - source.top) * scale)
+    scaled["SLOT_WIDTH"] = max(1, round(inventory["SLOT_WIDTH"] * scale))
+    scaled["SLOT_HEIGHT"] = max(1, round(inventory["SLOT_HEIGHT"] * scale))
+    return scaled
+
+
+def scale_tabs(stash_tabs, source, target):
+    """Tab button positions for ``target``; the stash is left-anchored. Uncalibrated (0, 0) tabs stay at 0."""
+    scale = target.height / source.height
+    scaled = {}
+    for name, pos in stash_tabs.items():
+        x, y = pos.get("X", 0), pos.get("Y", 0)
+        if x == 0 and y == 0:
+            scaled[name] = {"X": 0, "Y": 0}
+        else:
+            scaled[name] = {"X": round(target.left + (x - source.left) * scale),
+                            "Y": round(target.top + (y - source.top) * scale)}
+    return scaled
+
+
+def scale_profile(profile, target):
+    """
+    Copy of a tagged profile with inventory, stash tabs and tag moved to ``target``.
+    Other fields (e.g. per-profile timing) are kept. Raises ValueError for an untagged profile.
+    """
+    source = profile_geometry(profile)
+    if source is None:
+        raise ValueError("Profil hat keine Fenstergeometrie.")
+    scaled = dict(profile)
+    if "inventory" in profile:
+        scaled["inventory"] = scale_inventory(profile["inventory"], source, target)
+    if "stash_tabs" in profile:
+        scaled["stash_tabs"] = scale_tabs(profile["stash_tabs"], source, target)
+    scaled["geometry"] = target.to_dict()
+    return scaled
@@ -1,13 +1,9 @@
 #!/usr/bin/env python3
 # Path of Exile 2 Inventory Manager - Improved Version with Batch Processing & Async IO
 # <3
+import atexit
 import logging
-import pyautogui
-import pyperclip
-import time
 import threading
-import keyboard
-import win32gui
 import os
 import json
 import tkinter as tk
@@ -17,27 +13,88 @@ import traceback
 from datetime import datetime
 from collections import defaultdict # Added for grouping items
 import asyncio # Added for async operations
+try:
+    import keyboard # Globale Hotkeys (nur im echten Betrieb nötig)
+except ImportError:
+    keyboard = None
+import clocks # Echte oder virtuelle Uhr (Simulator)
+import backends # Eingabe/Zwischenablage/Fenster/Bildschirm (echt oder Simulator)
+import routing_rules # JSON routing rules (Feature 18.2)
+import item_classifier # Item-Erkennung ohne GUI-Abhängigkeiten
+from item_classifier import check_item_types
+import rule_profiler # Optionaler Profiler für Item-Erkennung/Routing
+import adaptive_timing # Adaptive Scan-Wartezeiten (online)
+import scan_trace # Optionale Scan-Aufzeichnung für Replays
+import span_trace # Span-Tracing der Runden (Chrome/Perfetto-Export)
+import metrics # Prometheus-Metriken (optional, Hintergrund-Thread)
+import log_pipeline # Logging über Queue + Listener-Thread, rotierende .gz-Logs
+import sampling_profiler # Sampling-Profiler für die nächste Runde (auf Abruf)
+import status_channel # Status-Postfach Worker -> GUI (feste Bildrate)
+import calibration # Kalibrierung per Hotkey (ohne input())
+import window_geometry # Profile je Client-Größe + DPI des Spielfensters
+import config_store # config.json verzögert im Hintergrund und atomar schreiben
+try:
+    import auto_calibration # Inventar-Gitter aus einem Screenshot (braucht NumPy)
+    import tab_discovery # Stash-Tab-Buttons aus einem Screenshot (braucht NumPy)
+except ImportError:
+    auto_calibration = tab_discovery = None
 
 # Konfigurationsdatei
 CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
 LOG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inventory_manager.log")
+TRACE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scan_trace.jsonl")
+TAB_SIGNATURE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tab_signatures.json")
 
-# Logger konfigurieren (Moved setup here for clarity)
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE, encoding='utf-8'), # Specify encoding
-        logging.StreamHandler(sys.stdout)
-    ]
-)
 logger = logging.getLogger("poe2_inventory_manager") # Or your actual logger name
 
+logging_pipeline = None # LogPipeline (Queue + Listener-Thread), gesetzt in setup_logging
+
+def setup_logging():
+    """Routes log records through a queue to a listener thread that writes the rotating log file and the console.
+
+    Called from main, so importing the module has no side effects. The ``logging``
+    config block is applied later by load_config (rotation, compression, slot DEBUG rate).
+    """
+    global logging_pipeline
+    logging_pipeline = log_pipeline.LogPipeline(LOG_FILE).start()
+
 # Initial config placeholder (will be overwritten by load_config)
 config = {}
 
-async def copy_text_at_position(x, y):
-    t_func_start = time.perf_counter()
+# Active backend for input/clipboard/window/screen (set in main() or by the simulator)
+backend = None
+
+# Clock for every timing call (clocks.VirtualClock in simulations)
+clock = clocks.RealClock()
+
+def set_clock(new_clock):
+    """Switches the clock used for perf_counter/time/sleep (asyncio.sleep follows the event loop)."""
+    global clock, last_window_check_time
+    clock = new_clock
+    last_window_check_time = 0
+
+def set_backend(new_backend):
+    """Switches the input/clipboard/window/screen backend (e.g. to simulator.SimulatedGame)."""
+    global backend, last_mouse_pos, last_window_check_time
+    backend = new_backend
+    last_mouse_pos = None
+    last_window_check_time = 0
+    if config:
+        backend.input.configure_timing(config.get("timing", {}))
+
+async def copy_text_at_position(x, y, phases=None, expect_item=False, verify=False):
+    """Hovers (x, y), copies the item text and returns it ("" for empty slots).
+
+    phases: optional dict that receives perf_counter marks at the end of each
+    phase (move, settle, clear, copy, read) and late=True for re-check hits.
+    expect_item: the slot was occupied last round - with adaptive timing on,
+    an empty re-check gets one more read after the configured
+    EMPTY_RECHECK_WAIT (the shortened waits may have been too short). A slot
+    that is still empty then counts as emptied, not as a miss.
+    verify: read with the adaptive timing's longest waits (configured waits
+    without it) and without reporting to it.
+    """
+    t_func_start = clock.perf_counter()
     debug_mode = config.get("debug", {}).get("DEBUG_MODE", False)
     
     try:
@@ -45,21 +102,35 @@ async def copy_text_at_position(x, y):
         timing_config = config.get("timing", {})
         min_duration = timing_config.get("MINIMUM_DURATION", 0.005)
         min_sleep = timing_config.get("MINIMUM_SLEEP", 0.001)
-        initial_clipboard_wait = timing_config.get("CLIPBOARD_WAIT", 0.03)
-        max_wait_duration = timing_config.get("CLIPBOARD_MAX_WAIT", 0.5)
+        clear_wait = timing_config.get("CLIPBOARD_CLEAR_WAIT", 0.03)
+        reclear_wait = timing_config.get("CLIPBOARD_RECLEAR_WAIT", 0.02)
+        hover_settle = timing_config.get("HOVER_SETTLE", 0.085)
+        copy_key_hold = timing_config.get("COPY_KEY_HOLD", 0.03)
+        post_copy_wait = timing_config.get("POST_COPY_WAIT", 0.045)
+        empty_recheck_wait = configured_recheck_wait = timing_config.get("EMPTY_RECHECK_WAIT", 0.055)
+        success_pad = timing_config.get("SUCCESS_PAD", 0.025)
+        # Adaptives Timing überschreibt die Scan-Wartezeiten mit seinen aktuellen Werten
+        controller = timing_controller if not verify else None
+        if controller or (verify and timing_controller):
+            waits = controller.waits if controller else timing_controller.verify_waits
+            hover_settle = waits["HOVER_SETTLE"]
+            post_copy_wait = waits["POST_COPY_WAIT"]
+            empty_recheck_wait = waits["EMPTY_RECHECK_WAIT"]
+            success_pad = waits["SUCCESS_PAD"]
+        late = False
 
         # --- Optimiert: Clipboard-Vorbereitungs-Task starten, während Maus bewegt wird ---
         # Clipboard-Task definieren
         async def prepare_clipboard():
             try:
-                initial_content = await asyncio.to_thread(pyperclip.paste)
-                await asyncio.to_thread(pyperclip.copy, "")
+                initial_content = await asyncio.to_thread(backend.clipboard.paste)
+                await asyncio.to_thread(backend.clipboard.copy, "")
                 # Schnellerer Check ohne while-Schleife
-                await asyncio.sleep(0.03)  # Erhöht von 0.02s auf 0.03s
-                check = await asyncio.to_thread(pyperclip.paste)
+                await asyncio.sleep(clear_wait)  # CLIPBOARD_CLEAR_WAIT (früher fest 0.03s)
+                check = await asyncio.to_thread(backend.clipboard.paste)
                 if check != "":
-                    await asyncio.to_thread(pyperclip.copy, "")  # Ein zweiter Versuch
-                    await asyncio.sleep(0.02)  # Erhöht von 0.01s auf 0.02s
+                    await asyncio.to_thread(backend.clipboard.copy, "")  # Ein zweiter Versuch
+                    await asyncio.sleep(reclear_wait)  # CLIPBOARD_RECLEAR_WAIT (früher fest 0.02s)
                 return True, initial_content
             except Exception as e:
                 logger.warning(f"Slot ({x},{y}): Clipboard prepare error: {e}")
@@ -69,100 +140,100 @@ async def copy_text_at_position(x, y):
         clipboard_task = asyncio.create_task(prepare_clipboard())
         
         # Maus bewegen (während Clipboard vorbereitet wird)
-        await asyncio.to_thread(pyautogui.moveTo, x, y, duration=min_duration)
+        await asyncio.to_thread(backend.input.move_to, x, y, duration=min_duration)
+        if phases is not None:
+            phases["move"] = clock.perf_counter()
         
         # ANPASSUNG: Nochmals erhöhte Verzögerung nach Mausbewegung
-        await asyncio.sleep(0.085)  # Optimized from 0.09
+        await asyncio.sleep(hover_settle)  # HOVER_SETTLE (früher fest 0.085s)
+        if phases is not None:
+            phases["settle"] = clock.perf_counter()
         
         # Warten auf Clipboard-Vorbereitung
         clear_success, initial_clipboard_content = await clipboard_task
+        if phases is not None:
+            phases["clear"] = clock.perf_counter()
         
         if not clear_success:
             logger.error(f"Slot ({x},{y}): Clipboard clearing failed.")
+            if sorter_metrics:
+                sorter_metrics.clipboard_misses.inc("clear")
+            if controller:
+                controller.miss()
             return ""
 
         # --- Optimized Ctrl+C sequence ---
         await asyncio.to_thread(lambda: (
-            pyautogui.keyDown('ctrl'),
-            time.sleep(0.03),
-            pyautogui.press('c'),
-            time.sleep(0.03),
-            pyautogui.keyUp('ctrl')
+            backend.input.key_down('ctrl'),
+            clock.sleep(copy_key_hold),
+            backend.input.press('c'),
+            clock.sleep(copy_key_hold),
+            backend.input.key_up('ctrl')
         ))
+        t_copy = clock.perf_counter()
+        if phases is not None:
+            phases["copy"] = t_copy
 
         # --- Reduced wait time after clipboard operation ---
-        await asyncio.sleep(0.045)  # Optimized from 0.05
+        await asyncio.sleep(post_copy_wait)  # POST_COPY_WAIT (früher fest 0.045s)
         
         # --- Immediate clipboard check for common case ---
-        start_wait = time.perf_counter()
-        paste_attempts = 0
-        current_wait_interval = initial_clipboard_wait
+        start_wait = clock.perf_counter()
         
         # Sofortiger erster Check
-        current_clipboard = await asyncio.to_thread(pyperclip.paste)
+        current_clipboard = await asyncio.to_thread(backend.clipboard.paste)
         
         # Early detection of empty slots with fast timeout
         if not current_clipboard or current_clipboard == initial_clipboard_content:
-            await asyncio.sleep(0.055)  # Reduced from 0.06
-            current_clipboard = await asyncio.to_thread(pyperclip.paste)
+            await asyncio.sleep(empty_recheck_wait)  # EMPTY_RECHECK_WAIT (früher fest 0.055s)
+            current_clipboard = await asyncio.to_thread(backend.clipboard.paste)
+            late = True
             
+            if (not current_clipboard or current_clipboard == initial_clipboard_content) and expect_item and controller:
+                # Slot war in der letzten Runde belegt: ein weiterer Versuch mit der konfigurierten Wartezeit
+                await asyncio.sleep(configured_recheck_wait)
+                current_clipboard = await asyncio.to_thread(backend.clipboard.paste)
+
             if not current_clipboard or current_clipboard == initial_clipboard_content:
                 if debug_mode:
-                    logger.debug(f"Slot ({x},{y}): Wahrscheinlich leer (schnelles Return nach {time.perf_counter() - t_func_start:.4f}s)")
+                    logger.debug(f"Slot ({x},{y}): Wahrscheinlich leer (schnelles Return nach {clock.perf_counter() - t_func_start:.4f}s)")
                 return ""
-        
-        # Quick success path for non-empty slots
-        if current_clipboard and current_clipboard != initial_clipboard_content:
-            if debug_mode:
-                logger.debug(f"Slot ({x},{y}): Quick success after {time.perf_counter() - start_wait:.4f}s")
-            
-            # Slightly faster processing of item text
-            await asyncio.sleep(0.025)  # Optimized from 0.03
-            return current_clipboard
-            
-        # Fallback path - longer polling for difficult cases
-        while time.perf_counter() - start_wait < max_wait_duration:
-            paste_attempts += 1
-            await asyncio.sleep(current_wait_interval)
-            
-            current_clipboard = await asyncio.to_thread(pyperclip.paste)
-            if current_clipboard and current_clipboard != initial_clipboard_content:
-                break
-                
-            # Gradual backoff with upper limit
-            current_wait_interval = min(current_wait_interval * 1.2, 0.1)
-        
-        # Only log details in debug mode
-        if debug_mode and current_clipboard:
-            first_line = current_clipboard.splitlines()[0] if '\n' in current_clipboard else current_clipboard
-            log_text = (first_line[:50] + '...') if len(first_line) > 50 else first_line
-            logger.debug(f"Slot ({x},{y}): '{log_text}', {paste_attempts+1} attempts, {time.perf_counter() - t_func_start:.4f}s")
-            
-        return current_clipboard or ""
+
+        t_read = clock.perf_counter()
+        if phases is not None:
+            phases["read"] = t_read
+            phases["late"] = late
+        if controller:
+            controller.observe(late, t_read - t_copy)
+        if debug_mode:
+            logger.debug(f"Slot ({x},{y}): Quick success after {clock.perf_counter() - start_wait:.4f}s")
+
+        # Slightly faster processing of item text
+        await asyncio.sleep(success_pad)  # SUCCESS_PAD (früher fest 0.025s)
+        return current_clipboard
 
     except Exception as e:
         logger.error(f"Slot ({x},{y}): Error in copy_text: {e}")
+        if sorter_metrics:
+            sorter_metrics.clipboard_misses.inc("error")
         try:
-            await asyncio.to_thread(pyautogui.keyUp, 'ctrl')
+            await asyncio.to_thread(backend.input.key_up, 'ctrl')
         except Exception:
             pass
         return ""
 
-# --- Item Name Listen ---
-CHANCE_BASE_TYPES = [
-    "stellar amulet", "sapphire ring", "emerald ring",
-    "ornate belt", "gold ring", "gold amulet", "heavy belt",
-    "solar amulet"
-]
-ULTIMATUM_DJINN_NAMES = ["inscribed ultimatum", "djinn barya"]
-# ------------------------
-
 # Default-Konfiguration
 DEFAULT_CONFIG = {
     "timing": {
         "MINIMUM_DURATION": 0.005, "MINIMUM_SLEEP": 0.001, "PAUSE": 0.005,
         "DARWIN_CATCH_UP_TIME": 0, "WINDOW_CHECK_INTERVAL": 0.5,
-        "CLIPBOARD_WAIT": 0.1, "TAB_SWITCH_WAIT": 0.3, "POST_CLICK_WAIT": 0.1
+        "CLIPBOARD_WAIT": 0.1, "TAB_SWITCH_WAIT": 0.3, "POST_CLICK_WAIT": 0.1,
+        # Früher feste Werte in copy_text_at_position / process_items_in_tab (timing_optimizer.py)
+        "CLIPBOARD_MAX_WAIT": 0.5, "CLIPBOARD_CLEAR_WAIT": 0.03, "CLIPBOARD_RECLEAR_WAIT": 0.02,
+        "HOVER_SETTLE": 0.085, "COPY_KEY_HOLD": 0.03, "POST_COPY_WAIT": 0.045,
+        "EMPTY_RECHECK_WAIT": 0.055, "SUCCESS_PAD": 0.025, "CLIPBOARD_BACKOFF": 1.2,
+        "CLIPBOARD_MAX_INTERVAL": 0.1, "CTRL_CLICK_HOLD": 0.02, "TAB_CLICK_SETTLE": 0.05,
+        "POST_TAB_SWITCH_WAIT": 0.12, "POST_MOVE_WAIT": 0.06, "BATCH_PAUSE": 0.12, "MOVE_BATCH_SIZE": 4
     },
     "inventory": {
         "ROWS": 5, "COLUMNS": 12, "FIRST_SLOT_TOP_LEFT_X": 1600,
@@ -180,46 +251,92 @@ DEFAULT_CONFIG = {
         # Add "VENDOR_CHAOS": {"X": 0, "Y": 0} if using chaos recipe feature later
     },
     "game": { "WINDOW_TITLE": "Path of Exile" }, # Adjust title if needed
-    "debug": { "DEBUG_MODE": True, "PROGRESSIVE_SCAN": True },
+    "debug": { "DEBUG_MODE": True, "PROGRESSIVE_SCAN": True, "ROUTING_PROFILER": False, "SCAN_TRACE": False, "SPAN_TRACE": True, "HEATMAP_LATENCY": False },
     "active_profile": "default",
-    "profiles": {} # Profiles stored here
+    "profiles": {}, # Profiles stored here
+    "routing_rules": routing_rules.DEFAULT_ROUTING_RULES, # Evaluated in order, first match wins
+    # Optional: Loot-Filter, dessen Blöcke VOR den routing_rules geprüft werden
+    "item_filter": {"enabled": False, "path": "", "default_tab": None, "hide_action": "skip"},
+    # Optional: Scan-Wartezeiten während der Sitzung an die gemessene Clipboard-Latenz anpassen
+    "adaptive_timing": dict(adaptive_timing.DEFAULT_SETTINGS),
+    # Optional: Prometheus-Endpunkt / Snapshot-Datei für lange Sitzungen
+    "metrics": dict(metrics.DEFAULT_SETTINGS),
+    # Logdatei: Rotation nach Größe/Alter, gzip, Begrenzung der Slot-DEBUG-Zeilen
+    "logging": dict(log_pipeline.DEFAULT_SETTINGS),
+    # Automatische Inventar-Kalibrierung (auto_calibration.py): Mindest-Score, Suchregion [x, y, b, h] oder None
+    "auto_calibration": {"match_threshold": 0.3, "screenshot_region": None},
+    # Stash-Tab-Erkennung (tab_discovery.py): Mindest-Ähnlichkeit der Signaturen, bestätigte Reihenfolge, Suchregion
+    "tab_discovery": {"min_similarity": 0.8, "order": [], "search_region": None},
+    # Profile nach Client-Größe + DPI des Spielfensters automatisch wählen bzw. skalieren (window_geometry.py)
+    "window_geometry": dict(window_geometry.DEFAULT_SETTINGS)
 }
 
 # --- Global Variables ---
 running = False
 status_window = None
 status_label = None
+timing_status_label = None
+progress_label = None                # Strukturierter Fortschritt (Slots/Items/Tab/ETA)
+progress_bar = None
+status_mailbox = status_channel.StatusMailbox() # Einziger Weg vom Worker-Thread zur GUI
 profile_var = None
 # item_texts = [] # Seems unused, commented out
 ALL_COORDINATES = []
+base_timing = {}                     # globaler timing-Block ohne Profil-Timing (wird so gespeichert)
+config_writer = None                # config_store.ConfigWriter (Hintergrund-Thread), erst beim ersten save_config
+coordinate_tables = {}               # (ROWS, COLUMNS, X, Y, SLOT_WIDTH, SLOT_HEIGHT) -> Slot-Mittelpunkte
+current_geometry = None              # window_geometry.Geometry des Spielfensters beim letzten Abgleich
 last_window_check_time = 0
 last_window_check_result = False
 slots_found_empty_or_ignored = set() # Correct global variable for progressive scan
+slots_known_occupied = set()         # Slots, die nach der letzten Runde noch ein Item hatten (Fehlgriff-Erkennung)
 overlay_window = None                # NEW: For grid overlay
 overlay_canvas = None                # NEW: For grid overlay
 overlay_visible = False              # NEW: For grid overlay
+overlay_cells = {}                   # Slot-Index -> (Rechteck-ID, Text-ID), bleiben über Runden bestehen
+overlay_geometry = None              # Gitter-Geometrie, für die overlay_cells gezeichnet wurden
+overlay_slot_states = {}             # Slot-Index -> (Zustand, Tab, Latenz), nur im Tk-Thread geändert
+active_calibrator = None             # calibration.Calibrator der laufenden/letzten Kalibrierung
+calibration_overlay_shown = False    # Overlay wurde für die Kalibrierung eingeblendet
 last_mouse_pos = None                # NEW: Cache for last mouse position
 _item_pattern_cache = {}             # NEW: Cache for item pattern matching
-_item_decision_cache = {}            # NEW: Cache for item decisions
+routing_router = None                # Compiled routing rules (see compile_routing_config)
+routing_profiler = None              # RoutingProfiler while profiling is enabled, else None
+timing_controller = None             # AdaptiveTimingController while adaptive timing is enabled, else None
+scan_recorder = None                 # ScanTraceWriter while scan recording is enabled, else None
+span_tracer = None                   # SpanTracer ring buffer while span tracing is enabled, else None
+sorter_metrics = None                # SorterMetrics while the metrics exporter runs, else None
+metrics_exporter = None              # MetricsExporter background thread, else None
+profile_next_round = False           # Sampling-Profiler für die nächste Runde scharf geschaltet
+profile_round_var = None             # Tk-Checkbox dazu (vom GUI-Takt mit profile_next_round abgeglichen)
+last_round_timing = None             # (scan_s, proc_s) der laufenden/letzten Runde, auch abgebrochen; None = keine Zeiten
 
 # --- Funktionen load_config bis calibrate_stash_tab ---
-def load_config():
-    """Loads configuration from JSON file, merging with defaults."""
-    global config # Allow modification of the global config dict
-    try:
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                loaded_config = json.load(f)
-            config = DEFAULT_CONFIG.copy() # Start fresh with defaults
+def update_dict_recursively(d, u): # Recursive update function
+    for k, v in u.items():
+        if isinstance(v, dict) and k in d and isinstance(d.get(k), dict):
+             d[k] = update_dict_recursively(d.get(k, {}).copy(), v)
+        else:
+            d[k] = v
+    return d
 
-            def update_dict_recursively(d, u): # Recursive update function
-                for k, v in u.items():
-                    if isinstance(v, dict) and k in d and isinstance(d.get(k), dict):
-                         d[k] = update_dict_recursively(d.get(k, {}).copy(), v)
-                    else:
-                        d[k] = v
-                return d
 
+def load_config(loaded_config=None):
+    """Loads configuration from JSON file, merging with defaults.
+
+    loaded_config: optional dict used instead of reading CONFIG_FILE (simulator, benchmarks).
+    """
+    global config, base_timing # Allow modification of the global config dict
+    try:
+        if loaded_config is not None:
+            config = update_dict_recursively(DEFAULT_CONFIG.copy(), loaded_config)
+            logger.info("Konfiguration aus übergebenem Dict geladen und mit Defaults gemischt.")
+        elif os.path.exists(CONFIG_FILE):
+            loaded_config, from_backup = config_store.read_json(CONFIG_FILE)
+            if from_backup:
+                logger.warning(f"{CONFIG_FILE} ist beschädigt, verwende die letzte gültige Sicherung "
+                               f"{config_store.backup_path(CONFIG_FILE)}.")
+            config = DEFAULT_CONFIG.copy() # Start fresh with defaults
             config = update_dict_recursively(config, loaded_config) # Merge loaded into defaults
             logger.info(f"Konfiguration aus {CONFIG_FILE} geladen und mit Defaults gemischt.")
         else:
@@ -236,11 +353,9 @@ def load_config():
         logger.info("Verwende Default-Konfiguration.")
         config = DEFAULT_CONFIG.copy()
 
-    # Apply timing settings to pyautogui AFTER config is loaded/defaulted
-    pyautogui.MINIMUM_DURATION = config.get("timing", {}).get("MINIMUM_DURATION", 0.005)
-    pyautogui.MINIMUM_SLEEP = config.get("timing", {}).get("MINIMUM_SLEEP", 0.001)
-    pyautogui.PAUSE = config.get("timing", {}).get("PAUSE", 0.005)
-    pyautogui.DARWIN_CATCH_UP_TIME = config.get("timing", {}).get("DARWIN_CATCH_UP_TIME", 0)
+    # Apply timing settings to the input backend (pyautogui) AFTER config is loaded/defaulted
+    if backend:
+        backend.input.configure_timing(config.get("timing", {}))
 
     # Ensure essential keys exist after loading potentially incomplete config
     config.setdefault("inventory", DEFAULT_CONFIG["inventory"])
@@ -248,8 +363,17 @@ def load_config():
     config.setdefault("game", DEFAULT_CONFIG["game"])
     config.setdefault("debug", DEFAULT_CONFIG["debug"])
     config.setdefault("timing", DEFAULT_CONFIG["timing"])
+    base_timing = dict(config["timing"]) # Profil-Timing kommt in load_profile jedes Mal frisch dazu
     config.setdefault("profiles", {})
     config.setdefault("active_profile", "default")
+    config.setdefault("routing_rules", DEFAULT_CONFIG["routing_rules"])
+    config.setdefault("item_filter", DEFAULT_CONFIG["item_filter"])
+    config.setdefault("adaptive_timing", DEFAULT_CONFIG["adaptive_timing"])
+    config.setdefault("metrics", DEFAULT_CONFIG["metrics"])
+    config.setdefault("logging", DEFAULT_CONFIG["logging"])
+    config.setdefault("window_geometry", DEFAULT_CONFIG["window_geometry"])
+    if logging_pipeline:
+        logging_pipeline.configure(config.get("logging"))
 
     # Load active profile if specified and exists
     active_profile_name = config.get("active_profile", "default")
@@ -265,22 +389,190 @@ def load_config():
 
 
     precalculate_coordinates() # Recalculate coords after loading config/profile
+    compile_routing_config()
+    set_routing_profiler(config.get("debug", {}).get("ROUTING_PROFILER", False))
+    set_adaptive_timing(config.get("adaptive_timing", {}).get("enabled", False))
+    set_scan_recording(config.get("debug", {}).get("SCAN_TRACE", False))
+    set_span_tracing(config.get("debug", {}).get("SPAN_TRACE", True))
+    set_metrics(config.get("metrics", {}).get("enabled", False))
+
+
+def compile_routing_config():
+    """Compiles config['routing_rules'] (plus loot filter) into the global router, falling back to the default rules."""
+    global routing_router
+    item_classifier.configure(config.get("item_definitions", {}))
+    rules = item_classifier.rules_from_config(config, os.path.dirname(CONFIG_FILE))
+    try:
+        routing_router = routing_rules.compile_routing_rules(rules, config.get("stash_tabs"))
+    except routing_rules.RuleCompileError as e:
+        logger.error(f"Routing-Regeln ungültig: {e}. Verwende Standard-Regeln.")
+        routing_router = routing_rules.compile_routing_rules(DEFAULT_CONFIG["routing_rules"])
+
+    # Große Loot-Filter haben oft hunderte verdeckte Blöcke - nur die ersten melden
+    max_reported = 20
+    for diag in routing_router.diagnostics[:max_reported]:
+        logger.warning(f"Routing-Regel #{diag.index + 1} '{diag.name}' ({diag.kind}): {diag.message}")
+    if len(routing_router.diagnostics) > max_reported:
+        logger.warning(f"... {len(routing_router.diagnostics) - max_reported} weitere Regel-Hinweise unterdrückt.")
+    logger.info(f"{len(routing_router)} Routing-Regel(n) kompiliert.")
+    if routing_profiler:
+        routing_router.attach_profiler(routing_profiler)
+
+
+def set_routing_profiler(enabled):
+    """Enables/disables the routing profiler. Disabled, the router runs uninstrumented."""
+    global routing_profiler
+    if enabled and routing_profiler is None:
+        routing_profiler = rule_profiler.RoutingProfiler()
+        if routing_router:
+            routing_router.attach_profiler(routing_profiler)
+        logger.info("Routing-Profiler aktiviert.")
+    elif not enabled and routing_profiler is not None:
+        routing_profiler = None
+        if routing_router:
+            routing_router.detach_profiler()
+        logger.info("Routing-Profiler deaktiviert.")
+
+
+def set_adaptive_timing(enabled):
+    """Enables (or restarts with the current timing block) / disables the adaptive scan waits."""
+    global timing_controller
+    was_enabled = timing_controller is not None
+    if enabled:
+        timing_controller = adaptive_timing.AdaptiveTimingController(config.get("timing", {}), config.get("adaptive_timing"))
+    else:
+        timing_controller = None
+    if enabled != was_enabled:
+        logger.info(f"Adaptives Timing {'aktiviert' if enabled else 'deaktiviert'}.")
+    update_timing_status(timing_controller.summary() if timing_controller else "Adaptives Timing: aus")
 
 
-def save_config():
-    """Saves the current configuration state to the JSON file."""
-    global config
+def set_scan_recording(enabled):
+    """Enables/disables appending every round to scan_trace.jsonl (see scan_trace.py)."""
+    global scan_recorder
+    if enabled and scan_recorder is None:
+        try:
+            scan_recorder = scan_trace.ScanTraceWriter(TRACE_FILE)
+        except (OSError, ValueError, KeyError) as e:
+            logger.error(f"Scan-Aufzeichnung konnte nicht gestartet werden ({TRACE_FILE}): {e}")
+            return
+        logger.info(f"Scan-Aufzeichnung aktiviert ({TRACE_FILE}).")
+    elif not enabled and scan_recorder is not None:
+        scan_recorder = None
+        logger.info("Scan-Aufzeichnung deaktiviert.")
+
+
+def set_span_tracing(enabled):
+    """Enables/disables the span ring buffer. Disabling drops the buffered spans."""
+    global span_tracer
+    if enabled and span_tracer is None:
+        span_tracer = span_trace.SpanTracer()
+        logger.info("Span-Tracing aktiviert.")
+    elif not enabled and span_tracer is not None:
+        span_tracer = None
+        logger.info("Span-Tracing deaktiviert.")
+
+
+def set_metrics(enabled):
+    """Starts/stops the metrics exporter thread (HTTP endpoint and/or snapshot file from config['metrics'])."""
+    global sorter_metrics, metrics_exporter
+    if enabled and metrics_exporter is None:
+        settings = dict(metrics.DEFAULT_SETTINGS, **config.get("metrics", {}))
+        snapshot_path = settings.get("snapshot_path") or ""
+        if snapshot_path and not os.path.isabs(snapshot_path):
+            snapshot_path = os.path.join(os.path.dirname(CONFIG_FILE), snapshot_path)
+        new_metrics = metrics.SorterMetrics()
+        exporter = metrics.MetricsExporter(new_metrics.registry, settings["host"], settings["port"],
+                                           snapshot_path, settings["snapshot_interval"])
+        try:
+            exporter.start()
+        except OSError as e:
+            logger.error(f"Metrik-Endpunkt konnte nicht gestartet werden ({settings['host']}:{settings['port']}): {e}")
+            return
+        sorter_metrics, metrics_exporter = new_metrics, exporter
+        if settings["port"]:
+            logger.info(f"Metriken aktiviert: http://{settings['host']}:{settings['port']}/metrics")
+        else:
+            logger.info(f"Metriken aktiviert (nur Snapshot: {snapshot_path or '-'}).")
+    elif not enabled and metrics_exporter is not None:
+        exporter = metrics_exporter
+        sorter_metrics = metrics_exporter = None
+        exporter.stop()
+        logger.info("Metriken deaktiviert.")
+
+
+def set_profile_next_round(armed):
+    """Arms/disarms the sampling profiler for the next round (GUI checkbox, hotkey)."""
+    global profile_next_round
+    profile_next_round = bool(armed)
+    logger.info(f"Sampling-Profiler für die nächste Runde {'aktiviert' if armed else 'deaktiviert'}.")
+    update_status(f"Profiler nächste Runde: {'an' if armed else 'aus'}", "black")
+
+
+def write_round_profile(profiler):
+    """Stops the profiler and writes collapsed stacks + speedscope JSON next to the log."""
+    profiler.stop()
+    label = ""
+    if last_round_timing:
+        label = f"Scan {last_round_timing[0]:.2f}s, Verarbeitung {last_round_timing[1]:.2f}s"
     try:
-        # Create a copy to save
-        config_to_save = config.copy()
-        # Ensure profiles key exists
-        config_to_save.setdefault("profiles", {})
-
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump(config_to_save, f, indent=4, sort_keys=True)
-        logger.info(f"Konfiguration erfolgreich in {CONFIG_FILE} gespeichert.")
-    except Exception as e:
-        logger.error(f"Fehler beim Speichern der Konfiguration: {e}", exc_info=True)
+        paths = profiler.write(os.path.dirname(LOG_FILE), label)
+    except OSError as e:
+        logger.error(f"Profil konnte nicht geschrieben werden: {e}")
+        return None
+    logger.info(f"Rundenprofil ({profiler.title(label)}) geschrieben: {paths[0]}, {paths[1]}")
+    return paths
+
+
+def export_span_trace():
+    """Writes the buffered spans as Chrome/Perfetto trace JSON next to the log. Returns the path or None."""
+    tracer = span_tracer
+    if not tracer or not tracer.buffered:
+        logger.info("Keine Spans aufgezeichnet (Span-Tracing aus oder noch keine Runde).")
+        return None
+    path = os.path.join(os.path.dirname(LOG_FILE), f"trace_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    try:
+        count = tracer.export_chrome(path, {"profile": config.get("active_profile", "default"),
+                                            "spans_total": tracer.total})
+    except OSError as e:
+        logger.error(f"Trace-Export fehlgeschlagen ({path}): {e}")
+        return None
+    logger.info(f"{count} Spans exportiert: {path} (chrome://tracing oder ui.perfetto.dev)")
+    return path
+
+
+def log_routing_profile():
+    """Writes the ranked routing profile to the log (end of round / GUI button)."""
+    if not routing_profiler:
+        logger.info("Routing-Profiler ist nicht aktiv.")
+        return False
+    for line in routing_profiler.report_lines():
+        logger.info(line)
+    return True
+
+
+def config_snapshot():
+    """The configuration as written to CONFIG_FILE (called on the writer thread)."""
+    config_to_save = config.copy()
+    config_to_save.setdefault("profiles", {})
+    if base_timing:
+        config_to_save["timing"] = dict(base_timing) # nie das Profil-Timing als globales speichern
+    return config_to_save
+
+
+def save_config():
+    """
+    Marks the configuration dirty. The background writer (config_store.ConfigWriter) writes it
+    after a short debounce, atomically and with a backup of the last good file, so callers in
+    the GUI never wait on disk.
+    """
+    global config_writer
+    if config_writer is None or config_writer.path != CONFIG_FILE:
+        if config_writer is not None:
+            config_writer.stop() # Ausstehendes noch in die bisherige Datei
+        config_writer = config_store.ConfigWriter(CONFIG_FILE, config_snapshot).start()
+        atexit.register(config_writer.stop) # auch ohne main() (Werkzeuge, Simulator) nichts verlieren
+    config_writer.mark_dirty()
 
 
 def save_profile(profile_name):
@@ -302,12 +594,28 @@ def save_profile(profile_name):
         "inventory": current_inventory,
         "stash_tabs": current_stash_tabs
     }
+    # Fenstergeometrie, für die die Koordinaten gelten (Client-Größe + DPI), für die automatische Profilwahl
+    geometry = read_window_geometry() or current_geometry
+    if geometry:
+        config["profiles"][profile_name]["geometry"] = geometry.to_dict()
     config["active_profile"] = profile_name # Set the newly saved profile as active
     save_config() # Save the entire config file with the new profile
     logger.info(f"Profil '{profile_name}' gespeichert und als aktiv gesetzt.")
     return True
 
 
+def apply_profile_timing(profile):
+    """Sets config["timing"] to the global base timing plus the profile's own timing (None = none)."""
+    timing = dict(base_timing or config.get("timing", DEFAULT_CONFIG["timing"]), **((profile or {}).get("timing") or {}))
+    if timing == config.get("timing"):
+        return
+    config["timing"] = timing
+    if backend:
+        backend.input.configure_timing(timing)
+    if timing_controller:
+        set_adaptive_timing(True) # Neue Basiswerte übernehmen
+
+
 def load_profile(profile_name):
     """Loads inventory and stash tab settings from a named profile."""
     global config
@@ -316,6 +624,7 @@ def load_profile(profile_name):
         config["inventory"] = DEFAULT_CONFIG["inventory"].copy()
         config["stash_tabs"] = DEFAULT_CONFIG["stash_tabs"].copy()
         config["active_profile"] = "default"
+        apply_profile_timing(None)
         precalculate_coordinates()
         update_overlay_grid() # !!! Update overlay after loading default profile !!!
         logger.info("Default-Profil ('default') geladen.")
@@ -329,6 +638,8 @@ def load_profile(profile_name):
         merged_tabs = DEFAULT_CONFIG["stash_tabs"].copy()
         merged_tabs.update(profile.get("stash_tabs", {}))
         config["stash_tabs"] = merged_tabs
+        # Optional: Timing pro Profil (z.B. von timing_optimizer.py geschrieben)
+        apply_profile_timing(profile)
 
         config["active_profile"] = profile_name
         precalculate_coordinates()
@@ -359,14 +670,15 @@ def precalculate_coordinates():
                     rows > 0, cols > 0, slot_w > 0, slot_h > 0]):
             raise ValueError("Ungültige oder fehlende Inventar-Konfigurationswerte.")
 
-        half_w = slot_w // 2
-        half_h = slot_h // 2
-
-        for r in range(rows):
-            for c in range(cols):
-                center_x = start_x + (c * slot_w) + half_w
-                center_y = start_y + (r * slot_h) + half_h
-                coordinates.append((center_x, center_y))
+        # Tabelle je Inventar-Geometrie nur einmal berechnen (Wechsel Fenster <-> Vollbild)
+        table_key = (rows, cols, start_x, start_y, slot_w, slot_h)
+        coordinates = coordinate_tables.get(table_key)
+        if coordinates is None:
+            half_w = slot_w // 2
+            half_h = slot_h // 2
+            coordinates = [(start_x + (c * slot_w) + half_w, start_y + (r * slot_h) + half_h)
+                           for r in range(rows) for c in range(cols)]
+            coordinate_tables[table_key] = coordinates
 
         ALL_COORDINATES = coordinates
         logger.debug(f"{len(coordinates)} Slot-Koordinaten berechnet ({rows}x{cols}). Start: ({start_x},{start_y}), Size: ({slot_w}x{slot_h})")
@@ -383,16 +695,15 @@ def precalculate_coordinates():
 def is_game_window_active_sync():
     """Checks if the Path of Exile window is currently the foreground window. (SYNCHRONOUS)"""
     global last_window_check_time, last_window_check_result, config # Need config
-    current_time = time.time()
+    current_time = clock.time()
     check_interval = config.get("timing", {}).get("WINDOW_CHECK_INTERVAL", 0.5)
 
     if current_time - last_window_check_time < check_interval:
         return last_window_check_result
 
     try:
-        active_window_handle = win32gui.GetForegroundWindow()
-        if active_window_handle:
-            active_window_title = win32gui.GetWindowText(active_window_handle)
+        active_window_title = backend.window.foreground_title()
+        if active_window_title:
             target_title = config.get("game", {}).get("WINDOW_TITLE", "Path of Exile")
             result = target_title.lower() in active_window_title.lower()
         else:
@@ -411,17 +722,110 @@ async def is_game_window_active_async():
     return await asyncio.to_thread(is_game_window_active_sync)
 
 
+def read_window_geometry():
+    """Client geometry of the game window (window_geometry.Geometry), or None if unknown or not in front."""
+    if backend is None or not is_game_window_active_sync():
+        return None
+    try:
+        raw = backend.window.foreground_geometry()
+    except Exception as e:
+        logger.debug(f"Fenstergeometrie nicht lesbar: {e}")
+        return None
+    if not raw or raw[2] <= 0 or raw[3] <= 0: # minimiert
+        return None
+    return window_geometry.Geometry(*raw)
+
+
+def check_window_geometry():
+    """
+    Tk thread (1 Hz): follows changes of the game window's client area. Loads the profile tagged
+    with the new client size and DPI, or derives one from the active profile (scaled, stored as
+    '<Profil> <BxH>'), so every geometry keeps its own inventory and tab tables. A window that only
+    moved gets its profile shifted in place. Not during a round or a calibration.
+    """
+    global current_geometry, config
+    settings = config.get("window_geometry", {})
+    if not settings.get("auto_select", True) or running or (active_calibrator and active_calibrator.active):
+        return False
+    geometry = read_window_geometry()
+    if geometry is None or geometry == current_geometry:
+        return False
+    current_geometry = geometry
+    profiles = config.setdefault("profiles", {})
+    active = config.get("active_profile", "default")
+    if window_geometry.profile_geometry(profiles.get(active)) == geometry:
+        return False
+
+    name = window_geometry.select_profile(profiles, geometry, preferred=active)
+    if name is None and settings.get("auto_scale", True):
+        source = window_geometry.scale_source(profiles, active)
+        if source is not None:
+            name = window_geometry.derived_name(source, geometry, profiles)
+            profiles[name] = window_geometry.scale_profile(profiles[source], geometry)
+            profiles[name]["scaled_from"] = source
+            save_config()
+            logger.info(f"Profil '{name}' aus '{source}' für {geometry.label} skaliert.")
+    if name is None:
+        if window_geometry.profile_geometry(profiles.get(active)) is None:
+            logger.info(f"Profil '{active}' hat keine Fenstergeometrie; einmal speichern, "
+                        f"damit es für {geometry.label} automatisch gewählt wird.")
+        else:
+            logger.info(f"Kein Profil für Fenstergeometrie {geometry.label}; Koordinaten bleiben unverändert.")
+            update_status(f"Fenster jetzt {geometry.label}: kein passendes Profil", "orange")
+        return False
+
+    if window_geometry.profile_geometry(profiles[name]) != geometry: # gleiche Größe, Fenster nur verschoben
+        profiles[name] = window_geometry.scale_profile(profiles[name], geometry)
+        save_config()
+        logger.info(f"Profil '{name}' auf die neue Fensterposition ({geometry.left}, {geometry.top}) verschoben.")
+    if not load_profile(name):
+        return False
+    logger.info(f"Fenstergeometrie {geometry.label}: Profil '{name}' aktiv.")
+    update_status(f"Fenster {geometry.label}: Profil '{name}' geladen", "green")
+    return True
+
+
 def update_status(message, color="black"):
-    """Updates the status label in the GUI thread-safely."""
-    if status_label and status_window:
+    """Posts the status line to the mailbox; the GUI picks up the latest one on its next refresh."""
+    status_mailbox.post(message, color)
+
+
+def update_timing_status(text):
+    """Posts the current effective scan waits to the mailbox (shown on the next GUI refresh)."""
+    status_mailbox.timing(text)
+
+
+def drain_status_mailbox():
+    """Tk thread only: applies the latest mailbox contents, then reschedules itself at REFRESH_HZ."""
+    if not status_window:
+        return
+    try:
+        if not status_window.winfo_exists():
+            return
+        update = status_mailbox.take()
+        if update:
+            (message, color), progress, timing_text, changed_slots, calibration_state = update
+            status_label.config(text=message, foreground=color)
+            if changed_slots:
+                paint_overlay_slots(changed_slots)
+            if calibration_state is not None:
+                show_calibration_progress(calibration_state)
+            if timing_text is not None and timing_status_label:
+                timing_status_label.config(text=timing_text)
+            if progress_label:
+                progress_label.config(text=status_channel.format_progress(progress))
+                progress_bar["value"] = status_channel.progress_fraction(progress) * 100
+        if profile_round_var is not None and profile_round_var.get() != profile_next_round:
+            profile_round_var.set(profile_next_round)
+        status_window.after(int(1000 / status_channel.REFRESH_HZ), drain_status_mailbox)
+    except tk.TclError as e:
+        if "invalid command name" not in str(e).lower():
+            logger.warning(f"GUI Status Update Fehler: {e}")
+    except Exception as e:
+        logger.error(f"Unerwarteter GUI Status Update Fehler: {e}", exc_info=True)
         try:
-            if status_window.winfo_exists():
-                status_window.after(0, lambda: status_label.config(text=message, foreground=color))
-        except tk.TclError as e:
-             if "invalid command name" not in str(e).lower():
-                  logger.warning(f"GUI Status Update Fehler: {e}")
-        except Exception as e:
-            logger.error(f"Unerwarteter GUI Status Update Fehler: {e}", exc_info=True)
+            status_window.after(1000, drain_status_mailbox)
+        except Exception: pass
 
 
 async def move_mouse_and_click(x, y, ctrl_click=False):
@@ -433,6 +837,7 @@ async def move_mouse_and_click(x, y, ctrl_click=False):
         timing_config = config.get("timing", {})
         min_duration = timing_config.get("MINIMUM_DURATION", 0.005)
         post_click_wait = timing_config.get("POST_CLICK_WAIT", 0.1)
+        ctrl_click_hold = timing_config.get("CTRL_CLICK_HOLD", 0.02)
         
         # Optimierung: Bewegungszeit basierend auf Distanz anpassen
         move_duration = min_duration
@@ -444,22 +849,22 @@ async def move_mouse_and_click(x, y, ctrl_click=False):
                 move_duration = max(min_duration, 0.01)  # Längere Bewegung
         
         # Maus bewegen und Position cachen
-        await asyncio.to_thread(pyautogui.moveTo, x, y, duration=move_duration)
+        await asyncio.to_thread(backend.input.move_to, x, y, duration=move_duration)
         last_mouse_pos = (x, y)
         
         # Optimierung: Ctrl-Click in einem Thread-Call
         if ctrl_click:
             # Definiere Funktion für Thread, um alle Aktionen zusammen auszuführen
             def do_ctrl_click():
-                pyautogui.keyDown('ctrl')
-                time.sleep(0.02)  # Reduzierte Wartezeit
-                pyautogui.click()
-                time.sleep(0.02)  # Reduzierte Wartezeit
-                pyautogui.keyUp('ctrl')
+                backend.input.key_down('ctrl')
+                clock.sleep(ctrl_click_hold)  # CTRL_CLICK_HOLD
+                backend.input.click()
+                clock.sleep(ctrl_click_hold)
+                backend.input.key_up('ctrl')
                 
             await asyncio.to_thread(do_ctrl_click)
         else:
-            await asyncio.to_thread(pyautogui.click)
+            await asyncio.to_thread(backend.input.click)
         
         # Optimierung: Adaptive Wartezeit nach dem Klick
         # Kürzere Wartezeit für normale Klicks, längere für Ctrl-Klicks
@@ -473,131 +878,188 @@ async def move_mouse_and_click(x, y, ctrl_click=False):
         # Ctrl-Taste bei Fehler loslassen
         if ctrl_click:
             try:
-                await asyncio.to_thread(pyautogui.keyUp, 'ctrl')
+                await asyncio.to_thread(backend.input.key_up, 'ctrl')
             except Exception:
                 pass
         return False
 
-def detect_inventory_region(): # No async needed - user interaction
-    """Guides the user to calibrate inventory slot positions."""
-    global config
-    logger.info("Starte Inventar-Kalibrierung...")
-    update_status("Kalibriere Inventar...", "blue")
-    original_topmost = False
-    if status_window:
-        try:
-             original_topmost = status_window.attributes("-topmost")
-             status_window.attributes("-topmost", False)
-             status_window.withdraw()
-        except tk.TclError:
-             original_topmost = False
+def start_calibration(title, steps):
+    """
+    Starts a non-blocking calibration pass (calibration.Calibrator). Positions are taken with the
+    global hotkeys F2 (übernehmen) / F3 (überspringen) / Esc (abbrechen); progress goes through the
+    status mailbox to the status line and the overlay.
+    """
+    global active_calibrator
+    if running:
+        update_status("Kalibrierung nicht möglich: Scan läuft", "orange")
+        return False
+    if active_calibrator and active_calibrator.active:
+        active_calibrator.cancel()
+    logger.info(f"Starte Kalibrierung: {title} ({len(steps)} Schritt(e)).")
+    active_calibrator = calibration.Calibrator(title, steps, lambda: backend.input.position(),
+                                               on_progress=report_calibration_progress,
+                                               on_finish=apply_calibration).start()
+    return True
 
-    try:
-        print("\n--- Inventar Kalibrierung ---")
-        print("Bitte öffne dein Inventar im Spiel.")
-        input("1. Bewege die Maus in die genaue MITTE des ERSTEN (obersten linken) Slots und drücke Enter...")
-        x1, y1 = pyautogui.position()
-        print(f"   Position 1 (Oben Links): ({x1},{y1})")
-
-        input("2. Bewege die Maus in die genaue MITTE des ZWEITEN Slots (rechts neben dem ersten) und drücke Enter...")
-        x2, y2 = pyautogui.position()
-        print(f"   Position 2 (Rechts daneben): ({x2},{y2})")
-
-        input("3. Bewege die Maus in die genaue MITTE des Slots DIREKT UNTER dem ersten Slot und drücke Enter...")
-        x3, y3 = pyautogui.position()
-        print(f"   Position 3 (Darunter): ({x3},{y3})")
-        print("-----------------------------")
-
-        slot_width = x2 - x1
-        slot_height = y3 - y1
-        first_slot_top_left_x = x1 - (slot_width // 2)
-        first_slot_top_left_y = y1 - (slot_height // 2)
-
-        if slot_width <= 0 or slot_height <= 0:
-            raise ValueError(f"Ungültige Slot-Dimensionen berechnet: Breite={slot_width}, Höhe={slot_height}. Bitte erneut versuchen.")
-
-        config.setdefault("inventory", {})
-        inv_config = config["inventory"]
-        inv_config["FIRST_SLOT_TOP_LEFT_X"] = first_slot_top_left_x
-        inv_config["FIRST_SLOT_TOP_LEFT_Y"] = first_slot_top_left_y
-        inv_config["SLOT_WIDTH"] = slot_width
-        inv_config["SLOT_HEIGHT"] = slot_height
+
+def report_calibration_progress(progress):
+    """Calibrator thread: forwards the state machine's progress to the GUI mailbox."""
+    status_mailbox.calibration(progress)
+    step = f"{progress['title']} {min(progress['index'] + 1, progress['total'])}/{progress['total']}"
+    if progress["state"] == "waiting":
+        keys = "F2 = übernehmen" + (", F3 = überspringen" if progress["optional"] else "") + ", Esc = abbrechen"
+        update_status(f"{step}: {progress['prompt']} ({keys})", "blue")
+    elif progress["state"] == "done":
+        update_status(f"{progress['title']}: Kalibrierung gespeichert.", "green")
+    else:
+        update_status(f"{progress['title']}: {progress['message']}", "red" if progress["state"] == "failed" else "orange")
+    if progress["message"]:
+        logger.info(f"Kalibrierung {step}: {progress['message']}")
+
+
+def apply_calibration(results):
+    """Calibrator thread: writes the captured positions to the config (raises ValueError for a bad grid)."""
+    global config
+    if "slot_first" in results:
+        inv_values = calibration.inventory_from_points(results["slot_first"], results["slot_right"], results["slot_below"])
+        inv_config = config.setdefault("inventory", {})
+        inv_config.update(inv_values)
         inv_config.setdefault("ROWS", 5)
         inv_config.setdefault("COLUMNS", 12)
-
-        save_config()
         precalculate_coordinates()
-        update_overlay_grid() # !!! Update overlay after calibration !!!
-        logger.info(f"Inventar erfolgreich kalibriert: Start({first_slot_top_left_x},{first_slot_top_left_y}), "
-                    f"Breite={slot_width}, Höhe={slot_height}. Koordinaten neu berechnet.")
-        update_status("Inventar kalibriert!", "green")
-        return True
+        logger.info(f"Inventar erfolgreich kalibriert: Start({inv_values['FIRST_SLOT_TOP_LEFT_X']},"
+                    f"{inv_values['FIRST_SLOT_TOP_LEFT_Y']}), Breite={inv_values['SLOT_WIDTH']}, "
+                    f"Höhe={inv_values['SLOT_HEIGHT']}. Koordinaten neu berechnet.")
+    for key, (x, y) in results.items():
+        if key.startswith("tab:"):
+            tab_name = key[4:]
+            config.setdefault("stash_tabs", {})[tab_name] = {"X": x, "Y": y}
+            logger.info(f"Stash-Tab '{tab_name}' erfolgreich kalibriert auf Position ({x}, {y}).")
+    save_config()
+
+
+def detect_inventory_region():
+    """Calibrates the inventory grid from the centres of three slots (non-blocking)."""
+    return start_calibration("Inventar", calibration.inventory_steps())
+
+
+def take_screenshot():
+    """Screenshot through the backend with the grid overlay hidden (Tk thread); raises RuntimeError if none."""
+    overlay_was_visible = overlay_visible
+    if overlay_was_visible:
+        toggle_overlay() # Gitterlinien des Overlays nicht mitfotografieren
+        status_window.update()
+    try:
+        image = backend.screen.screenshot()
+    finally:
+        if overlay_was_visible:
+            toggle_overlay()
+    if image is None:
+        raise RuntimeError("Kein Screenshot verfügbar.")
+    return image
 
-    except ValueError as e:
-         logger.error(f"Inventar-Kalibrierung fehlgeschlagen: {e}")
-         update_status(f"Fehler: {e}", "red")
-         return False
-    except Exception as e:
-        logger.error(f"Unerwarteter Fehler bei Inventar-Kalibrierung: {e}", exc_info=True)
-        update_status("Inventar-Kalibrierung fehlgeschlagen!", "red")
+
+def auto_calibrate_inventory():
+    """
+    Finds the inventory grid in a screenshot (auto_calibration.detect_grid, well under a second)
+    and writes it to the inventory config and the active profile. Runs in the Tk thread.
+    """
+    global config
+    if running:
+        update_status("Kalibrierung nicht möglich: Scan läuft", "orange")
         return False
-    finally:
-        if status_window:
-             try:
-                 if not status_window.winfo_viewable():
-                      status_window.deiconify()
-                 status_window.attributes("-topmost", original_topmost)
-             except tk.TclError:
-                 pass
+    if auto_calibration is None:
+        update_status("Automatische Kalibrierung braucht NumPy (pip install numpy)", "red")
+        return False
+    try:
+        result = auto_calibration.detect_grid(take_screenshot(), config.get("auto_calibration"))
+    except Exception as e: # AutoCalibrationError oder Fehler beim Screenshot
+        logger.error(f"Automatische Kalibrierung fehlgeschlagen: {e}")
+        update_status(f"Auto-Kalibrierung fehlgeschlagen: {e}", "red")
+        return False
+
+    inv_values = auto_calibration.inventory_values(result)
+    config.setdefault("inventory", {}).update(inv_values)
+    profile_name = config.get("active_profile", "default")
+    if profile_name in config.get("profiles", {}):
+        config["profiles"][profile_name].setdefault("inventory", {}).update(inv_values)
+    precalculate_coordinates()
+    update_overlay_grid()
+    save_config()
+    logger.info(f"Inventar automatisch kalibriert (Score {result['score']}, {result['seconds']:.2f}s, "
+                f"Profil '{profile_name}'): {inv_values}")
+    update_status(f"Inventar erkannt: {inv_values['COLUMNS']}x{inv_values['ROWS']} Slots à "
+                  f"{inv_values['SLOT_WIDTH']}x{inv_values['SLOT_HEIGHT']} (Score {result['score']})", "green")
+    return True
+
 
-def calibrate_stash_tab(tab_name): # No async needed - user interaction
-    """Guides the user to calibrate the position of a specific stash tab button."""
+def discover_stash_tabs():
+    """
+    Finds the stash tab buttons in a screenshot of the open stash (tab_discovery.discover) and sets
+    every recognised tab in one pass: config, active profile, signature cache. Runs in the Tk thread.
+    """
     global config
+    if running:
+        update_status("Kalibrierung nicht möglich: Scan läuft", "orange")
+        return False
+    if tab_discovery is None:
+        update_status("Tab-Erkennung braucht NumPy (pip install numpy)", "red")
+        return False
+    stash_tabs = config.setdefault("stash_tabs", {})
+    signatures = tab_discovery.load_signatures(TAB_SIGNATURE_FILE)
+    # Erster Lauf ohne Signaturen: die Buttons unter den (von Hand) kalibrierten Positionen lernen
+    learn_from = None if signatures else {name: (pos.get("X", 0), pos.get("Y", 0)) for name, pos in stash_tabs.items()}
+    try:
+        result = tab_discovery.discover(take_screenshot(), sorted(stash_tabs), signatures,
+                                        config.get("tab_discovery"), learn_from)
+    except Exception as e: # TabDiscoveryError oder Fehler beim Screenshot
+        logger.error(f"Stash-Tab-Erkennung fehlgeschlagen: {e}")
+        update_status(f"Tab-Erkennung fehlgeschlagen: {e}", "red")
+        return False
+
+    found = tab_discovery.coordinates(result)
+    stash_tabs.update(found)
+    profile_name = config.get("active_profile", "default")
+    if profile_name in config.get("profiles", {}):
+        config["profiles"][profile_name].setdefault("stash_tabs", {}).update(found)
+    save_config()
+    try:
+        tab_discovery.save_signatures(TAB_SIGNATURE_FILE, result["signatures"])
+    except OSError as e:
+        logger.warning(f"Tab-Signaturen konnten nicht gespeichert werden: {e}")
+    for name, tab in result["tabs"].items():
+        logger.info(f"Stash-Tab '{name}' erkannt bei ({tab['X']}, {tab['Y']}) über {tab['source']}"
+                    + (f" (Ähnlichkeit {tab['similarity']})" if tab["similarity"] is not None else "") + ".")
+    if result["missing"]:
+        logger.warning(f"Nicht erkannte Stash-Tabs (Position unverändert): {', '.join(result['missing'])}")
+    update_status(f"{len(found)}/{len(stash_tabs)} Stash-Tabs erkannt ({result['buttons']} Buttons, "
+                  f"{result['seconds']:.2f}s)" + (f", fehlt: {', '.join(result['missing'])}" if result["missing"] else ""),
+                  "orange" if result["missing"] else "green")
+    return True
+
+
+def calibrate_stash_tab(tab_name):
+    """Calibrates the position of one stash tab button (non-blocking)."""
     if tab_name not in config.get("stash_tabs", {}):
         logger.error(f"Kann Tab '{tab_name}' nicht kalibrieren: Nicht in Konfiguration gefunden.")
         update_status(f"Fehler: Tab '{tab_name}' unbekannt", "red")
         return False
+    return start_calibration(f"Tab '{tab_name}'", calibration.tab_steps([tab_name]))
 
-    logger.info(f"Starte Kalibrierung für Stash-Tab: {tab_name}...")
-    update_status(f"Kalibriere '{tab_name}' Tab...", "blue")
 
-    original_topmost = False
-    if status_window:
-        try:
-            original_topmost = status_window.attributes("-topmost")
-            status_window.attributes("-topmost", False)
-            status_window.withdraw()
-        except tk.TclError:
-             original_topmost = False
-
-    try:
-        print(f"\n--- Stash Tab Kalibrierung: {tab_name} ---")
-        print("Bitte öffne deine Stash im Spiel und stelle sicher, dass der Tab sichtbar ist.")
-        input(f"1. Bewege die Maus in die genaue MITTE des '{tab_name}' Stash-Tab-Buttons und drücke Enter...")
-        x, y = pyautogui.position()
-        print(f"   Position für '{tab_name}': ({x},{y})")
-        print("------------------------------------")
-
-        config.setdefault("stash_tabs", {})
-        config["stash_tabs"][tab_name] = {"X": x, "Y": y}
-        save_config()
+def calibrate_everything():
+    """Inventory grid and all stash tabs in one pass; tabs can be skipped with F3."""
+    tab_names = sorted(config.get("stash_tabs", {}).keys())
+    return start_calibration("Inventar + Tabs", calibration.inventory_steps() + calibration.tab_steps(tab_names))
 
-        logger.info(f"Stash-Tab '{tab_name}' erfolgreich kalibriert auf Position ({x}, {y}).")
-        update_status(f"Tab '{tab_name}' kalibriert", "green")
-        return True
 
-    except Exception as e:
-        logger.error(f"Unerwarteter Fehler bei der Kalibrierung von Tab '{tab_name}': {e}", exc_info=True)
-        update_status(f"Fehler Kalibrierung '{tab_name}'!", "red")
+def calibration_hotkey(action):
+    """Hotkey thread: passes F2/F3 to the running calibration; returns False if none is active."""
+    calibrator = active_calibrator
+    if not calibrator or not calibrator.active:
         return False
-    finally:
-        if status_window:
-             try:
-                 if not status_window.winfo_viewable():
-                      status_window.deiconify()
-                 status_window.attributes("-topmost", original_topmost)
-             except tk.TclError:
-                 pass
+    getattr(calibrator, action)()
+    return True
 
 # --- NEUE FUNKTIONEN für Grid Overlay --- START ---
 def create_overlay_window():
@@ -634,8 +1096,10 @@ def create_overlay_window():
 
         overlay_canvas = tk.Canvas(overlay_window, bg=transparent_color, highlightthickness=0)
         overlay_canvas.pack(fill=tk.BOTH, expand=True)
+        overlay_cells.clear() # Neues Canvas: Zellen neu anlegen
 
         update_overlay_grid() # Zeichne das Gitter initial
+        repaint_overlay_slots() # Letzten Heatmap-Stand übernehmen
         overlay_window.withdraw() # Starte versteckt
         logger.info("Overlay-Fenster erstellt.")
 
@@ -648,16 +1112,18 @@ def create_overlay_window():
         overlay_canvas = None
 
 def update_overlay_grid():
-    """Zeichnet das Inventargitter auf das Overlay-Canvas basierend auf der Config."""
-    global overlay_canvas, config, ALL_COORDINATES # Use globals
+    """
+    Legt pro Slot ein Rechteck + Textfeld auf dem Overlay-Canvas an (Tag "grid").
+    Die Items bleiben bestehen und werden nur neu angelegt, wenn sich die Gitter-Geometrie ändert;
+    die Heatmap färbt sie danach über paint_overlay_slots einzeln um.
+    """
+    global overlay_canvas, overlay_geometry, config, ALL_COORDINATES # Use globals
 
     if not overlay_canvas or not overlay_window or not overlay_window.winfo_exists():
         # logger.debug("Overlay Canvas nicht bereit zum Zeichnen.")
         return
 
     try:
-        overlay_canvas.delete("grid") # Lösche alte Zeichnungen mit dem Tag "grid"
-
         inv_config = config.get("inventory", {})
         rows = inv_config.get("ROWS")
         cols = inv_config.get("COLUMNS")
@@ -673,6 +1139,14 @@ def update_overlay_grid():
             logger.warning("Ungültige Inventar-Konfig zum Zeichnen des Gitters.")
             return
 
+        geometry = (rows, cols, start_x, start_y, slot_w, slot_h)
+        if overlay_cells and geometry == overlay_geometry:
+            return # Gitter unverändert, Zellen behalten ihre Farben
+        overlay_canvas.delete("grid") # Lösche alte Zeichnungen mit dem Tag "grid"
+        overlay_cells.clear()
+        overlay_slot_states.clear() # Slot-Indizes passen nicht mehr zum neuen Gitter
+        overlay_geometry = geometry
+
         grid_color = "lime" # Leuchtende Farbe für das Gitter
         grid_width = 1       # Linienbreite
 
@@ -682,8 +1156,11 @@ def update_overlay_grid():
                 y1 = start_y + (r * slot_h)
                 x2 = x1 + slot_w
                 y2 = y1 + slot_h
-                # Zeichne Rechteck mit dem Tag "grid"
-                overlay_canvas.create_rectangle(x1, y1, x2, y2, outline=grid_color, width=grid_width, tags="grid")
+                # Rechteck + Beschriftung pro Slot (Index wie in ALL_COORDINATES: zeilenweise)
+                rect = overlay_canvas.create_rectangle(x1, y1, x2, y2, outline=grid_color, width=grid_width, fill="", tags="grid")
+                label = overlay_canvas.create_text((x1 + x2) // 2, (y1 + y2) // 2, text="", fill="white",
+                                                   font=("Segoe UI", 8, "bold"), tags="grid")
+                overlay_cells[r * cols + c] = (rect, label)
 
         # Optional: Zeichne Mittelpunkte (aus ALL_COORDINATES)
         # point_radius = 1
@@ -696,6 +1173,67 @@ def update_overlay_grid():
         logger.error(f"Fehler beim Zeichnen des Overlay-Gitters: {e}", exc_info=True)
 
 
+def paint_overlay_slots(changed):
+    """Tk thread only: merges changed heatmap cells into overlay_slot_states and recolours just those items."""
+    shade = config.get("debug", {}).get("HEATMAP_LATENCY", False)
+    for slot_idx, (state, tab, latency) in changed.items():
+        if latency is None and slot_idx in overlay_slot_states:
+            latency = overlay_slot_states[slot_idx][2] # Latenz vom Lesen behalten (queued/moved)
+        overlay_slot_states[slot_idx] = (state, tab, latency)
+    if not overlay_cells or not overlay_canvas:
+        return # Overlay noch nicht erstellt; repaint_overlay_slots holt das nach
+    try:
+        for slot_idx in changed:
+            cell = overlay_cells.get(slot_idx)
+            if cell:
+                state, tab, latency = overlay_slot_states[slot_idx]
+                overlay_canvas.itemconfigure(cell[0], fill=status_channel.slot_fill(state, latency, shade) or "")
+                overlay_canvas.itemconfigure(cell[1], text=tab[:6] if tab and state in ("queued", "moved", "failed") else "")
+    except tk.TclError as e:
+        logger.debug(f"Overlay-Heatmap nicht aktualisiert: {e}")
+
+
+def show_calibration_progress(progress):
+    """Tk thread only: shows the calibration prompt and the captured points on the overlay."""
+    global overlay_visible, calibration_overlay_shown
+    if not overlay_window or not overlay_window.winfo_exists():
+        create_overlay_window()
+        if not overlay_window:
+            return
+    try:
+        overlay_canvas.delete("calib")
+        if progress["state"] == "waiting":
+            if not overlay_visible:
+                overlay_window.deiconify()
+                overlay_window.lift()
+                overlay_visible = calibration_overlay_shown = True
+            for key, (x, y) in progress["points"]:
+                overlay_canvas.create_line(x - 12, y, x + 13, y, fill="cyan", width=2, tags="calib")
+                overlay_canvas.create_line(x, y - 12, x, y + 13, fill="cyan", width=2, tags="calib")
+                overlay_canvas.create_text(x + 16, y - 14, text=key, fill="cyan", anchor=tk.W,
+                                           font=("Segoe UI", 9, "bold"), tags="calib")
+            screen_w = overlay_window.winfo_screenwidth()
+            overlay_canvas.create_text(screen_w // 2, 40, fill="yellow", font=("Segoe UI", 16, "bold"), tags="calib",
+                                       text=f"{progress['title']} {progress['index'] + 1}/{progress['total']}: "
+                                            f"{progress['prompt']}  [F2 übernehmen"
+                                            f"{' | F3 überspringen' if progress['optional'] else ''} | Esc abbrechen]")
+            return
+        if progress["state"] == "done":
+            update_overlay_grid() # Neue Geometrie -> Zellen neu anlegen
+            repaint_overlay_slots()
+        elif calibration_overlay_shown and overlay_visible:
+            overlay_window.withdraw() # Abgebrochen: Overlay wieder ausblenden, wenn es nur dafür an war
+            overlay_visible = False
+        calibration_overlay_shown = False
+    except tk.TclError as e:
+        logger.debug(f"Kalibrierungs-Overlay nicht aktualisiert: {e}")
+
+
+def repaint_overlay_slots():
+    """Tk thread only: applies the complete known heatmap state (new overlay, shading toggled)."""
+    paint_overlay_slots({slot_idx: entry for slot_idx, entry in overlay_slot_states.items()})
+
+
 def toggle_overlay():
     """Schaltet die Sichtbarkeit des Overlay-Fensters um."""
     global overlay_window, overlay_visible
@@ -733,7 +1271,7 @@ def toggle_overlay():
 # --- GUI Erstellung (create_status_window) ---
 def create_status_window():
     """Creates the Tkinter GUI window for status display and controls."""
-    global status_window, status_label, profile_var, config, slots_found_empty_or_ignored # Need globals
+    global status_window, status_label, timing_status_label, progress_label, progress_bar, profile_var, config, slots_found_empty_or_ignored # Need globals
     try:
         status_window = tk.Tk()
         status_window.title("PoE Inventarmanager (Async)")
@@ -754,6 +1292,10 @@ def create_status_window():
         status_frame.pack(padx=10, pady=(10, 5), fill=tk.X, expand=False)
         status_label = ttk.Label(status_frame, text="Initialisiere...", font=("Segoe UI", 11))
         status_label.pack(padx=10, pady=10, fill=tk.X)
+        progress_label = ttk.Label(status_frame, text="", font=("Segoe UI", 9))
+        progress_label.pack(padx=10, pady=(0, 2), anchor=tk.W)
+        progress_bar = ttk.Progressbar(status_frame, mode="determinate", maximum=100)
+        progress_bar.pack(padx=10, pady=(0, 8), fill=tk.X)
 
         window_status_label = ttk.Label(status_frame, text="Spielfenster: Prüfe...", font=("Segoe UI", 9))
         window_status_label.pack(padx=10, pady=(0, 10), anchor=tk.W)
@@ -832,12 +1374,32 @@ def create_status_window():
 
         calib_inventory_btn = ttk.Button(calib_frame, text="Inventar kalibrieren", command=detect_inventory_region)
         calib_inventory_btn.pack(padx=10, pady=5, fill=tk.X)
+        calib_all_btn = ttk.Button(calib_frame, text="Inventar + alle Tabs kalibrieren (F2/F3/Esc)", command=calibrate_everything)
+        calib_all_btn.pack(padx=10, pady=(0, 5), fill=tk.X)
+        calib_auto_btn = ttk.Button(calib_frame, text="Inventar automatisch erkennen (Screenshot)", command=auto_calibrate_inventory)
+        calib_auto_btn.pack(padx=10, pady=(0, 5), fill=tk.X)
+        calib_tabs_auto_btn = ttk.Button(calib_frame, text="Stash-Tabs automatisch erkennen (Screenshot)", command=discover_stash_tabs)
+        calib_tabs_auto_btn.pack(padx=10, pady=(0, 5), fill=tk.X)
+        if auto_calibration is None:
+            calib_auto_btn.state(["disabled"])
+            calib_tabs_auto_btn.state(["disabled"])
 
         # --- NEUER Button für Overlay ---
         overlay_toggle_btn = ttk.Button(calib_frame, text="Gitter-Overlay Umschalten", command=toggle_overlay)
         overlay_toggle_btn.pack(padx=10, pady=5, fill=tk.X)
         # --- ENDE NEUER Button ---
 
+        heatmap_latency_var = tk.BooleanVar(value=config.get("debug", {}).get("HEATMAP_LATENCY", False))
+        def toggle_heatmap_latency():
+            is_enabled = heatmap_latency_var.get()
+            config.setdefault("debug", {})["HEATMAP_LATENCY"] = is_enabled
+            save_config()
+            repaint_overlay_slots()
+            update_status(f"Overlay-Latenzfarben {'an' if is_enabled else 'aus'}", "black")
+        heatmap_latency_check = ttk.Checkbutton(calib_frame, text="Overlay: Slots nach Lese-Latenz einfärben",
+                                                variable=heatmap_latency_var, command=toggle_heatmap_latency)
+        heatmap_latency_check.pack(padx=10, pady=(0, 5), anchor=tk.W)
+
         # --- Stash Tab Calibration ---
         tab_calib_frame = ttk.Frame(calib_frame)
         tab_calib_frame.pack(fill=tk.X, padx=10, pady=(0, 5))
@@ -898,6 +1460,77 @@ def create_status_window():
         progressive_check = ttk.Checkbutton(settings_frame, text="Progressives Scannen (überspringt leere/ignorierte Slots)", variable=progressive_var, command=toggle_progressive)
         progressive_check.pack(padx=10, pady=5, anchor=tk.W)
 
+        # Routing Profiler Toggle
+        profiler_var = tk.BooleanVar(value=config.get("debug", {}).get("ROUTING_PROFILER", False))
+        def toggle_routing_profiler():
+            is_enabled = profiler_var.get()
+            if "debug" not in config: config["debug"] = {}
+            config["debug"]["ROUTING_PROFILER"] = is_enabled
+            save_config()
+            set_routing_profiler(is_enabled)
+            update_status(f"Routing-Profiler {'an' if is_enabled else 'aus'}", "black")
+
+        profiler_frame = ttk.Frame(settings_frame)
+        profiler_frame.pack(fill=tk.X, padx=10, pady=5)
+        profiler_check = ttk.Checkbutton(profiler_frame, text="Routing-Profiler", variable=profiler_var, command=toggle_routing_profiler)
+        profiler_check.pack(side=tk.LEFT)
+        profiler_dump_btn = ttk.Button(profiler_frame, text="Profil ausgeben",
+                                       command=lambda: update_status("Routing-Profil im Log" if log_routing_profile() else "Profiler aus", "black"))
+        profiler_dump_btn.pack(side=tk.RIGHT)
+
+        # Scan Recording Toggle
+        trace_var = tk.BooleanVar(value=config.get("debug", {}).get("SCAN_TRACE", False))
+        def toggle_scan_trace():
+            is_enabled = trace_var.get()
+            if "debug" not in config: config["debug"] = {}
+            config["debug"]["SCAN_TRACE"] = is_enabled
+            save_config()
+            set_scan_recording(is_enabled)
+            update_status(f"Scan-Aufzeichnung {'an' if is_enabled else 'aus'}", "black")
+
+        trace_check = ttk.Checkbutton(settings_frame, text="Scan-Aufzeichnung (scan_trace.jsonl für Replays)", variable=trace_var, command=toggle_scan_trace)
+        trace_check.pack(padx=10, pady=5, anchor=tk.W)
+
+        # Span Tracing Toggle + Export
+        span_var = tk.BooleanVar(value=config.get("debug", {}).get("SPAN_TRACE", True))
+        def toggle_span_trace():
+            is_enabled = span_var.get()
+            if "debug" not in config: config["debug"] = {}
+            config["debug"]["SPAN_TRACE"] = is_enabled
+            save_config()
+            set_span_tracing(is_enabled)
+            update_status(f"Span-Tracing {'an' if is_enabled else 'aus'}", "black")
+
+        span_frame = ttk.Frame(settings_frame)
+        span_frame.pack(fill=tk.X, padx=10, pady=5)
+        span_check = ttk.Checkbutton(span_frame, text="Span-Tracing", variable=span_var, command=toggle_span_trace)
+        span_check.pack(side=tk.LEFT)
+        span_export_btn = ttk.Button(span_frame, text="Trace exportieren",
+                                     command=lambda: update_status("Trace exportiert (siehe Log)" if export_span_trace() else "Keine Spans", "black"))
+        span_export_btn.pack(side=tk.RIGHT)
+
+        # Sampling Profiler (nur nächste Runde)
+        global profile_round_var
+        profile_round_var = tk.BooleanVar(value=profile_next_round)
+        profile_check = ttk.Checkbutton(settings_frame, text="Nächste Runde profilieren (Strg+Alt+P, Flamegraph neben dem Log)",
+                                        variable=profile_round_var, command=lambda: set_profile_next_round(profile_round_var.get()))
+        profile_check.pack(padx=10, pady=5, anchor=tk.W)
+
+        # Adaptive Timing Toggle
+        adaptive_var = tk.BooleanVar(value=config.get("adaptive_timing", {}).get("enabled", False))
+        def toggle_adaptive_timing():
+            is_enabled = adaptive_var.get()
+            config.setdefault("adaptive_timing", dict(adaptive_timing.DEFAULT_SETTINGS))["enabled"] = is_enabled
+            save_config()
+            set_adaptive_timing(is_enabled)
+            update_status(f"Adaptives Timing {'an' if is_enabled else 'aus'}", "black")
+
+        adaptive_check = ttk.Checkbutton(settings_frame, text="Adaptives Timing (Wartezeiten an Latenz anpassen)", variable=adaptive_var, command=toggle_adaptive_timing)
+        adaptive_check.pack(padx=10, pady=(5, 0), anchor=tk.W)
+        timing_status_label = ttk.Label(settings_frame, text=timing_controller.summary() if timing_controller else "Adaptives Timing: aus",
+                                        font=("Segoe UI", 8), wraplength=360)
+        timing_status_label.pack(padx=10, pady=(0, 5), anchor=tk.W)
+
 
         # --- Info Label ---
         info_label = ttk.Label(status_window, text="Hotkeys: Start = Punkt (.) | Stop = Esc", font=("Segoe UI", 9))
@@ -908,7 +1541,11 @@ def create_status_window():
             if not status_window: return
             try:
                 is_active = is_game_window_active_sync()
+                if is_active and check_window_geometry():
+                    update_profile_dropdown()
                 status_text = "Spiel: Aktiv" if is_active else "Spiel: INAKTIV"
+                if is_active and current_geometry:
+                    status_text += f" ({current_geometry.label})"
                 status_color = "green" if is_active else "red"
 
                 if status_window.winfo_exists() and window_status_label.winfo_exists():
@@ -928,6 +1565,7 @@ def create_status_window():
                     except Exception: pass
 
         status_window.after(100, update_window_status_display)
+        status_window.after(100, drain_status_mailbox)
 
         # --- Window Close Handler ---
         def on_close():
@@ -946,167 +1584,15 @@ def create_status_window():
 # ===== ITEM IDENTIFICATION AND PROCESSING LOGIC                             =====
 # ==============================================================================
 
-def check_item_types(text):
-    """Optimierte Item-Typ-Analyse mit Caching und Early Returns"""
-    if not text: 
-        return {'should_click': False}
-        
-    # Schritt 1: Hash des Textes berechnen für Cache-Lookup
-    # MD5 ist schnell und für Caching ausreichend
-    import hashlib
-    text_hash = hashlib.md5(text.encode()).hexdigest()
-    
-    # Schritt 2: Cache prüfen für schnelle Antwort
-    if text_hash in _item_decision_cache:
-        return _item_decision_cache[text_hash]
-    
-    # Schritt 3: Beschleunigte Analyse
-    lines = text.strip().splitlines()
-    if not lines: 
-        return {'should_click': False}
-
-    # Basistyp-Dictionary erstellen
-    types = {
-        'precursor_tablet': False, 'jewel': False, 'rune': False, 'waystone': False,
-        'tablet': False, 'flask': False, 'unique': False, 'rare': False,
-        'normal': False, 'magic': False, 'quality': False, 'sockets': False,
-        'currency': False, 'is_chance_base': False, 'omen': False,
-        'ultimatum_djinn': False, 'stackable_currency': False,
-        'should_click': False, 'first_line': lines[0].strip()
-    }
-    
-    # Schritt 4: Early-Return-Prüfungen für schnelle Entscheidungsfindung
-    # Ignorierte Basis-Typen sehr schnell prüfen (z.B. Weisheitsspruchrollen)
-    first_line_lower = lines[0].lower().strip()
-    IGNORE_LIST_BASES = config.get("item_definitions", {}).get("IGNORE_LIST_BASES", 
-                         ["Scroll of Wisdom", "Portal Scroll"])
-    
-    if any(ignore_item.lower() in first_line_lower for ignore_item in IGNORE_LIST_BASES):
-        _item_decision_cache[text_hash] = {'should_click': False, 'first_line': lines[0].strip()}
-        return _item_decision_cache[text_hash]
-    
-    # Schritt 5: Textumwandlung für schnellere Verarbeitung
-    text_lower = text.lower()
-    
-    # Schnellere Methode als vollständige Liste - schaue nur nach benötigten Zeilen
-    rarity_line = None
-    class_line = None
-    quality_line = None
-    socket_line = None
-    stack_size_line = None
-    
-    # Ein einziger Durchlauf durch die Zeilen für alle Prüfungen
-    for line in text_lower.splitlines():
-        line = line.strip()
-        if line.startswith("rarity:"):
-            rarity_line = line
-        elif line.startswith("item class:"):
-            class_line = line
-        elif line.startswith("quality:"):
-            quality_line = line
-            types['quality'] = True
-        elif line.startswith("sockets:"):
-            socket_line = line
-            types['sockets'] = True
-        elif "stack size:" in line:
-            stack_size_line = line
-    
-    # Schritt 6: Rarität und Klasse extrahieren
-    rarity = "unknown"
-    if rarity_line:
-        rarity = rarity_line.split(":", 1)[1].strip()
-        if rarity == "unique": types['unique'] = True
-        elif rarity == "rare": types['rare'] = True
-        elif rarity == "magic": types['magic'] = True
-        elif rarity == "normal": types['normal'] = True
-        elif rarity == "currency": types['currency'] = True
-    
-    item_class = "unknown"
-    if class_line:
-        item_class = class_line.split(":", 1)[1].strip()
-        if "jewel" in item_class: types['jewel'] = True
-        if "flask" in item_class: types['flask'] = True
-    
-    # Rest der Analyselogik (ersetzt alte Methode)
-    item_name_line = lines[2].lower().strip() if len(lines) > 2 else ""
-    
-    # Spezielle Item-Typen erkennen
-    types['is_chance_base'] = any(base.lower() in text_lower for base in CHANCE_BASE_TYPES)
-    types['ultimatum_djinn'] = any(name.lower() in text_lower for name in ULTIMATUM_DJINN_NAMES)
-    types['precursor_tablet'] = "precursor tablet" in text_lower
-    types['omen'] = "omen" in first_line_lower or "omen" in item_class
-    types['waystone'] = "waystone" in first_line_lower
-    types['tablet'] = "tablet" in item_class and not types['precursor_tablet']
-    types['rune'] = (rarity == "currency" and "rune" in item_name_line)
-    
-    # Stapelbare Währungsitems erkennen
-    is_stackable = (stack_size_line is not None) or \
-                   ("catalyst" in first_line_lower) or \
-                   ("essence" in first_line_lower) or \
-                   ("oil" in first_line_lower)
-    if is_stackable and rarity == "currency" and not types['rune']:
-        types['stackable_currency'] = True
-    
-    # Allgemeine Währungsprüfung
-    is_generic_currency_indicator = (rarity == "currency" or "currency" in item_class or stack_size_line is not None)
-    types['currency'] = (
-        is_generic_currency_indicator and
-        not types['rune'] and
-        not types['stackable_currency'] and
-        not types['ultimatum_djinn']
-    )
-    
-    # Schritt 7: Sollten wir klicken? Optimierte Logik
-    types['should_click'] = any([
-        types['precursor_tablet'], types['jewel'], types['rune'], types['waystone'],
-        types['tablet'], types['flask'], types['unique'], types['rare'],
-        types['quality'], types['sockets'], types['currency'],
-        types['is_chance_base'] and types['normal'],
-        types['omen'], types['ultimatum_djinn'], types['stackable_currency']
-    ])
-    
-    # Schritt 8: Cache-Ergebnis für zukünftige Aufrufe
-    _item_decision_cache[text_hash] = types.copy()
-    
-    # Wenn der Cache zu groß wird, älteste Einträge entfernen
-    if len(_item_decision_cache) > 1000:  # Begrenzung der Cache-Größe
-        # Einfachste Methode: Cache leeren
-        _item_decision_cache.clear()
-    
-    return types
-
-
 def determine_target_destination(item_types):
-    """Determines the target tab name (string) or 'AFFINITY' based on item types."""
-    # This function will be replaced/modified heavily by Feature 18.2 (JSON Rules)
-    # For now, it remains as it was.
-    handled_by_specific_tab_or_affinity = {
-        'precursor_tablet', 'omen', 'jewel', 'rune', 'ultimatum_djinn',
-        'stackable_currency', 'currency'
-    }
-    chance_exclusions = handled_by_specific_tab_or_affinity.union({'flask', 'waystone', 'tablet'})
-    rare_exclusions = handled_by_specific_tab_or_affinity
-    qual_sock_exclusions = handled_by_specific_tab_or_affinity.union({'rare', 'unique'})
-
-    if item_types.get('precursor_tablet') or item_types.get('omen'): return "PRECURSOR_TABLET"
-    if item_types.get('jewel'): return "JEWEL"
-    if item_types.get('rune'): return "RUNE"
-    if item_types.get('ultimatum_djinn'): return "ULTIMATUM_DJINN"
-    if item_types.get('stackable_currency'): return "CURRENCY_CATALYST"
-    if item_types.get('currency'): return "AFFINITY"
-
-    if item_types.get('normal') and item_types.get('is_chance_base'):
-        if not any(item_types.get(k) for k in chance_exclusions):
-            return "CHANCE_ITEMS"
-
-    if item_types.get('rare') or item_types.get('unique'):
-        if not any(item_types.get(k) for k in rare_exclusions):
-            return "RARE"
-
-    if item_types.get('quality') or item_types.get('sockets'):
-         if not any(item_types.get(k) for k in qual_sock_exclusions):
-             if not any(item_types.get(k) for k in {'flask', 'waystone', 'tablet'}):
-                    return "QUALITY_SOCKET"
+    """Determines the target tab name (string) or 'AFFINITY' using the compiled routing rules."""
+    # Feature 18.2: Regeln kommen aus config["routing_rules"] (siehe routing_rules.py)
+    if routing_router is None:
+        compile_routing_config()
+
+    target = routing_router.route(item_types)
+    if target:
+        return target
 
     if config.get("debug", {}).get("DEBUG_MODE", False):
          if item_types.get('should_click'):
@@ -1145,9 +1631,9 @@ async def select_stash_tab(tab_type, tab_switch_data):
 
         def click_tab_sync():
              min_dur = config.get("timing", {}).get("MINIMUM_DURATION", 0.005)
-             pyautogui.moveTo(tx, ty, duration=min_dur)
-             time.sleep(0.05)  # Increased from 0.03s to 0.05s
-             pyautogui.click()
+             backend.input.move_to(tx, ty, duration=min_dur)
+             clock.sleep(config.get("timing", {}).get("TAB_CLICK_SETTLE", 0.05))
+             backend.input.click()
 
         await asyncio.to_thread(click_tab_sync)
         await asyncio.sleep(config.get("timing", {}).get("TAB_SWITCH_WAIT", 0.4))  # Increased from 0.3s to 0.4s
@@ -1171,6 +1657,8 @@ async def process_item_queue_batched(item_queue, tab_switch_data):
     global running, config
     processed_slots_in_batch = set()
     debug_mode = config.get("debug", {}).get("DEBUG_MODE", False)
+    recorder = scan_recorder
+    tracer = span_tracer
     
     # Helper function for active state checking..
     async def is_active():
@@ -1185,20 +1673,42 @@ async def process_item_queue_batched(item_queue, tab_switch_data):
     # Status update with total count
     total_items = sum(len(items) for items in grouped_items.values())
     update_status(f"Verarbeite {total_items} Items...", "blue")
+    status_mailbox.start_phase("process", total_items, queued=total_items)
+    moves_attempted = 0
     
+    timing_config = config.get("timing", {})
+    post_tab_switch_wait = timing_config.get("POST_TAB_SWITCH_WAIT", 0.12)
+    post_move_wait = timing_config.get("POST_MOVE_WAIT", 0.06)
+    batch_pause = timing_config.get("BATCH_PAUSE", 0.12)
+    move_batch_size = max(1, int(timing_config.get("MOVE_BATCH_SIZE", 4)))
+
     # Batch processing function with configurable batch size
-    async def process_items_in_tab(tab_name, items_list, batch_size=4):
+    async def process_items_in_tab(tab_name, items_list, batch_size=move_batch_size):
         """Processes items in batches with configurable parallelism"""
+        nonlocal moves_attempted
         if not await is_active():
             return 0
+        status_mailbox.progress(tab=tab_name)
             
         # Switch to tab before all operations
-        if tab_name != "AFFINITY" and not await select_stash_tab(tab_name, tab_switch_data):
-            logger.error(f"Tab-Wechsel zu '{tab_name}' fehlgeschlagen. Überspringe {len(items_list)} Items.")
-            return 0
+        if tab_name != "AFFINITY":
+            t_switch = clock.perf_counter()
+            switched = await select_stash_tab(tab_name, tab_switch_data)
+            t_switched = clock.perf_counter()
+            if tracer:
+                tracer.add("tab_switch", t_switch, t_switched, tab_name)
+            if recorder:
+                recorder.tab_switch(tab_name, switched, t_switched - t_switch)
+            if sorter_metrics:
+                sorter_metrics.tab_switches.inc("ok" if switched else "failed")
+            if not switched:
+                logger.error(f"Tab-Wechsel zu '{tab_name}' fehlgeschlagen. Überspringe {len(items_list)} Items.")
+                for item in items_list:
+                    status_mailbox.slot(item["index"], "failed", tab_name)
+                return 0
             
         # Add a small delay after tab switch for stability
-        await asyncio.sleep(0.12)
+        await asyncio.sleep(post_tab_switch_wait)
         
         # Get the total number of slots from inventory configuration
         inv_config = config.get("inventory", {})
@@ -1215,7 +1725,16 @@ async def process_item_queue_batched(item_queue, tab_switch_data):
             # Process items in batch
             for item in batch:
                 try:
+                    t_move = clock.perf_counter()
                     success = await move_mouse_and_click(item["x"], item["y"], ctrl_click=True)
+                    t_moved = clock.perf_counter()
+                    if tracer:
+                        tracer.add("ctrl_click", t_move, t_moved, item["index"] + 1)
+                    if recorder:
+                        recorder.move(item["index"], tab_name, success, t_moved - t_move)
+                    moves_attempted += 1
+                    status_mailbox.progress(done=moves_attempted, queued=total_items - moves_attempted)
+                    status_mailbox.slot(item["index"], "moved" if success else "failed", tab_name)
                     if success:
                         processed_slots_in_batch.add(item["index"])
                         processed += 1
@@ -1224,15 +1743,20 @@ async def process_item_queue_batched(item_queue, tab_switch_data):
                             logger.debug(f"Slot {item['index']+1}: Successfully ctrl+clicked in tab {tab_name}")
                     else:
                         logger.error(f"Fehler beim Klick für Item Slot {item['index']+1}")
+                        if sorter_metrics:
+                            sorter_metrics.click_failures.inc()
                     
                     # Optimized delay after each click
-                    await asyncio.sleep(0.06)
+                    await asyncio.sleep(post_move_wait)
                 
                 except Exception as e:
                     logger.error(f"Exception beim Klick für Slot {item['index']+1}: {e}")
+                    status_mailbox.slot(item["index"], "failed", tab_name)
+                    if sorter_metrics:
+                        sorter_metrics.click_failures.inc()
             
             # Short pause between batches
-            await asyncio.sleep(0.12)
+            await asyncio.sleep(batch_pause)
             
         return processed
     
@@ -1275,13 +1799,100 @@ async def process_item_queue_batched(item_queue, tab_switch_data):
     return processed_slots_in_batch
 
 
+def plan_round_moves(scanned_slots, classify_item=check_item_types, debug_mode=False):
+    """
+    Classifies all slots read in one round in a single batch.
+    scanned_slots: list of (slot_idx, x, y, item_text).
+    Returns (item_queue, skip_slots): the move queue [(slot_idx, x, y, destination)]
+    and the empty/ignored slots for the next progressive scan.
+    """
+    if routing_router is None:
+        compile_routing_config()
+    batch = item_classifier.classify_many([text for _, _, _, text in scanned_slots], routing_router, classify_item)
+
+    item_queue = []
+    skip_slots = set()
+    for (slot_idx, x, y, _), code, item_types in zip(scanned_slots, batch.codes, batch.types):
+        if code >= 0:
+            target_destination = batch.tabs[code]
+            if debug_mode:
+                first_line = item_types.get('first_line', 'N/A')
+                log_text = (first_line[:40] + '...') if len(first_line) > 40 else first_line
+                logger.debug(f"Slot {slot_idx+1}: Item '{log_text}' -> Queue (Ziel: {target_destination})")
+            item_queue.append((slot_idx, x, y, target_destination))
+            continue
+
+        if debug_mode:
+            if code == item_classifier.SLOT_NO_TARGET:
+                logger.debug(f"Slot {slot_idx+1}: Item ZUM KLICKEN, aber KEIN ZIEL. Wird als 'ignoriert' markiert.")
+            elif code == item_classifier.SLOT_IGNORED:
+                logger.debug(f"Slot {slot_idx+1}: Item ignoriert (should_click=False). Wird markiert.")
+            else:
+                logger.debug(f"Slot {slot_idx+1}: Leer. Wird markiert.")
+        skip_slots.add(slot_idx)
+
+    return item_queue, skip_slots
+
+
+def remember_occupied_slots(scanned_slots, moved_slots=()):
+    """Updates slots_known_occupied after a round: slots read with text and not moved, plus known slots not scanned."""
+    global slots_known_occupied
+    scanned = {slot_idx for slot_idx, _, _, _ in scanned_slots}
+    still_occupied = {slot_idx for slot_idx, _, _, text in scanned_slots if text} - set(moved_slots)
+    slots_known_occupied = still_occupied | (slots_known_occupied - scanned)
+
+
+async def verify_empty_slots(scanned_slots, coords):
+    """
+    Reads a few of the round's empty slots again with long waits.
+    An item found there was copied before its tooltip was up: the adaptive
+    timing backs off and the item takes the empty entry's place in scanned_slots.
+    A text that was already read this round is not a miss - the scan saw an
+    unchanged clipboard (another cell of a large item, or an identical stack).
+    Returns the number of recovered items.
+    """
+    empty_entries = {slot_idx: n for n, (slot_idx, _, _, text) in enumerate(scanned_slots) if not text}
+    read_texts = {text for _, _, _, text in scanned_slots if text}
+    recovered = 0
+    for slot_idx in timing_controller.verification_sample(empty_entries):
+        if not running:
+            break
+        x, y = coords[slot_idx]
+        item_text = await copy_text_at_position(x, y, verify=True)
+        if not item_text or item_text in read_texts:
+            continue
+        logger.warning(f"Slot {slot_idx+1}: Beim Nachprüfen doch ein Item gefunden - Scan-Wartezeiten werden erhöht.")
+        timing_controller.miss()
+        if sorter_metrics:
+            sorter_metrics.clipboard_misses.inc("timeout")
+        scanned_slots[empty_entries[slot_idx]] = (slot_idx, x, y, item_text)
+        status_mailbox.slot(slot_idx, "read")
+        recovered += 1
+    return recovered
+
+
+def trace_slot_phases(tracer, slot_idx, start, end, phases):
+    """Adds the slot span and its phase spans (from copy_text_at_position's marks) to the tracer."""
+    tracer.add("slot", start, end, slot_idx + 1)
+    previous = start
+    for phase, span_name in (("move", "move"), ("settle", "settle"), ("clear", "clear"), ("copy", "copy")):
+        mark = phases.get(phase)
+        if mark is None:
+            return
+        if mark > previous:  # Phasen ohne Dauer (z.B. Clipboard schon während der Bewegung geleert) weglassen
+            tracer.add(span_name, previous, mark)
+        previous = mark
+    tracer.add("paste_wait", previous, phases.get("read", end))
+
+
 # --- !!! THIS FUNCTION IMPLEMENTS THE IMPROVED PROGRESSIVE SCAN !!! ---
 async def copy_and_process_inventory_items_async():
     """
     Scans inventory using improved progressive scan, identifies items,
     processes them, and updates the set of empty/ignored slots for the next run.
     """
-    global running, slots_found_empty_or_ignored, config, ALL_COORDINATES # Need globals
+    global running, slots_found_empty_or_ignored, config, ALL_COORDINATES, last_round_timing # Need globals
+    last_round_timing = None  # Profil-Label dieser Runde, nicht das der vorigen
     if not await is_game_window_active_async():
         logger.warning("Aktion abgebrochen: Path of Exile Fenster ist nicht aktiv.")
         update_status("Spiel nicht aktiv", "red")
@@ -1299,14 +1910,13 @@ async def copy_and_process_inventory_items_async():
         return
 
     num_slots = len(coords)
-    item_queue = []
-    scan_start_time = time.time()
+    scan_start_time = clock.time()
+    t_round = clock.perf_counter()
+    tracer = span_tracer
+    round_metrics = sorter_metrics
     debug_mode = config.get("debug", {}).get("DEBUG_MODE", False)
     progressive_scan = config.get("debug", {}).get("PROGRESSIVE_SCAN", True)
 
-    # Set to build the list of slots to skip for the *next* run
-    next_run_skips = set()
-
     # --- Determine Slots to Scan ---
     if progressive_scan:
         slots_to_scan_indices = [i for i in range(num_slots) if i not in slots_found_empty_or_ignored]
@@ -1321,69 +1931,111 @@ async def copy_and_process_inventory_items_async():
         logger.info(f"Scanne alle {num_slots} Slots (Progressives Scannen deaktiviert).")
         slots_found_empty_or_ignored = set()
 
+    scan_set = set(slots_to_scan_indices)
+    status_mailbox.slots({i: ("pending" if i in scan_set else "skipped") for i in range(num_slots)})
+
+    if timing_controller:
+        timing_controller.reset_round()
+    recorder = scan_recorder
+    if recorder:
+        recorder.begin_round(scan_start_time, config, slots_to_scan_indices)
+
+    # Profiler nur einbinden, wenn aktiv - sonst direkter Aufruf ohne Overhead
+    classify_item = routing_profiler.wrap_classifier(check_item_types) if routing_profiler else check_item_types
+
     # --- Scan Phase ---
-    items_found_for_queue = 0
+    # Texte werden nur gesammelt und nach dem Scan gemeinsam klassifiziert (classify_many)
+    scanned_slots = []
+    items_found = 0
+    status_mailbox.start_phase("scan", len(slots_to_scan_indices))
     for i, slot_idx in enumerate(slots_to_scan_indices):
         if not running or not await is_game_window_active_async():
             logger.warning("Scan abgebrochen (durch Benutzer oder Fenster-Inaktivität).")
             update_status("Scan abgebrochen", "orange")
+            _, next_run_skips = plan_round_moves(scanned_slots, classify_item, debug_mode)
             slots_found_empty_or_ignored = next_run_skips # Update skip list before aborting
+            remember_occupied_slots(scanned_slots)
+            last_round_timing = (clock.time() - scan_start_time, 0.0)
+            if recorder:
+                recorder.end_round(last_round_timing[0], 0.0, 0, aborted=True)
+            if tracer:
+                tracer.add("round", t_round, clock.perf_counter())
             return
 
         x, y = coords[slot_idx]
-
-        if i % 5 == 0:
-             progress_percent = (i + 1) / len(slots_to_scan_indices) * 100
-             update_status(f"Scanne Slot {slot_idx + 1}/{num_slots} ({progress_percent:.0f}%)", "blue")
-
-        item_text = await copy_text_at_position(x, y)
-
-        is_empty_or_ignored = False
-        if item_text:
-            item_types = check_item_types(item_text) # Still using old check logic for now
-            if item_types.get('should_click', False):
-                target_destination = determine_target_destination(item_types) # Still using old logic
-                if target_destination:
-                    if debug_mode:
-                         first_line = item_types.get('first_line', 'N/A')
-                         log_text = (first_line[:40] + '...') if len(first_line) > 40 else first_line
-                         logger.debug(f"Slot {slot_idx+1}: Item '{log_text}' -> Queue (Ziel: {target_destination})")
-                    item_queue.append((slot_idx, x, y, target_destination))
-                    items_found_for_queue += 1
-                    is_empty_or_ignored = False # Has processable item
-                else:
-                    if debug_mode: logger.debug(f"Slot {slot_idx+1}: Item ZUM KLICKEN, aber KEIN ZIEL. Wird als 'ignoriert' markiert.")
-                    is_empty_or_ignored = True
-            else:
-                if debug_mode: logger.debug(f"Slot {slot_idx+1}: Item ignoriert (should_click=False). Wird markiert.")
-                is_empty_or_ignored = True
+        expect_item = timing_controller is not None and slot_idx in slots_known_occupied
+
+        if recorder or tracer or round_metrics:
+            phases = {}
+            t_slot = clock.perf_counter()
+            item_text = await copy_text_at_position(x, y, phases, expect_item)
+            t_slot_end = clock.perf_counter()
+            if tracer:
+                trace_slot_phases(tracer, slot_idx, t_slot, t_slot_end, phases)
+            if recorder:
+                recorder.slot(slot_idx, x, y, item_text, t_slot, t_slot_end, phases)
+            if round_metrics:
+                round_metrics.slots_scanned.inc()
+                round_metrics.slot_latency.observe(t_slot_end - t_slot)
+                if not item_text:
+                    round_metrics.slots_empty.inc()
+                elif phases.get("late"):
+                    round_metrics.clipboard_rechecks.inc()
         else:
-            if debug_mode: logger.debug(f"Slot {slot_idx+1}: Leer. Wird markiert.")
-            is_empty_or_ignored = True
-
-        if is_empty_or_ignored:
-            next_run_skips.add(slot_idx)
-
-    scan_duration = time.time() - scan_start_time
-    logger.info(f"Async Scan Phase beendet ({scan_duration:.2f}s). {items_found_for_queue} Item(s) zur Verarbeitung vorgemerkt.")
+            t_slot = clock.perf_counter()
+            item_text = await copy_text_at_position(x, y, expect_item=expect_item)
+            t_slot_end = clock.perf_counter()
+        scanned_slots.append((slot_idx, x, y, item_text))
+        if item_text:
+            items_found += 1
+        status_mailbox.slot(slot_idx, "read" if item_text else "empty", latency=t_slot_end - t_slot)
+        status_mailbox.progress(done=i + 1, queued=items_found)
+
+    if timing_controller:
+        items_found += await verify_empty_slots(scanned_slots, coords)
+
+    t_classify = clock.perf_counter()
+    item_queue, next_run_skips = plan_round_moves(scanned_slots, classify_item, debug_mode)
+    scan_duration = clock.time() - scan_start_time
+    if tracer:
+        tracer.add("scan", t_round, t_classify, len(scanned_slots))
+        tracer.add("classify", t_classify, clock.perf_counter())
+    if recorder:
+        recorder.plan(item_queue)
+    if round_metrics:
+        for _slot_idx, _x, _y, destination in item_queue:
+            round_metrics.items_routed.inc(destination)
+    for queued_slot, _x, _y, destination in item_queue:
+        status_mailbox.slot(queued_slot, "queued", destination)
+    logger.info(f"Async Scan Phase beendet ({scan_duration:.2f}s). {len(item_queue)} Item(s) zur Verarbeitung vorgemerkt.")
 
     # --- Processing Phase ---
     if not running:
          logger.info("Verarbeitung übersprungen, da Stop-Signal während des Scans empfangen wurde.")
          update_status("Scan abgebrochen", "orange")
          slots_found_empty_or_ignored = next_run_skips
+         remember_occupied_slots(scanned_slots)
+         last_round_timing = (scan_duration, 0.0)
+         if recorder:
+             recorder.end_round(scan_duration, 0.0, 0, aborted=True)
+         if tracer:
+             tracer.add("round", t_round, clock.perf_counter())
          return
 
     processed_slots_successfully = set()
+    proc_duration = 0.0
     if item_queue:
         logger.info(f"Starte Async Verarbeitung von {len(item_queue)} Item(s)...")
         update_status(f"Verarbeite {len(item_queue)} Item(s)...", "blue")
-        proc_start_time = time.time()
+        proc_start_time = clock.time()
+        t_process = clock.perf_counter()
         tab_switch_data = {"selected_tab": None}
 
         processed_slots_successfully = await process_item_queue_batched(item_queue, tab_switch_data)
 
-        proc_duration = time.time() - proc_start_time
+        proc_duration = clock.time() - proc_start_time
+        if tracer:
+            tracer.add("process", t_process, clock.perf_counter(), len(item_queue))
         logger.info(f"Async Verarbeitungsphase beendet ({proc_duration:.2f}s).")
         num_processed = len(processed_slots_successfully)
 
@@ -1398,9 +2050,26 @@ async def copy_and_process_inventory_items_async():
 
     # --- Final Step: Update Global Skip List ---
     slots_found_empty_or_ignored = next_run_skips
+    remember_occupied_slots(scanned_slots, processed_slots_successfully)
     if debug_mode:
         logger.debug(f"Nächster progressiver Scan wird {len(slots_found_empty_or_ignored)} Slots überspringen.")
 
+    if routing_profiler:
+        routing_profiler.end_round()
+        log_routing_profile()
+    if timing_controller:
+        timing_summary = timing_controller.summary()
+        logger.info(timing_summary)
+        update_timing_status(timing_summary)
+    if recorder:
+        recorder.end_round(scan_duration, proc_duration, len(processed_slots_successfully), aborted=not running)
+    if tracer:
+        tracer.add("round", t_round, clock.perf_counter())
+    last_round_timing = (scan_duration, proc_duration)
+    if round_metrics:
+        round_metrics.rounds.inc()
+        round_metrics.round_duration.observe(clock.perf_counter() - t_round)
+
     logger.info("=== Async Scan & Sortier Runde beendet ===")
     if running:
          update_status("Bereit für nächsten Scan.", "black")
@@ -1410,8 +2079,10 @@ async def copy_and_process_inventory_items_async():
 
 # --- Global Control Functions ---
 def stop_script():
-    """Signals the running process to stop."""
+    """Signals the running process to stop (or cancels a running calibration)."""
     global running
+    if calibration_hotkey("cancel"):
+        return
     if running:
         running = False
         logger.info("STOP-Signal gesendet. Aktueller Async-Vorgang wird beendet...")
@@ -1423,6 +2094,9 @@ def stop_script():
 def start_script():
     """Starts the inventory processing in a separate thread, running the async function."""
     global running, slots_found_empty_or_ignored, config, ALL_COORDINATES
+    if active_calibrator and active_calibrator.active:
+        update_status("Erst Kalibrierung abschließen (F2) oder abbrechen (Esc)", "orange")
+        return
     if not running:
         # Pre-checks
         if not ALL_COORDINATES:
@@ -1437,6 +2111,12 @@ def start_script():
              logger.warning("Start nicht möglich: Path of Exile Fenster nicht aktiv.")
              update_status("Spiel nicht aktiv!", "red")
              return
+        geometry = read_window_geometry()
+        if current_geometry and geometry and geometry != current_geometry:
+            # Umschalten übernimmt der GUI-Takt (Tk-Thread), bis dahin gelten die Koordinaten nicht
+            logger.warning(f"Start verschoben: Fenstergeometrie geändert ({current_geometry.label} -> {geometry.label}).")
+            update_status("Fenstergröße geändert - Profil wird gewechselt, bitte erneut starten", "orange")
+            return
 
         # Start
         running = True
@@ -1444,6 +2124,12 @@ def start_script():
         update_status("Starte Scan (Async)...", "blue")
 
         def thread_target():
+            profiler = None
+            if profile_next_round:
+                set_profile_next_round(False) # Nur für diese eine Runde
+                interval = config.get("debug", {}).get("PROFILER_INTERVAL", sampling_profiler.DEFAULT_INTERVAL)
+                profiler = sampling_profiler.SamplingProfiler(interval).start()
+                logger.info("Sampling-Profiler läuft für diese Runde.")
             try:
                 asyncio.run(copy_and_process_inventory_items_async())
             except Exception as e:
@@ -1455,8 +2141,12 @@ def start_script():
                      logger.error(f"Konnte Thread-Fehler nicht im GUI anzeigen: {gui_err}")
                 global running # Need global to set running=False on error
                 running = False
+            finally:
+                status_mailbox.clear_progress()
+                if profiler:
+                    write_round_profile(profiler)
 
-        thread = threading.Thread(target=thread_target, daemon=True)
+        thread = threading.Thread(target=thread_target, name="sortier-runde", daemon=True)
         thread.start()
     else:
         logger.warning("Start gedrückt, aber ein Scan läuft bereits.")
@@ -1475,7 +2165,7 @@ def handle_exception(exc_type, exc_value, exc_traceback):
          if status_window and status_label:
              error_msg = str(exc_value)
              status_msg = f"FATAL ERROR: {error_msg[:100]}" + ("..." if len(error_msg) > 100 else "")
-             status_window.after(0, lambda: status_label.config(text=status_msg, foreground="red"))
+             update_status(status_msg, "red")
     except Exception as gui_err:
         logger.error(f"Konnte fatalen Fehler nicht im GUI anzeigen: {gui_err}")
 
@@ -1496,7 +2186,11 @@ def main():
         except Exception: pass
         sys.exit(1)
 
-    main_start_time = time.time()
+    setup_logging()
+    if backend is None:
+        set_backend(backends.default_backend())
+
+    main_start_time = clock.time()
     try:
         logger.info("=============================================")
         logger.info(f"Path of Exile Inventory Manager (Async) wird gestartet...")
@@ -1521,7 +2215,11 @@ def main():
         try:
             keyboard.add_hotkey('.', start_script, trigger_on_release=False)
             keyboard.add_hotkey('esc', stop_script, trigger_on_release=False)
-            logger.info("Globale Hotkeys registriert: [.] Start Scan, [Esc] Stop Scan.")
+            keyboard.add_hotkey('ctrl+alt+p', lambda: set_profile_next_round(not profile_next_round), trigger_on_release=False)
+            keyboard.add_hotkey('f2', lambda: calibration_hotkey("capture"), trigger_on_release=False)
+            keyboard.add_hotkey('f3', lambda: calibration_hotkey("skip"), trigger_on_release=False)
+            logger.info("Globale Hotkeys registriert: [.] Start Scan, [Esc] Stop Scan / Kalibrierung abbrechen, "
+                        "[Strg+Alt+P] nächste Runde profilieren, [F2]/[F3] Kalibrierung: Position übernehmen/überspringen.")
         except Exception as e:
             logger.error(f"Fehler beim Registrieren der globalen Hotkeys: {e}. Hotkeys sind deaktiviert.", exc_info=True)
             update_status("Fehler: Hotkeys nicht aktiv!", "red")
@@ -1537,7 +2235,7 @@ def main():
         logger.critical(f"Unerwarteter Fehler im Haupt-Thread: {e}", exc_info=True)
     finally:
         # --- Cleanup ---
-        shutdown_start_time = time.time()
+        shutdown_start_time = clock.time()
         logger.info("Beende Programm und räume auf...")
 
         global running
@@ -1550,14 +2248,20 @@ def main():
             logger.error(f"Fehler beim Entfernen der Hotkeys: {e}", exc_info=False)
 
         try:
-             pyautogui.keyUp('ctrl')
-             pyautogui.keyUp('shift')
-             pyautogui.keyUp('alt')
+             backend.input.key_up('ctrl')
+             backend.input.key_up('shift')
+             backend.input.key_up('alt')
         except Exception: pass
 
-        time.sleep(0.1)
+        set_metrics(False) # Letzten Metrik-Snapshot schreiben
+        if config_writer:
+            config_writer.stop() # Ausstehende Konfigurationsänderungen sofort schreiben
+
+        clock.sleep(0.1)
 
-        logger.info(f"Programm beendet. Laufzeit: {time.time() - main_start_time:.2f}s. Aufräumzeit: {time.time() - shutdown_start_time:.2f}s.")
+        logger.info(f"Programm beendet. Laufzeit: {clock.time() - main_start_time:.2f}s. Aufräumzeit: {clock.time() - shutdown_start_time:.2f}s.")
+        if logging_pipeline:
+            logging_pipeline.stop() # Queue leeren, bevor die Handler geschlossen werden
         logging.shutdown()
 
 